@@ -0,0 +1,197 @@
+"""Load test of the projection service, reports the latency percentiles of requests.
+
+Usage:
+    python -m benchmarks.load_test                          # serve a synthetic line in a subprocess
+    python -m benchmarks.load_test --port 8765 --line a     # test a running shapelyM serve
+    python -m benchmarks.load_test --clients 256 --requests 20000 --points 4 --window-ms 1
+
+Every client keeps one connection open and sends its requests one after the other. Points of the synthetic
+line are within 50 meter of its vertices, points for a running service are random in the bounds of the line.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.synthetic import random_line
+from shapelyM import storage
+from shapelyM.measureLineString import MeasureLineString
+
+
+async def _request(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str, body: Any = None
+) -> Tuple[int, Any]:
+    data = b"" if body is None else json.dumps(body).encode()
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: load-test\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def _client(
+    host: str, port: int, line: Optional[str], points: np.ndarray, n_points: int, latencies: List[float]
+) -> int:
+    """Send all requests of one client, returns the number of failed requests."""
+    reader, writer = await asyncio.open_connection(host, port)
+    failed = 0
+    try:
+        for start in range(0, len(points), n_points):
+            body: Dict[str, Any] = {"points": points[start : start + n_points].tolist()}
+            if line is not None:
+                body["line"] = line
+            started = time.perf_counter()
+            status, _ = await _request(reader, writer, "POST", "/project", body)
+            latencies.append(time.perf_counter() - started)
+            failed += status != 200
+    finally:
+        writer.close()
+    return failed
+
+
+async def load_test(
+    host: str,
+    port: int,
+    line: Optional[str],
+    clients: int,
+    requests: int,
+    n_points: int,
+    near: Optional[np.ndarray] = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Run the load test against a running service.
+
+    :param near: optional (n, 2) vertices of the line, points are within 50 meter of these, default random in
+        the bounds of the line
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    _, lines = await _request(reader, writer, "GET", "/lines")
+    writer.close()
+    info = next((item for item in lines["lines"] if line is None or item["key"] == line), None)
+    if info is None:
+        raise ValueError(f"line {line} not served.")
+    x_min, y_min, x_max, y_max = info["bounds"]
+
+    rng = np.random.default_rng(seed)
+    per_client = max(requests // clients, 1)
+
+    def sample(n: int) -> np.ndarray:
+        if near is None:
+            return rng.uniform([x_min, y_min], [x_max, y_max], (n, 2))
+        return near[rng.integers(0, len(near), n)] + rng.uniform(-50, 50, (n, 2))
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    failed = await asyncio.gather(
+        *(
+            _client(
+                host,
+                port,
+                line,
+                sample(per_client * n_points),
+                n_points,
+                latencies,
+            )
+            for _ in range(clients)
+        )
+    )
+    seconds = time.perf_counter() - started
+    milliseconds = np.array(latencies) * 1000
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "points_per_request": n_points,
+        "failed": sum(failed),
+        "seconds": seconds,
+        "requests_per_second": len(latencies) / seconds,
+        "points_per_second": len(latencies) * n_points / seconds,
+        "latency_ms": {
+            name: float(np.percentile(milliseconds, percentile))
+            for name, percentile in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+    }
+
+
+def _serve_synthetic(
+    n_vertices: int, window_ms: float, max_points: int, directory: str
+) -> Tuple[subprocess.Popen, int, np.ndarray]:
+    """Start shapelyM serve on a synthetic line in a subprocess, returns the process, port and vertices."""
+    path = Path(directory) / "line.shpm"
+    xy = random_line(n_vertices)
+    storage.save(MeasureLineString(xy), path)
+    command = [sys.executable, "-m", "shapelyM.cli", "serve", "--lines", str(path), "--port", "0"]
+    command += ["--window-ms", str(window_ms), "--max-points", str(max_points)]
+    process = subprocess.Popen(command, stderr=subprocess.PIPE, text=True)
+    assert process.stderr is not None
+    # the server reports the port it listens on
+    for line in process.stderr:
+        if "listening on" in line:
+            return process, int(line.rsplit(":", 1)[1]), xy
+    raise RuntimeError("the server did not start.")
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="port of a running service, default serve a synthetic line")
+    parser.add_argument("--line", help="key of the line, default the only line")
+    parser.add_argument("--clients", type=int, default=64, help="number of concurrent connections")
+    parser.add_argument("--requests", type=int, default=10_000, help="total number of requests")
+    parser.add_argument("--points", type=int, default=1, help="number of points per request")
+    parser.add_argument("--vertices", type=int, default=10_000, help="vertices of the synthetic line")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="batch window of the synthetic service")
+    parser.add_argument(
+        "--max-points", type=int, default=1024, help="max points per batch of the synthetic service"
+    )
+    parser.add_argument("--output", type=Path, help="optional json file for the result")
+    args = parser.parse_args(arguments)
+
+    with tempfile.TemporaryDirectory() as directory:
+        process = near = None
+        port = args.port
+        if port is None:
+            process, port, near = _serve_synthetic(args.vertices, args.window_ms, args.max_points, directory)
+        try:
+            result = asyncio.run(
+                load_test(args.host, port, args.line, args.clients, args.requests, args.points, near)
+            )
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    latency = result["latency_ms"]
+    print(
+        f"{result['requests']} requests of {args.points} point(s) by {args.clients} clients in "
+        f"{result['seconds']:.2f} s: {result['requests_per_second']:.0f} requests/s, "
+        f"p50 {latency['p50']:.2f} ms, p95 {latency['p95']:.2f} ms, p99 {latency['p99']:.2f} ms, "
+        f"{result['failed']} failed"
+    )
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2))
+    return 0 if not result["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
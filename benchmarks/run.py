@@ -0,0 +1,345 @@
+"""Benchmark construction, projection and cutting of measured lines.
+
+Usage:
+    python -m benchmarks.run                              # quick preset, saved in bench_output.json
+    python -m benchmarks.run --preset full                # 10 to 1M vertices
+    python -m benchmarks.run --compare benchmarks/baselines/0.0.6-dev7-quick.json
+    python -m benchmarks.run --save-baseline              # saved in benchmarks/baselines
+
+Every case records the throughput, latency percentiles of single calls and the peak memory (tracemalloc, in
+a separate run so tracing does not change the timings). Results are saved as json, --compare reports the
+throughput against a saved baseline and exits with 1 if a case is slower than the tolerance. Baselines are
+only written with --save-baseline, a run never overwrites the file it compares with.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+
+import shapelyM
+from benchmarks.synthetic import VARIANTS, random_line, random_network, random_points
+from shapelyM.events import EventTable, overlay
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.measureNetwork import MeasureNetwork
+from shapelyM.measurePoint import MeasurePoint
+
+PRESETS: Dict[str, Dict[str, Any]] = {
+    "quick": {"sizes": [10, 1_000, 100_000], "points": 10_000, "calls": 200},
+    "full": {"sizes": [10, 1_000, 10_000, 100_000, 1_000_000], "points": 100_000, "calls": 1_000},
+}
+
+BASELINES = Path(__file__).parent / "baselines"
+DEFAULT_OUTPUT = Path("bench_output.json")
+
+# import statements timed in a fresh interpreter, by variant name
+IMPORTS: Dict[str, str] = {
+    "package": "import shapelyM",
+    "measure_point": "from shapelyM import MeasurePoint",
+    "measure_line": "from shapelyM import MeasureLineString",
+}
+
+
+def _latencies(function: Callable[[Any], Any], arguments: List[Any], warmup: int = 3) -> np.ndarray:
+    """Returns the latency in seconds of every call, after a few warmup calls on the first argument."""
+    for _ in range(warmup):
+        function(arguments[0])
+    latencies = np.empty(len(arguments))
+    for idx, argument in enumerate(arguments):
+        start = time.perf_counter()
+        function(argument)
+        latencies[idx] = time.perf_counter() - start
+    return latencies
+
+
+def _peak_memory(function: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _result(
+    case: str, variant: str, vertices: int, points: int, latencies: np.ndarray, items_per_call: int, unit: str
+) -> Dict[str, Any]:
+    """Result of a case, the throughput is based on the median latency to be robust against outliers."""
+    seconds = float(latencies.sum())
+    median = float(np.median(latencies))
+    return {
+        "case": case,
+        "variant": variant,
+        "vertices": vertices,
+        "points": points,
+        "calls": len(latencies),
+        "seconds": seconds,
+        "throughput": items_per_call / median if median else float("inf"),
+        "unit": unit,
+        "latency_ms": {
+            name: float(np.percentile(latencies, percentile) * 1000)
+            for name, percentile in (("p50", 50), ("p95", 95), ("p99", 99))
+        },
+    }
+
+
+def bench_line(
+    variant: str, n_vertices: int, n_points: int, calls: int, repeats: int = 5, seed: int = 0
+) -> List[Dict[str, Any]]:
+    """Benchmark one line size and variant."""
+    coordinates = random_line(n_vertices, variant, seed)
+    m_given = variant == "m_given"
+    line = MeasureLineString(coordinates, m_given=m_given)
+    line.spatial_index  # build the index outside the projection timings
+    points = random_points(coordinates, n_points, seed=seed)
+    rng = np.random.default_rng(seed)
+    results = []
+
+    def construct(_):
+        return MeasureLineString(coordinates, m_given=m_given).spatial_index
+
+    repeat = max(3, min(calls, 1_000_000 // n_vertices))
+    latencies = _latencies(construct, [None] * repeat, warmup=1)
+    result = _result("construct", variant, n_vertices, 0, latencies, n_vertices, "vertices/s")
+    result["peak_memory_bytes"] = _peak_memory(lambda: construct(None))
+    results.append(result)
+
+    scalar_points = [
+        MeasurePoint(*point) if variant != "2d" else MeasurePoint(*point[:2]) for point in points[:calls]
+    ]
+    result = _result(
+        "project",
+        variant,
+        n_vertices,
+        len(scalar_points),
+        _latencies(line.project, scalar_points),
+        1,
+        "points/s",
+    )
+    result["peak_memory_bytes"] = _peak_memory(lambda: line.project(scalar_points[0]))
+    results.append(result)
+
+    result = _result(
+        "project_many",
+        variant,
+        n_vertices,
+        n_points,
+        _latencies(line.project_many, [points] * repeats, warmup=1),
+        n_points,
+        "points/s",
+    )
+    result["peak_memory_bytes"] = _peak_memory(lambda: line.project_many(points))
+    results.append(result)
+
+    measures = rng.uniform(line.start_measure, line.end_measure, (calls, 2))
+    measures.sort(axis=1)
+    result = _result(
+        "cut", variant, n_vertices, calls, _latencies(line.cut, measures[:, 0].tolist()), 1, "cuts/s"
+    )
+    result["peak_memory_bytes"] = _peak_memory(lambda: line.cut(measures[0, 0]).result.coordinate_list())
+    results.append(result)
+
+    def cut_profile(interval):
+        return line.cut_profile(*interval)
+
+    intervals = measures.tolist()
+    result = _result(
+        "cut_profile", variant, n_vertices, calls, _latencies(cut_profile, intervals), 1, "profiles/s"
+    )
+    result["peak_memory_bytes"] = _peak_memory(lambda: cut_profile(intervals[0]).result.coordinate_list())
+    results.append(result)
+
+    # a station every measure unit over the whole line
+    n_stations = len(line.stations(1)[0])
+    result = _result(
+        "stations",
+        variant,
+        n_vertices,
+        n_stations,
+        _latencies(line.stations, [1] * repeats, warmup=1),
+        n_stations,
+        "stations/s",
+    )
+    result["peak_memory_bytes"] = _peak_memory(lambda: line.stations(1))
+    results.append(result)
+
+    # four event tables with an event per 10 vertices each
+    tables = []
+    for name in ("speed", "gradient", "zone", "class"):
+        boundaries = np.sort(rng.uniform(line.start_measure, line.end_measure, max(n_vertices // 10, 2)))
+        values = rng.integers(0, 5, len(boundaries) - 1).tolist()
+        tables.append(EventTable(name, boundaries[:-1], boundaries[1:], values))
+    n_events = sum(len(table) for table in tables)
+    result = _result(
+        "overlay",
+        variant,
+        n_vertices,
+        n_events,
+        _latencies(lambda _: overlay(line, tables), [None] * repeats, warmup=1),
+        n_events,
+        "events/s",
+    )
+    result["peak_memory_bytes"] = _peak_memory(lambda: overlay(line, tables))
+    results.append(result)
+    return results
+
+
+def bench_network(
+    n_lines: int, n_vertices: int, n_points: int, repeats: int = 5, seed: int = 0
+) -> Dict[str, Any]:
+    """Benchmark a batch projection on a network of lines."""
+    lines = random_network(n_lines, n_vertices, seed)
+    network = MeasureNetwork(search_radius=25)
+    for coordinates in lines:
+        network.add(MeasureLineString(coordinates))
+    rng = np.random.default_rng(seed)
+    points = np.concatenate(
+        [random_points(lines[idx], 1, seed=seed + idx)[:, :2] for idx in rng.integers(0, n_lines, n_points)]
+    )
+    result = _result(
+        "network_project_many",
+        "2d",
+        n_lines * n_vertices,
+        n_points,
+        _latencies(network.project_many, [points] * repeats, warmup=1),
+        n_points,
+        "points/s",
+    )
+    result["lines"] = n_lines
+    result["peak_memory_bytes"] = _peak_memory(lambda: network.project_many(points))
+    return result
+
+
+def _import_seconds(statement: str) -> float:
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return float(output)
+
+
+def bench_imports(repeats: int = 10) -> List[Dict[str, Any]]:
+    """Benchmark the import time of the package in fresh interpreters, guards the lazy imports."""
+    return [
+        _result(
+            "import",
+            variant,
+            0,
+            0,
+            np.array([_import_seconds(statement) for _ in range(repeats)]),
+            1,
+            "imports/s",
+        )
+        for variant, statement in IMPORTS.items()
+    ]
+
+
+def run(sizes: List[int], n_points: int, calls: int, variants: List[str]) -> List[Dict[str, Any]]:
+    print("  import", file=sys.stderr)
+    results = bench_imports()
+    for variant in variants:
+        for size in sizes:
+            print(f"{variant:>8} {size:>9} vertices", file=sys.stderr)
+            results.extend(bench_line(variant, size, n_points, calls))
+    print(" network", file=sys.stderr)
+    results.append(bench_network(100, 100, min(n_points, 10_000)))
+    return results
+
+
+def metadata(preset: Optional[str]) -> Dict[str, Any]:
+    return {
+        "shapelyM": shapelyM.__version__,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "shapely": shapely.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "preset": preset,
+    }
+
+
+def _key(result: Dict[str, Any]) -> Tuple[Any, ...]:
+    return result["case"], result["variant"], result["vertices"], result["points"]
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> bool:
+    """Print the throughput against a baseline, returns False if a case is slower than the tolerance."""
+    previous = {_key(result): result for result in baseline["results"]}
+    passed = True
+    print(f"{'case':<22}{'variant':>9}{'vertices':>10}{'points':>8}{'baseline':>14}{'now':>14}{'ratio':>8}")
+    for result in results:
+        before = previous.get(_key(result))
+        if before is None:
+            continue
+        ratio = result["throughput"] / before["throughput"]
+        slower = ratio < 1 - tolerance
+        passed = passed and not slower
+        print(
+            f"{result['case']:<22}{result['variant']:>9}{result['vertices']:>10}{result['points']:>8}"
+            f"{before['throughput']:>14.0f}{result['throughput']:>14.0f}{ratio:>8.2f}",
+            "SLOWER" if slower else "",
+        )
+    return passed
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--sizes", type=int, nargs="+", help="number of vertices per line, overrules preset")
+    parser.add_argument("--points", type=int, help="number of points of a batch projection, overrules preset")
+    parser.add_argument("--calls", type=int, help="number of single calls per case, overrules preset")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--output", type=Path, help="json file, default bench_output.json")
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="save as baseline, default output benchmarks/baselines/<version>-<preset>.json",
+    )
+    parser.add_argument("--compare", type=Path, help="baseline json file to compare the throughput with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slow down, 0.2 is 20 percent")
+    args = parser.parse_args(arguments)
+
+    if args.output is not None:
+        output = args.output
+    elif args.save_baseline:
+        output = BASELINES / f"{shapelyM.__version__}-{args.preset}.json"
+    else:
+        output = DEFAULT_OUTPUT
+    # the baseline is read before anything is written
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    if args.compare and output.resolve() == args.compare.resolve() and not args.save_baseline:
+        parser.error(f"{output} is the compared baseline, give another --output or --save-baseline.")
+
+    preset = PRESETS[args.preset]
+    results = run(
+        args.sizes or preset["sizes"],
+        args.points or preset["points"],
+        args.calls or preset["calls"],
+        args.variants,
+    )
+    report = {"meta": metadata(args.preset), "results": results}
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"saved {output}", file=sys.stderr)
+
+    if baseline is not None:
+        return 0 if compare(results, baseline, args.tolerance) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Synthetic, seeded lines, networks and points for the benchmarks."""
+
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+
+VARIANTS = ("2d", "3d", "m_given")
+
+
+def random_line(n_vertices: int, variant: str = "2d", seed: int = 0) -> np.ndarray:
+    """Returns coordinates of a smooth track like line with about 10 meter between the vertices.
+
+    :param n_vertices: number of vertices
+    :param variant: "2d" (x, y), "3d" (x, y, z) or "m_given" (x, y, z, m with m in kilometre posts)
+    :param seed: seed of the random generator
+    :return: (n, 2), (n, 3) or (n, 4) array
+    """
+    if variant not in VARIANTS:
+        raise ValueError(f"variant should be one of {VARIANTS}.")
+    rng = np.random.default_rng(seed)
+    heading = np.cumsum(rng.normal(0, 0.02, n_vertices))
+    step = rng.uniform(5, 15, n_vertices)
+    step[0] = 0
+    xy = np.column_stack([np.cumsum(step * np.sin(heading)), np.cumsum(step * np.cos(heading))])
+    if variant == "2d":
+        return xy
+
+    z = np.cumsum(rng.normal(0, 0.05, n_vertices))
+    if variant == "3d":
+        return np.column_stack([xy, z])
+
+    # calibrated measures are a few percent off the length
+    m = np.cumsum(step * rng.uniform(0.98, 1.02, n_vertices)) / 1000
+    return np.column_stack([xy, z, m])
+
+
+def random_network(n_lines: int, n_vertices: int, seed: int = 0) -> List[np.ndarray]:
+    """Returns coordinates of 2d lines spread over a square area."""
+    rng = np.random.default_rng(seed)
+    size = np.sqrt(n_lines) * n_vertices * 10
+    lines = []
+    for idx in range(n_lines):
+        line = random_line(n_vertices, "2d", seed + idx + 1)
+        lines.append(line + rng.uniform(0, size, 2))
+    return lines
+
+
+def random_points(coordinates: np.ndarray, n_points: int, offset: float = 5.0, seed: int = 0) -> np.ndarray:
+    """Returns (n_points, 3) points near the vertices of a line, z near the line for a 3d line."""
+    rng = np.random.default_rng(seed)
+    vertices = coordinates[rng.integers(0, len(coordinates), n_points)]
+    xy = vertices[:, :2] + rng.normal(0, offset, (n_points, 2))
+    z = vertices[:, 2] + rng.normal(0, 1, n_points) if coordinates.shape[1] > 2 else np.full(n_points, np.nan)
+    return np.column_stack([xy, z])
@@ -1,9 +1,35 @@
-from typing import Any, List
+"""Measured (linear referenced) lines on top of numpy, shapely is only imported when shapely objects are used.
+
+The public classes are imported lazily on first access, import shapelyM itself imports no numpy or shapely.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
 
 __version__ = "0.0.6-dev7"
 
-from shapelyM.linear_reference import LineProjection
-from shapelyM.measureLineString import MeasureLineString
-from shapelyM.measurePoint import MeasurePoint
+if TYPE_CHECKING:
+    from shapelyM.linear_reference import LineProjection
+    from shapelyM.measureLineString import MeasureLineString
+    from shapelyM.measurePoint import MeasurePoint
+
+# public name and the module it is imported from on first access
+_lazy_imports = {
+    "MeasurePoint": "shapelyM.measurePoint",
+    "MeasureLineString": "shapelyM.measureLineString",
+    "LineProjection": "shapelyM.linear_reference",
+}
 
 __all__: List[Any] = ["MeasurePoint", "MeasureLineString", "LineProjection"]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _lazy_imports:
+        value = getattr(import_module(_lazy_imports[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_lazy_imports))
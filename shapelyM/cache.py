@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Hashable, List, Optional, Tuple, Union
+
+from shapelyM.linear_reference import LineProjection
+from shapelyM.measureLineString import MeasureCut, MeasureLineString, MeasureProfile
+from shapelyM.measurePoint import MeasurePoint, as_measure_point
+
+if TYPE_CHECKING:
+    from shapely.geometry import Point
+
+
+def line_content_hash(line: MeasureLineString) -> str:
+    """Returns a hash of the vertices, measures and m_given flag of a line."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(b"m_given" if line.m_given else b"m")
+    digest.update(line.xy.tobytes())
+    digest.update(b"z" if line.z is None else line.z.tobytes())
+    digest.update(line.m.tobytes())
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class CacheStats:
+    """Statistics of a ProjectionCache."""
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+
+class ProjectionCache:
+    """Opt-in, thread-safe LRU cache for project, cut and cut_profile results.
+
+    Entries are keyed by the content hash of the line and the query quantized on the given quantum, so a
+    rebuilt line with other vertices never hits the entries of the old line, and queries that differ less
+    than the quantum share one result. Cached results are shared between callers and should not be changed.
+
+    Example:
+        cache = ProjectionCache(max_size=10000)
+        projection = cache.project(line, Point(1, 5), azimuth=90)
+        print(cache.stats())
+    """
+
+    def __init__(self, max_size: int = 4096, quantum: float = 1e-6):
+        """Create an empty cache.
+
+        :param max_size: max number of cached results, the least recently used result is evicted first
+        :param quantum: coordinates, azimuths and measures are rounded on this step in the cache key
+        """
+        if max_size < 1:
+            raise ValueError("max_size should be at least 1.")
+        if quantum <= 0:
+            raise ValueError("quantum should be larger then 0.")
+        self.max_size: int = max_size
+        self.quantum: float = quantum
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._line_hashes: weakref.WeakKeyDictionary[MeasureLineString, str] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _line_hash(self, line: MeasureLineString) -> str:
+        with self._lock:
+            line_hash = self._line_hashes.get(line)
+        if line_hash is None:
+            line_hash = line_content_hash(line)
+            with self._lock:
+                self._line_hashes[line] = line_hash
+        return line_hash
+
+    def _quantize(self, *values: Optional[float]) -> Tuple[Union[int, str, None], ...]:
+        key: List[Union[int, str, None]] = []
+        for value in values:
+            if value is None:
+                key.append(None)
+            elif math.isfinite(value):
+                key.append(round(value / self.quantum))
+            else:
+                # nan and infinite values can not be rounded, they are their own key value
+                key.append(str(value))
+        return tuple(key)
+
+    def _get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self._misses += 1
+
+        # computed outside the lock, concurrent misses on one key may both compute, the last result is kept
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return result
+
+    def project(
+        self, line: MeasureLineString, point: Union[MeasurePoint, Point], azimuth: Optional[float] = None
+    ) -> LineProjection:
+        """Cached MeasureLineString.project."""
+        point = as_measure_point(point)
+        key = ("project", self._line_hash(line), self._quantize(point.x, point.y, point.z, azimuth))
+        return self._get_or_compute(key, lambda: line.project(point, azimuth=azimuth))
+
+    def cut(self, line: MeasureLineString, measure: float) -> MeasureCut:
+        """Cached MeasureLineString.cut."""
+        key = ("cut", self._line_hash(line), self._quantize(measure))
+        return self._get_or_compute(key, lambda: line.cut(measure))
+
+    def cut_profile(self, line: MeasureLineString, from_measure: float, to_measure: float) -> MeasureProfile:
+        """Cached MeasureLineString.cut_profile."""
+        key = ("cut_profile", self._line_hash(line), self._quantize(from_measure, to_measure))
+        return self._get_or_compute(key, lambda: line.cut_profile(from_measure, to_measure))
+
+    def invalidate(self, line: MeasureLineString) -> int:
+        """Remove all results of a line, needed only if the arrays of a line are changed in place.
+
+        :return: number of removed results
+        """
+        with self._lock:
+            line_hash = self._line_hashes.pop(line, None)
+            if line_hash is None:
+                return 0
+            keys = [key for key in self._entries if key[1] == line_hash]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """Remove all results and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._line_hashes.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def stats(self) -> CacheStats:
+        """Returns the hit, miss and eviction counts and the size of the cache."""
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                max_size=self.max_size,
+            )
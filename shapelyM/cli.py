@@ -0,0 +1,365 @@
+"""Command line interface, the shapelyM console script.
+
+Example:
+    shapelyM project --lines lines.geojson --points points.csv --out results.parquet --workers 8
+    shapelyM serve --lines lines.geojson --port 8765
+
+Lines are read from GeoJSON (a FeatureCollection of LineStrings), GeoJSON lines or a file saved by
+shapelyM.storage. A single line is projected on as MeasureLineString, more lines as MeasureNetwork. Points
+are streamed in chunks through the batch projection, the results are written per chunk and the throughput
+is reported at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from shapelyM import __version__, storage
+from shapelyM.helpers import LEFT_RIGHT_CODES
+from shapelyM.linear_reference import FUNCTIONAL_DIRECTION_CODES, ProjectionBatch
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.measureNetwork import MeasureNetwork, NetworkProjectionBatch
+from shapelyM.streaming import iter_chunks, readers
+
+Target = Union[MeasureLineString, MeasureNetwork]
+Batch = Union[ProjectionBatch, NetworkProjectionBatch]
+
+# line or network of a worker process, loaded once by the pool initializer
+_worker_target: Optional[Target] = None
+
+
+def read_lines(
+    path: Union[str, Path], key: Optional[str] = None, m_given: bool = False
+) -> Dict[Hashable, MeasureLineString]:
+    """Read LineString features from a GeoJSON or GeoJSON lines file.
+
+    :param path: path of the file
+    :param key: optional feature property used as key of a line, default the feature id or position
+    :param m_given: True if the last coordinate value is a given measure
+    :return: dict of key and MeasureLineString in file order
+    """
+    with open(path) as file:
+        if Path(path).suffix.lower() in (".geojson", ".json"):
+            data = json.load(file)
+            features = data["features"] if data.get("type") == "FeatureCollection" else [data]
+        else:
+            features = [json.loads(line.strip().lstrip("\x1e")) for line in file if line.strip()]
+
+    lines: Dict[Hashable, MeasureLineString] = {}
+    for idx, feature in enumerate(features):
+        geometry = feature.get("geometry", feature)
+        if geometry.get("type") != "LineString":
+            raise ValueError(f"feature {idx} is a {geometry.get('type')}, only LineStrings are supported.")
+        line_key = feature.get("id", idx)
+        if key is not None:
+            line_key = (feature.get("properties") or {}).get(key)
+        if line_key in lines:
+            raise ValueError(f"line key {line_key} is not unique.")
+        lines[line_key] = MeasureLineString(geometry["coordinates"], m_given=m_given)
+    return lines
+
+
+def load_target(
+    path: Union[str, Path],
+    key: Optional[str] = None,
+    m_given: bool = False,
+    search_radius: float = 10.0,
+    k: int = 1,
+) -> Target:
+    """Returns a line if the file has one line, else a network of all lines."""
+    if Path(path).suffix.lower() == ".shpm":
+        return storage.load(path)
+
+    lines = read_lines(path, key, m_given)
+    if not lines:
+        raise ValueError(f"no lines in {path}.")
+    if len(lines) == 1:
+        return next(iter(lines.values()))
+    network = MeasureNetwork(search_radius=search_radius, k=k)
+    network.extend(lines)
+    return network
+
+
+def _project(target: Target, chunk: np.ndarray) -> Batch:
+    azimuth = chunk[:, 3] if chunk.shape[1] == 4 else None
+    return target.project_many(chunk[:, :3], azimuth=azimuth)
+
+
+def _init_worker(path: str) -> None:
+    global _worker_target
+    _worker_target = storage.load(path)
+
+
+def _project_chunk(chunk: np.ndarray) -> Batch:
+    assert _worker_target is not None
+    return _project(_worker_target, chunk)
+
+
+def project_chunks(
+    target: Target, chunks: Iterable[np.ndarray], workers: int = 1
+) -> Iterator[Tuple[int, Batch]]:
+    """Project chunks of points in input order, in worker processes if workers is more than 1.
+
+    The target is saved once in a temporary file that every worker memory maps. At most two chunks per worker
+    are in flight, so reading the next chunks overlaps with projecting and memory use stays bounded.
+
+    :return: iterator of the number of points and the batch of every chunk
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield len(chunk), _project(target, chunk)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "target.shpm")
+        storage.save(target, path)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path,)) as executor:
+            pending: Deque[Tuple[int, Future]] = deque()
+            for chunk in chunks:
+                pending.append((len(chunk), executor.submit(_project_chunk, chunk)))
+                if len(pending) >= 2 * workers:
+                    size, future = pending.popleft()
+                    yield size, future.result()
+            while pending:
+                size, future = pending.popleft()
+                yield size, future.result()
+
+
+def _empty_batch(target: Target) -> Batch:
+    if isinstance(target, MeasureNetwork):
+        empty = np.empty(0, dtype=np.intp)
+        return NetworkProjectionBatch(empty, np.empty(0, dtype=object), empty, ProjectionBatch.empty())
+    return ProjectionBatch.empty()
+
+
+def result_columns(batch: Batch, offset: int = 0) -> Dict[str, np.ndarray]:
+    """Returns the flat output columns of a batch, enums as their string value.
+
+    :param batch: ProjectionBatch or NetworkProjectionBatch
+    :param offset: index of the first point of the batch in the input
+    """
+    if isinstance(batch, NetworkProjectionBatch):
+        columns = {
+            "point_index": batch.point_index + offset,
+            "line_key": batch.line_key.astype(str),
+            "rank": batch.rank,
+        }
+        projection = batch.projection
+    else:
+        columns = {"point_index": np.arange(offset, offset + len(batch))}
+        projection = batch
+
+    columns.update(projection.columns())
+    columns["functional_direction"] = np.array([item.value for item in FUNCTIONAL_DIRECTION_CODES])[
+        projection.functional_direction_code
+    ]
+    columns["side_of_line"] = np.array([item.value for item in LEFT_RIGHT_CODES])[
+        projection.side_of_line_code
+    ]
+    return columns
+
+
+class CsvWriter:
+    """Writes the result columns of every chunk as csv rows, after one header row."""
+
+    def __init__(self, path: Union[str, Path], delimiter: str = ","):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file, delimiter=delimiter)
+        self._header = False
+
+    def write(self, columns: Dict[str, np.ndarray]) -> None:
+        if not self._header:
+            self._writer.writerow(columns)
+            self._header = True
+        self._writer.writerows(zip(*(values.tolist() for values in columns.values())))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetWriter:
+    """Writes the result columns of every chunk as row group of a parquet file. Needs the optional pyarrow."""
+
+    def __init__(self, path: Union[str, Path]):
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as error:
+            raise ImportError("parquet output needs pyarrow, install shapelyM[arrow].") from error
+        self._path = path
+        self._writer: Any = None
+
+    def write(self, columns: Dict[str, np.ndarray]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table(columns)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+class NpzWriter:
+    """Collects all chunks, a npz file can not be written in parts."""
+
+    def __init__(self, path: Union[str, Path]):
+        self._path = path
+        self._chunks: List[Dict[str, np.ndarray]] = []
+
+    def write(self, columns: Dict[str, np.ndarray]) -> None:
+        self._chunks.append(columns)
+
+    def close(self) -> None:
+        if not self._chunks:
+            return
+        np.savez(
+            self._path,
+            **{name: np.concatenate([chunk[name] for chunk in self._chunks]) for name in self._chunks[0]},
+        )
+
+
+writers = {".csv": CsvWriter, ".parquet": ParquetWriter, ".npz": NpzWriter}
+
+
+def project_command(args: argparse.Namespace) -> Tuple[int, int]:
+    """Run the project command, returns the number of points read and rows written."""
+    target = load_target(args.lines, args.key, args.m_given, args.search_radius, args.k)
+
+    suffix = Path(args.points).suffix.lower()
+    if suffix not in readers:
+        raise ValueError(f"no reader for {suffix} point files, use one of {sorted(readers)}.")
+    reader_kwargs: Dict[str, Any] = {"azimuth": args.azimuth}
+    if suffix == ".csv":
+        reader_kwargs.update(x=args.x, y=args.y, z=args.z, delimiter=args.delimiter)
+    chunks = iter_chunks(readers[suffix](args.points, **reader_kwargs), args.chunk_size)
+
+    out_suffix = Path(args.out).suffix.lower()
+    if out_suffix not in writers:
+        raise ValueError(f"no writer for {out_suffix} files, use one of {sorted(writers)}.")
+    writer = writers[out_suffix](args.out)
+
+    n_points, n_rows = 0, 0
+    try:
+        for size, batch in project_chunks(target, chunks, args.workers):
+            writer.write(result_columns(batch, n_points))
+            n_points += size
+            n_rows += len(batch)
+        if not n_rows:
+            writer.write(result_columns(_empty_batch(target)))
+    finally:
+        writer.close()
+    return n_points, n_rows
+
+
+def parser() -> argparse.ArgumentParser:
+    main_parser = argparse.ArgumentParser(
+        prog="shapelyM", description="Linear referencing of points on lines."
+    )
+    main_parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    commands = main_parser.add_subparsers(dest="command", required=True)
+
+    project = commands.add_parser(
+        "project",
+        help="project a file of points on a file of lines",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    project.add_argument("--lines", required=True, help="lines as .geojson, GeoJSON lines or .shpm file")
+    project.add_argument("--points", required=True, help="points as .csv or GeoJSON lines file")
+    project.add_argument("--out", required=True, help="results as .parquet, .csv or .npz file")
+    project.add_argument("--workers", type=int, default=1, help="number of worker processes, default 1")
+    project.add_argument("--chunk-size", type=int, default=65536, help="number of points per chunk")
+    project.add_argument("--key", help="feature property used as line key, default the feature id")
+    project.add_argument("--m-given", action="store_true", help="last coordinate value of lines is a measure")
+    project.add_argument(
+        "--search-radius", type=float, default=10.0, help="max distance to a line of a network"
+    )
+    project.add_argument("--k", type=int, default=1, help="max number of lines of a network per point")
+    project.add_argument("--x", default="x", help="x column of a csv")
+    project.add_argument("--y", default="y", help="y column of a csv")
+    project.add_argument("--z", help="optional z column of a csv")
+    project.add_argument("--azimuth", help="optional azimuth column or property")
+    project.add_argument("--delimiter", default=",", help="column delimiter of a csv")
+
+    serve = commands.add_parser("serve", help="serve projections on lines as local json api")
+    serve.add_argument("--lines", required=True, help="lines as .geojson, GeoJSON lines or .shpm file")
+    serve.add_argument("--key", help="feature property used as line key, default the feature id")
+    serve.add_argument("--m-given", action="store_true", help="last coordinate value of lines is a measure")
+    serve.add_argument("--host", default="127.0.0.1", help="host to listen on")
+    serve.add_argument("--port", type=int, default=8765, help="port to listen on")
+    serve.add_argument("--window-ms", type=float, default=2.0, help="max wait of a request for a batch")
+    serve.add_argument("--max-points", type=int, default=1024, help="number of points that starts a batch")
+    return main_parser
+
+
+def load_lines(
+    path: Union[str, Path], key: Optional[str] = None, m_given: bool = False
+) -> Dict[Hashable, MeasureLineString]:
+    """Returns all lines of a GeoJSON, GeoJSON lines or storage file by key."""
+    if Path(path).suffix.lower() == ".shpm":
+        target = storage.load(path)
+        if isinstance(target, MeasureNetwork):
+            return {line_key: target[line_key] for line_key in target}
+        return {0: target}
+    return read_lines(path, key, m_given)
+
+
+def serve_command(args: argparse.Namespace) -> None:
+    from shapelyM.server import serve
+
+    lines = load_lines(args.lines, args.key, args.m_given)
+    serve(lines, args.host, args.port, args.window_ms / 1000, args.max_points)
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    args = parser().parse_args(arguments)
+    if args.command == "project" and args.workers < 1:
+        print("shapelyM: error: --workers should be at least 1.", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    try:
+        if args.command == "serve":
+            serve_command(args)
+            return 0
+        n_points, n_rows = project_command(args)
+    except (ValueError, KeyError, OSError, ImportError) as error:
+        print(f"shapelyM: error: {error}", file=sys.stderr)
+        return 1
+    seconds = time.perf_counter() - started
+    print(
+        f"projected {n_points} points in {seconds:.2f} s ({n_points / seconds:.0f} points/s), "
+        f"{n_rows} rows written to {args.out}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
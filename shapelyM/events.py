@@ -0,0 +1,148 @@
+"""Overlay of event tables along a line, dynamic segmentation.
+
+Every table holds intervals along the line with a value, e.g. speed limits, gradients or maintenance zones.
+overlay sweeps the sorted boundaries of all tables at once and splits the line wherever a value changes,
+every section holds a value per table and a view on the line between its measures.
+
+Example:
+    speed = EventTable("speed", [0, 400], [400, 1000], [80, 120])
+    zones = EventTable("zone", [250], [600], ["works"])
+    for section in overlay(line, [speed, zones]):
+        print(section.from_measure, section.to_measure, section.attributes, section.line.length_2d)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Hashable, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from shapelyM.measureLineString import MeasureLineString, MeasureLineStringView
+
+
+@dataclass
+class EventTable:
+    """Intervals along a line with a value each, intervals are sorted on creation.
+
+    Intervals of a table should not overlap, a measure outside all intervals has no value (None). Values
+    should be hashable, intervals of length 0 are ignored.
+    """
+
+    name: str
+    from_measures: np.ndarray
+    to_measures: np.ndarray
+    values: Sequence[Hashable]
+
+    def __post_init__(self):
+        from_measures = np.asarray(self.from_measures, dtype=float).reshape(-1)
+        to_measures = np.asarray(self.to_measures, dtype=float).reshape(-1)
+        if not len(from_measures) == len(to_measures) == len(self.values):
+            raise ValueError(f"table {self.name} should have a from and to measure for every value.")
+        if np.any(from_measures > to_measures):
+            raise ValueError(f"from measures of table {self.name} should not be larger then to measures.")
+
+        order = np.argsort(from_measures, kind="stable")
+        self.from_measures, self.to_measures = from_measures[order], to_measures[order]
+        self.values = [self.values[idx] for idx in order.tolist()]
+        if np.any(self.from_measures[1:] < self.to_measures[:-1]):
+            raise ValueError(f"intervals of table {self.name} overlap.")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def codes(self, measures: np.ndarray) -> np.ndarray:
+        """Returns the code of the value on every measure, -1 if there is no interval on the measure.
+
+        Equal values have the same code, a measure on a boundary gets the value of the interval from it.
+
+        :param measures: (N,) array of measures
+        :return: (N,) int array of codes, index in unique_values
+        """
+        index = np.searchsorted(self.from_measures, measures, side="right") - 1
+        valid = index >= 0
+        valid[valid] = measures[valid] < self.to_measures[index[valid]]
+        return np.where(valid, self._value_codes()[index], -1)
+
+    def _value_codes(self) -> np.ndarray:
+        codes = {value: code for code, value in enumerate(dict.fromkeys(self.values))}
+        return np.array([codes[value] for value in self.values] + [-1], dtype=np.intp)
+
+    @property
+    def unique_values(self) -> List[Hashable]:
+        """Distinct values in the order of first appearance along the line."""
+        return list(dict.fromkeys(self.values))
+
+
+@dataclass(frozen=True)
+class EventSection:
+    """Part of the line where the value of every table is the same."""
+
+    from_measure: float
+    to_measure: float
+    # a value per table in the order of the tables, None outside all intervals of a table
+    attributes: Tuple[Any, ...]
+    line: MeasureLineStringView
+
+
+def overlay_arrays(
+    line: MeasureLineString, tables: Sequence[EventTable], merge: bool = True
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Sweep the boundaries of all tables, returns the boundaries and value codes of the sections.
+
+    :param line: MeasureLineString the tables are measured on
+    :param tables: event tables
+    :param merge: merge neighbouring sections with the same values, e.g. two intervals with the same value
+    :return: (S + 1,) sorted section boundaries within the line and (S, T) codes of the value of every table,
+        see EventTable.codes
+    """
+    boundaries = np.concatenate(
+        [[line.start_measure, line.end_measure]]
+        + [table.from_measures for table in tables]
+        + [table.to_measures for table in tables]
+    )
+    boundaries = np.unique(np.clip(boundaries, line.start_measure, line.end_measure))
+    if len(boundaries) < 2:
+        return boundaries, np.empty((0, len(tables)), dtype=np.intp)
+
+    middle = (boundaries[:-1] + boundaries[1:]) / 2
+    codes = np.empty((len(middle), len(tables)), dtype=np.intp)
+    for column, table in enumerate(tables):
+        codes[:, column] = table.codes(middle)
+    if merge:
+        keep = np.r_[True, np.any(codes[1:] != codes[:-1], axis=1)]
+        boundaries, codes = np.append(boundaries[:-1][keep], boundaries[-1]), codes[keep]
+    return boundaries, codes
+
+
+def overlay(line: MeasureLineString, tables: Sequence[EventTable], merge: bool = True) -> List[EventSection]:
+    """Split the line wherever the value of a table changes, the sections cover the whole line.
+
+    Boundaries are sorted and located on the line once, every section is a view between two located
+    boundaries so the line is never rebuilt.
+
+    :param line: MeasureLineString the tables are measured on
+    :param tables: event tables
+    :param merge: merge neighbouring sections with the same values
+    :return: list of EventSection from start to end of the line
+    """
+    boundaries, codes = overlay_arrays(line, tables, merge)
+    if not len(codes):
+        return []
+
+    segment_index, fraction = line._locate_segments(boundaries)
+    points = line._points_at(segment_index, fraction, boundaries)
+    locations = list(zip(segment_index.tolist(), fraction.tolist()))
+    values: List[List[Union[Hashable, None]]] = [table.unique_values + [None] for table in tables]
+    measures = boundaries.tolist()
+    return [
+        EventSection(
+            from_measure=measures[idx],
+            to_measure=measures[idx + 1],
+            attributes=tuple(values[column][code] for column, code in enumerate(row)),
+            line=line._slice(
+                measures[idx], measures[idx + 1], locations[idx], locations[idx + 1], points[idx : idx + 2]
+            ),
+        )
+        for idx, row in enumerate(codes.tolist())
+    ]
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import math
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from enum import Enum
-from typing import List, Optional, Protocol, Union
+from typing import TYPE_CHECKING, List, Optional, Protocol, Union
 
 import numpy as np
-from shapely.geometry import LineString, Point
+
+if TYPE_CHECKING:
+    from shapely.geometry import LineString, Point
 
 
 class MinimalPointProtocol(Protocol):
@@ -16,16 +18,15 @@ class MinimalPointProtocol(Protocol):
     coords = List[float]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MinimalPoint:
-    """Minimal point optional z value."""
+    """Minimal immutable point optional z value, memory budget 56 bytes excluding the float values."""
 
     # todo: typechecker fails on this: could it be the property??
 
     x: float
     y: float
     z: Optional[float] = None
-    _coords: List[float] = field(default_factory=lambda: [])
 
     @property
     def coords(self) -> List[float]:
@@ -44,6 +45,8 @@ class MinimalPoint:
 
 def get_shapley_point_from_minimal_point(point: MinimalPointProtocol, force_2d: bool = None) -> Point:
     """Get a shapely object from a minimal point."""
+    from shapely.geometry import Point
+
     if point.z and not force_2d:
         return Point(point.x, point.y, point.z)
     else:
@@ -103,11 +106,7 @@ def get_azimuth_from_points(point1: MinimalPointProtocol, point2: MinimalPointPr
 
 def correct_azimuth(azimuth: float) -> float:
     """Add or subtract till in range 0-360."""
-    while azimuth < -0:
-        azimuth = +360
-    while azimuth > -0:
-        azimuth = -360
-    return azimuth
+    return azimuth % 360
 
 
 class LeftRightOnLineEnum(str, Enum):
@@ -118,7 +117,13 @@ class LeftRightOnLineEnum(str, Enum):
     on = "On vector"
 
 
+# int8 code of every LeftRightOnLineEnum member, the position in this tuple
+LEFT_RIGHT_CODES = tuple(LeftRightOnLineEnum)
+
+
 def project_point_on_azimuth(point: Point, azimuth: float, projection_distance: float = 0.5) -> Point:
+    from shapely.geometry import Point
+
     azimuth = correct_azimuth(azimuth)
     angle = 90 - azimuth
     angle_rad = math.radians(angle)
@@ -143,43 +148,68 @@ def determinate_left_right_on_line(
     :param projection_distance:
     :return: shapelyM.LeftRightOnLineEnum
     """
-    if not isinstance(point_to_check, Point):
-        point_to_check = get_shapley_point_from_minimal_point(point_to_check)
+    import shapely
 
     point_projected_on_azimuth_angle = project_point_on_azimuth(point_to_check, azimuth, projection_distance)
-    # azimuth = correct_azimuth(azimuth)
-    # angle = 90 - azimuth
-    # angle_rad = math.radians(angle)
-    # point_projected_on_azimuth_angle = Point(
-    #     point_to_check.x + projection_distance * math.cos(angle_rad),
-    #     point_to_check.y + projection_distance * math.sin(angle_rad),
-    # )
-
-    object_measure = shapely_line.project(point_to_check)
-    projected_measure = shapely_line.project(point_projected_on_azimuth_angle)
-    # if same probably on last part of line, adjust object measure -0.00000000
+    points = shapely.points(
+        [
+            [point_to_check.x, point_to_check.y],
+            [point_projected_on_azimuth_angle.x, point_projected_on_azimuth_angle.y],
+        ]
+    )
+
+    # array functions of shapely 2 release the GIL, threads checking points on one line run in parallel
+    object_measure, projected_measure = shapely.line_locate_point(shapely_line, points).tolist()
+    # if same probably on last part of line, adjust object measure
     if object_measure == projected_measure:
         object_measure = object_measure - 0.00001
 
-    object_point_on_line = shapely_line.interpolate(object_measure)
-    projected_point_on_line = shapely_line.interpolate(projected_measure)
-
-    distance_to_line = np.sign(
-        (object_point_on_line.x - projected_point_on_line.x) * (point_to_check.y - projected_point_on_line.y)
-        - (object_point_on_line.y - projected_point_on_line.y)
-        * (point_to_check.x - projected_point_on_line.x)
+    (object_x, object_y), (projected_x, projected_y) = shapely.get_coordinates(
+        shapely.line_interpolate_point(shapely_line, [object_measure, projected_measure])
+    ).tolist()
+    cross = (object_x - projected_x) * (point_to_check.y - projected_y) - (object_y - projected_y) * (
+        point_to_check.x - projected_x
     )
 
-    distance = point_to_check.distance(shapely_line)
+    distance = float(shapely.distance(points[0], shapely_line))
 
-    if distance < projection_distance or distance_to_line == 0:
+    if distance < projection_distance or cross == 0:
         return LeftRightOnLineEnum.on
-    elif distance_to_line < 0:
+    elif cross < 0:
         return LeftRightOnLineEnum.left
-    elif distance_to_line > 0:
-        return LeftRightOnLineEnum.right
+    return LeftRightOnLineEnum.right
+
+
+def determinate_left_right_on_segment(
+    segment_start: MinimalPointProtocol,
+    segment_end: MinimalPointProtocol,
+    point_to_check: MinimalPointProtocol,
+    distance_to_line: float,
+    direction_sign: float = 1.0,
+    projection_distance: float = 0.2,
+) -> LeftRightOnLineEnum:
+    """Left, right or on for a point given the segment it is projected on, by the sign of the cross product.
 
-    raise ValueError
+    Same rules as determinate_left_right_on_segments for a single point.
+
+    :param segment_start: first vertex of the segment
+    :param segment_end: last vertex of the segment
+    :param point_to_check: point to check
+    :param distance_to_line: 2d distance of the point to the line
+    :param direction_sign: 1 (downstream) or -1 (upstream) to mirror left and right
+    :param projection_distance: distance to the line that counts as on the line
+    :return: shapelyM.LeftRightOnLineEnum
+    """
+    cross = (
+        (segment_end.x - segment_start.x) * (point_to_check.y - segment_start.y)
+        - (segment_end.y - segment_start.y) * (point_to_check.x - segment_start.x)
+    ) * direction_sign
+
+    if distance_to_line < projection_distance or cross == 0:
+        return LeftRightOnLineEnum.on
+    elif cross > 0:
+        return LeftRightOnLineEnum.left
+    return LeftRightOnLineEnum.right
 
 
 def project_point_on_line(
@@ -214,7 +244,9 @@ def project_point_on_line(
         coordinates_2d = a + np.dot(ap, ab) / np.dot(ab, ab) * ab
         new_point = MinimalPoint(*coordinates_2d)
         if point_1.z is not None and point_2.z is not None:
-            new_point.z = get_z_between_points(point_1, point_2, new_point)
+            new_point = MinimalPoint(
+                new_point.x, new_point.y, get_z_between_points(point_1, point_2, new_point)
+            )
         return new_point
 
     else:
@@ -224,6 +256,83 @@ def project_point_on_line(
         return MinimalPoint(*coordinates)
 
 
+def project_points_on_segments(
+    points_xy: np.ndarray, segments_start: np.ndarray, segments_end: np.ndarray, chunk_size: int = 2**22
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find the nearest segment for every point, vectorized.
+
+    Every point is projected on every segment and clamped to it, the nearest wins. On a tie a non-degenerate
+    segment wins, then the lowest index, so a zero-length segment never hides the segments around its vertex.
+    Points are processed in chunks so a chunk never holds more than chunk_size point-segment pairs.
+
+    :param points_xy: (N, 2) array of points to project
+    :param segments_start: (S, 2) array of segment start vertices
+    :param segments_end: (S, 2) array of segment end vertices
+    :param chunk_size: max number of point-segment pairs evaluated at once
+    :return: segment index (N,), fraction along the segment (N,) and squared 2d distance (N,)
+    """
+    ab = segments_end - segments_start
+    ab_dot = np.einsum("ij,ij->i", ab, ab)
+    ab_dot_safe = np.where(ab_dot == 0, 1.0, ab_dot)
+    degenerate = np.all(segments_start == segments_end, axis=1)
+
+    n_points = len(points_xy)
+    segment_index = np.empty(n_points, dtype=np.intp)
+    fraction = np.empty(n_points, dtype=float)
+    distance_squared = np.empty(n_points, dtype=float)
+
+    rows = max(1, chunk_size // max(1, len(ab)))
+    for start in range(0, n_points, rows):
+        chunk = points_xy[start : start + rows]
+        ap_x = chunk[:, 0, None] - segments_start[None, :, 0]
+        ap_y = chunk[:, 1, None] - segments_start[None, :, 1]
+        t = np.clip((ap_x * ab[:, 0] + ap_y * ab[:, 1]) / ab_dot_safe, 0.0, 1.0)
+        d2 = (ap_x - t * ab[:, 0]) ** 2 + (ap_y - t * ab[:, 1]) ** 2
+        candidates = d2 == d2.min(axis=1)[:, None]
+        prefer = candidates & ~degenerate
+        nearest = np.where(prefer.any(axis=1), prefer.argmax(axis=1), candidates.argmax(axis=1))
+        rows_idx = np.arange(len(chunk))
+        segment_index[start : start + rows] = nearest
+        fraction[start : start + rows] = t[rows_idx, nearest]
+        distance_squared[start : start + rows] = d2[rows_idx, nearest]
+
+    return segment_index, fraction, distance_squared
+
+
+def determinate_left_right_on_segments(
+    segments_start: np.ndarray,
+    segments_end: np.ndarray,
+    points_xy: np.ndarray,
+    distance_to_line: np.ndarray,
+    direction_sign: Optional[np.ndarray] = None,
+    projection_distance: float = 0.2,
+) -> np.ndarray:
+    """Vectorized left, right or on for points given the segment they are projected on.
+
+    Same rules as determinate_left_right_on_line: within projection_distance of the line is on, else the
+    sign of the cross product decides. A negative direction_sign (looking upstream) mirrors left and right.
+
+    :param segments_start: (N, 2) array of segment start vertices
+    :param segments_end: (N, 2) array of segment end vertices
+    :param points_xy: (N, 2) array of points to check
+    :param distance_to_line: (N,) 2d distance of the points to the line
+    :param direction_sign: optional (N,) array of 1 (downstream) or -1 (upstream)
+    :param projection_distance: distance to the line that counts as on the line
+    :return: int8 array of LeftRightOnLineEnum codes, see LEFT_RIGHT_CODES
+    """
+    ab = segments_end - segments_start
+    ap = points_xy - segments_start
+    cross = ab[:, 0] * ap[:, 1] - ab[:, 1] * ap[:, 0]
+    if direction_sign is not None:
+        cross = cross * direction_sign
+
+    result = np.full(len(points_xy), LEFT_RIGHT_CODES.index(LeftRightOnLineEnum.on), dtype=np.int8)
+    not_on = (distance_to_line >= projection_distance) & (cross != 0)
+    result[not_on & (cross > 0)] = LEFT_RIGHT_CODES.index(LeftRightOnLineEnum.left)
+    result[not_on & (cross < 0)] = LEFT_RIGHT_CODES.index(LeftRightOnLineEnum.right)
+    return result
+
+
 def get_z_between_points(
     point_1: MinimalPointProtocol, point_2: MinimalPointProtocol, point: MinimalPointProtocol
 ) -> float:
@@ -0,0 +1,130 @@
+"""Opt-in counters, timers and hooks for the stages of the projection pipeline.
+
+Disabled by default, a disabled stage costs one function call and a global lookup. Enable with enable() or
+the environment variable SHAPELYM_INSTRUMENTATION=1.
+
+Example:
+    from shapelyM import instrumentation
+
+    instrumentation.enable()
+    line.project(Point(1, 5))
+    print(instrumentation.snapshot().stages["nearest_segment"].seconds)
+    instrumentation.reset()
+
+Stages (timed): project, nearest_segment, point_on_line, correct_overshoot, side_of_line,
+functional_direction, project_many, nearest_segments, projection_batch.
+Counters: points_projected, index_rings, index_brute_force_points, index_coarse_points.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+_enabled: bool = os.environ.get("SHAPELYM_INSTRUMENTATION", "") not in ("", "0")
+_lock = threading.Lock()
+_calls: Dict[str, int] = {}
+_seconds: Dict[str, float] = {}
+_max_seconds: Dict[str, float] = {}
+_counters: Dict[str, int] = {}
+_hooks: List[Callable[[str, float], None]] = []
+
+
+@dataclass(frozen=True, slots=True)
+class StageStats:
+    """Number of calls, total and max duration in seconds of a stage."""
+
+    calls: int
+    seconds: float
+    max_seconds: float
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.seconds / self.calls if self.calls else 0.0
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Copy of all stage statistics and counters."""
+
+    stages: Dict[str, StageStats]
+    counters: Dict[str, int]
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def start() -> Optional[float]:
+    """Start timing a stage, returns None when disabled."""
+    return perf_counter() if _enabled else None
+
+
+def stop(stage: str, started: Optional[float]) -> None:
+    """Stop timing a stage started by start, calls the hooks with the stage name and duration."""
+    if started is None:
+        return
+    seconds = perf_counter() - started
+    with _lock:
+        _calls[stage] = _calls.get(stage, 0) + 1
+        _seconds[stage] = _seconds.get(stage, 0.0) + seconds
+        if seconds > _max_seconds.get(stage, 0.0):
+            _max_seconds[stage] = seconds
+        hooks = list(_hooks)
+    for hook in hooks:
+        hook(stage, seconds)
+
+
+def count(counter: str, value: int = 1) -> None:
+    """Add a value to a counter when enabled."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[counter] = _counters.get(counter, 0) + value
+
+
+def add_hook(hook: Callable[[str, float], None]) -> None:
+    """Add a callback called with the stage name and duration in seconds after every timed stage."""
+    with _lock:
+        _hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[str, float], None]) -> None:
+    with _lock:
+        _hooks.remove(hook)
+
+
+def snapshot() -> Snapshot:
+    """Returns a copy of the statistics of all stages and counters."""
+    with _lock:
+        return Snapshot(
+            stages={
+                stage: StageStats(
+                    calls=calls, seconds=_seconds[stage], max_seconds=_max_seconds.get(stage, 0.0)
+                )
+                for stage, calls in _calls.items()
+            },
+            counters=dict(_counters),
+        )
+
+
+def reset() -> None:
+    """Reset all statistics and counters, hooks are kept."""
+    with _lock:
+        _calls.clear()
+        _seconds.clear()
+        _max_seconds.clear()
+        _counters.clear()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Tuple, Union
+
+import numpy as np
+
+from shapelyM.linear_reference import LineProjection, ProjectionBatch
+from shapelyM.measureLineString import DistancePoint, MeasureLineString
+from shapelyM.measurePoint import MeasurePoint, as_measure_point
+
+if TYPE_CHECKING:
+    from shapely.geometry import Point
+
+
+class LineTracker:
+    """Project a sequence of points, e.g. GPS fixes of a train, on a line warm started from the last match.
+
+    Every fix is searched in a window of segments around the last matched segment. If the nearest segment is
+    on the edge of the window the window moves along, so the cost per fix stays constant while following the
+    line. A fix further than max_distance from the window, or the first fix, uses the global segment index.
+
+    The local search sticks to the part of the line that is followed, if the line passes by itself within
+    max_distance the tracker stays on the part it is on instead of jumping to the other part.
+
+    Example:
+        tracker = LineTracker(line)
+        for x, y in gps_fixes:
+            projection = tracker.project(Point(x, y))
+        batch = LineTracker(line).track(gps_array)
+    """
+
+    def __init__(
+        self, line: MeasureLineString, window: int = 8, max_distance: float = 25.0, max_moves: int = 8
+    ):
+        """Create a tracker without a last match.
+
+        :param line: MeasureLineString to project on
+        :param window: number of segments searched before and after the last matched segment
+        :param max_distance: max 2d distance of a fix to the window, further fixes are a jump
+        :param max_moves: max number of times the window moves along for one fix before a global search
+        """
+        if window < 1:
+            raise ValueError("window should be at least 1.")
+        self.line: MeasureLineString = line
+        self.window: int = window
+        self.max_distance: float = max_distance
+        self.max_moves: int = max_moves
+        self.segment_index: Optional[int] = None
+        self.global_searches: int = 0
+        # indexing a memoryview on the vertices gives floats as fast as a list, without copying the line
+        self._xy: memoryview = memoryview(line.xy)
+        self._last_segment: int = len(line.xy) - 2
+
+    def reset(self) -> None:
+        """Forget the last match, the next fix uses a global search."""
+        self.segment_index = None
+
+    def _nearest_in_range(self, x: float, y: float, first: int, last: int) -> Tuple[int, float, float]:
+        """Nearest segment from first to last (inclusive), a tie goes to non-degenerate, then lowest index."""
+        xy = self._xy
+        best_index, best_t, best_d2, best_degenerate = first, 0.0, float("inf"), True
+        bx, by = xy[first, 0], xy[first, 1]
+        for index in range(first, last + 1):
+            ax, ay = bx, by
+            bx, by = xy[index + 1, 0], xy[index + 1, 1]
+            abx, aby = bx - ax, by - ay
+            apx, apy = x - ax, y - ay
+            length_squared = abx * abx + aby * aby
+            t = 0.0 if length_squared == 0 else min(max((apx * abx + apy * aby) / length_squared, 0.0), 1.0)
+            dx, dy = apx - t * abx, apy - t * aby
+            d2 = dx * dx + dy * dy
+            degenerate = abx == 0 and aby == 0
+            if d2 < best_d2 or (d2 == best_d2 and best_degenerate and not degenerate):
+                best_index, best_t, best_d2, best_degenerate = index, t, d2, degenerate
+        return best_index, best_t, best_d2
+
+    def _match(self, x: float, y: float) -> Tuple[int, float, float]:
+        """Returns segment index, fraction and squared distance of a fix and updates the last match."""
+        if self.segment_index is not None:
+            center = self.segment_index
+            for _ in range(self.max_moves + 1):
+                first = max(center - self.window, 0)
+                last = min(center + self.window, self._last_segment)
+                index, t, d2 = self._nearest_in_range(x, y, first, last)
+                on_edge = (index == first and first > 0) or (index == last and last < self._last_segment)
+                if not on_edge:
+                    break
+                center = index
+            if not on_edge and d2 <= self.max_distance**2:
+                self.segment_index = index
+                return index, t, d2
+
+        self.global_searches += 1
+        segment_index, fraction, distance_squared = self.line.spatial_index.nearest(np.array([[x, y]]))
+        self.segment_index = int(segment_index[0])
+        return self.segment_index, float(fraction[0]), float(distance_squared[0])
+
+    def project(self, point: Union[MeasurePoint, Point], azimuth: Optional[float] = None) -> LineProjection:
+        """Returns the linear reference of the next fix, same result as MeasureLineString.project.
+
+        :param point: MeasurePoint or shapely.Point
+        :param azimuth: rotations as a float (seen from north to the right).
+        :return: LineProjection
+        """
+        point = as_measure_point(point)
+        index, t, d2 = self._match(point.x, point.y)
+        xy = self._xy
+        x = xy[index, 0] + t * (xy[index + 1, 0] - xy[index, 0])
+        y = xy[index, 1] + t * (xy[index + 1, 1] - xy[index, 1])
+        nearest_segment = DistancePoint(index=index, measurePoint=MeasurePoint(x, y), distance=d2**0.5)
+        return self.line._project_on_segment(point, nearest_segment, azimuth)
+
+    def track(
+        self,
+        xy: np.ndarray,
+        z: Optional[np.ndarray] = None,
+        azimuth: Optional[Union[float, np.ndarray]] = None,
+    ) -> ProjectionBatch:
+        """Returns the linear reference of a whole trajectory, fixes are matched in the given order.
+
+        :param xy: (N, 2) or (N, 3) array of fixes, a third column is used as z
+        :param z: optional (N,) array of z values, nan for a 2d point
+        :param azimuth: optional rotation as a float or (N,) array seen from north, nan if unknown
+        :return: ProjectionBatch
+        """
+        points_xy, points_z, azimuths = self.line._points_arrays(xy, z, azimuth)
+        n_points = len(points_xy)
+        segment_index = np.empty(n_points, dtype=np.intp)
+        fraction = np.empty(n_points)
+        distance_squared = np.empty(n_points)
+        for idx, (x, y) in enumerate(points_xy.tolist()):
+            segment_index[idx], fraction[idx], distance_squared[idx] = self._match(x, y)
+        return self.line._projection_batch(
+            points_xy, points_z, azimuths, segment_index, fraction, distance_squared
+        )
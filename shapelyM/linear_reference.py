@@ -1,26 +1,26 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import math
+from dataclasses import dataclass, fields
 from enum import Enum
-from typing import Optional
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Union
 
-from shapely.geometry import LineString, Point
+import numpy as np
 
+from shapelyM import instrumentation
 from shapelyM.helpers import (
+    LEFT_RIGHT_CODES,
     LeftRightOnLineEnum,
     MinimalPoint,
     MinimalPointProtocol,
     check_point_between_points,
-    determinate_left_right_on_line,
-    get_azimuth_from_points,
+    determinate_left_right_on_segment,
     get_z_between_points,
-    project_point_on_azimuth,
     project_point_on_line,
 )
 from shapelyM.measurePoint import MeasurePoint
 
-# todo: make frozen
-
 
 class FunctionalDirection(str, Enum):
     """Enumeration to determinate if a Point is on left or right of a line."""
@@ -32,9 +32,12 @@ class FunctionalDirection(str, Enum):
     unknown = "Unknown"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LineProjection:
-    """Response of a projection containing all info."""
+    """Immutable response of a projection containing all info.
+
+    Memory budget 96 bytes excluding the points and float values.
+    """
 
     point: MeasurePoint
     azimuth: float
@@ -46,6 +49,219 @@ class LineProjection:
     distance_along_line: float
 
 
+# int8 code of every FunctionalDirection member, the position in this tuple
+FUNCTIONAL_DIRECTION_CODES = tuple(FunctionalDirection)
+
+# flat columns of a ProjectionBatch: (column name, batch field, column in the field or None)
+_BATCH_COLUMNS = (
+    ("x", "point", 0),
+    ("y", "point", 1),
+    ("z", "point", 2),
+    ("azimuth", "azimuth", None),
+    ("functional_direction", "functional_direction_code", None),
+    ("side_of_line", "side_of_line_code", None),
+    ("x_on_line", "point_on_line", 0),
+    ("y_on_line", "point_on_line", 1),
+    ("z_on_line", "point_on_line", 2),
+    ("m_on_line", "point_on_line", 3),
+    ("distance_to_line_2d", "distance_to_line_2d", None),
+    ("distance_to_line_3d", "distance_to_line_3d", None),
+    ("distance_along_line", "distance_along_line", None),
+    ("segment_index", "segment_index", None),
+)
+
+
+@dataclass
+class ProjectionBatch:
+    """Columnar response of a batch projection, one row per projected point.
+
+    Missing z values and 3d distances are stored as nan, a missing azimuth as nan. The functional direction
+    and side of line are stored as int8 codes, see FUNCTIONAL_DIRECTION_CODES and LEFT_RIGHT_CODES.
+    Iterating a batch yields LineProjection objects.
+    """
+
+    point: np.ndarray
+    azimuth: np.ndarray
+    functional_direction_code: np.ndarray
+    side_of_line_code: np.ndarray
+    point_on_line: np.ndarray
+    distance_to_line_2d: np.ndarray
+    distance_to_line_3d: np.ndarray
+    distance_along_line: np.ndarray
+    segment_index: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.distance_along_line)
+
+    def __iter__(self) -> Iterator[LineProjection]:
+        return (self[index] for index in range(len(self)))
+
+    def __getitem__(self, index: int) -> LineProjection:
+        """Returns the projection of a single point as LineProjection."""
+
+        def _optional(value):
+            return None if np.isnan(value) else float(value)
+
+        x, y, z = self.point[index]
+        x_on_line, y_on_line, z_on_line, m_on_line = self.point_on_line[index]
+        return LineProjection(
+            point=MeasurePoint(x, y, _optional(z)),
+            azimuth=_optional(self.azimuth[index]),
+            functional_direction=FUNCTIONAL_DIRECTION_CODES[self.functional_direction_code[index]],
+            side_of_line=LEFT_RIGHT_CODES[self.side_of_line_code[index]],
+            point_on_line=MeasurePoint(x_on_line, y_on_line, _optional(z_on_line), float(m_on_line)),
+            distance_to_line_2d=float(self.distance_to_line_2d[index]),
+            distance_to_line_3d=_optional(self.distance_to_line_3d[index]),
+            distance_along_line=float(self.distance_along_line[index]),
+        )
+
+    @property
+    def functional_direction(self) -> np.ndarray:
+        """Object array of FunctionalDirection members."""
+        return np.array(FUNCTIONAL_DIRECTION_CODES, dtype=object)[self.functional_direction_code]
+
+    @property
+    def side_of_line(self) -> np.ndarray:
+        """Object array of LeftRightOnLineEnum members."""
+        return np.array(LEFT_RIGHT_CODES, dtype=object)[self.side_of_line_code]
+
+    @classmethod
+    def empty(cls) -> ProjectionBatch:
+        """Returns a batch without rows."""
+        return cls.from_columns({name: np.empty(0) for name, _, _ in _BATCH_COLUMNS})
+
+    def take(self, indices: np.ndarray) -> ProjectionBatch:
+        """Returns a new batch with the rows of the given indices (or boolean mask)."""
+        return ProjectionBatch(**{item.name: getattr(self, item.name)[indices] for item in fields(self)})
+
+    @classmethod
+    def concatenate(cls, batches: List[ProjectionBatch]) -> ProjectionBatch:
+        """Returns one batch with the rows of all batches in the given order."""
+        return cls(
+            **{
+                item.name: np.concatenate([getattr(batch, item.name) for batch in batches])
+                for item in fields(cls)
+            }
+        )
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Returns the batch as flat 1d columns, enums as int8 codes."""
+        return {
+            name: getattr(self, field) if column is None else getattr(self, field)[:, column]
+            for name, field, column in _BATCH_COLUMNS
+        }
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, np.ndarray]) -> ProjectionBatch:
+        """Returns a batch from flat columns, see columns."""
+        values: Dict[str, list] = {}
+        for name, field, column in _BATCH_COLUMNS:
+            values.setdefault(field, []).append(columns[name])
+        return cls(
+            point=np.column_stack(values["point"]).astype(float),
+            azimuth=np.asarray(values["azimuth"][0], dtype=float),
+            functional_direction_code=np.asarray(values["functional_direction_code"][0], dtype=np.int8),
+            side_of_line_code=np.asarray(values["side_of_line_code"][0], dtype=np.int8),
+            point_on_line=np.column_stack(values["point_on_line"]).astype(float),
+            distance_to_line_2d=np.asarray(values["distance_to_line_2d"][0], dtype=float),
+            distance_to_line_3d=np.asarray(values["distance_to_line_3d"][0], dtype=float),
+            distance_along_line=np.asarray(values["distance_along_line"][0], dtype=float),
+            segment_index=np.asarray(values["segment_index"][0], dtype=np.intp),
+        )
+
+    def to_structured(self) -> np.ndarray:
+        """Returns the batch as numpy structured array, one record per row and enums as int8 codes."""
+        columns = self.columns()
+        result = np.empty(len(self), dtype=[(name, values.dtype) for name, values in columns.items()])
+        for name, values in columns.items():
+            result[name] = values
+        return result
+
+    def to_npz(self, path: Union[str, Path], compressed: bool = False) -> None:
+        """Save the flat columns in a .npz file, load with from_npz."""
+        save = np.savez_compressed if compressed else np.savez
+        save(path, **self.columns())
+
+    @classmethod
+    def from_npz(cls, path: Union[str, Path]) -> ProjectionBatch:
+        """Load a batch saved by to_npz."""
+        with np.load(path) as data:
+            return cls.from_columns({name: data[name] for name, _, _ in _BATCH_COLUMNS})
+
+    def to_arrow(self):
+        """Returns the batch as pyarrow.Table, enums as dictionary columns. Needs the optional pyarrow."""
+        try:
+            import pyarrow as pa
+        except ImportError as error:
+            raise ImportError("to_arrow needs pyarrow, install shapelyM[arrow].") from error
+
+        columns: Dict[str, Any] = self.columns()
+        columns["functional_direction"] = pa.DictionaryArray.from_arrays(
+            columns["functional_direction"], [item.value for item in FUNCTIONAL_DIRECTION_CODES]
+        )
+        columns["side_of_line"] = pa.DictionaryArray.from_arrays(
+            columns["side_of_line"], [item.value for item in LEFT_RIGHT_CODES]
+        )
+        return pa.table(columns)
+
+    def to_parquet(self, path: Union[str, Path], **kwargs) -> None:
+        """Save the batch as parquet file. Needs the optional pyarrow.
+
+        :param path: path of the parquet file
+        :param kwargs: keyword arguments of pyarrow.parquet.write_table, e.g. compression
+        """
+        table = self.to_arrow()
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, path, **kwargs)
+
+
+def get_functional_directions(
+    segments_start: np.ndarray, segments_end: np.ndarray, azimuth: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized functional direction of azimuths (nan if unknown) related to the segments they are on.
+
+    Downstream if the azimuth does not point against the segment direction, else upstream.
+
+    :param segments_start: (N, 2) array of segment start vertices
+    :param segments_end: (N, 2) array of segment end vertices
+    :param azimuth: (N,) array of rotations seen from north to the right, nan if not given
+    :return: int8 array of FunctionalDirection codes and the direction sign (1 or -1) as float array
+    """
+    angle = np.radians(azimuth)
+    ab = segments_end - segments_start
+    dot = np.sin(angle) * ab[:, 0] + np.cos(angle) * ab[:, 1]
+    sign = np.where(dot < 0, -1.0, 1.0)
+
+    result = np.full(
+        len(sign), FUNCTIONAL_DIRECTION_CODES.index(FunctionalDirection.downstream), dtype=np.int8
+    )
+    result[sign < 0] = FUNCTIONAL_DIRECTION_CODES.index(FunctionalDirection.upstream)
+    result[np.isnan(azimuth)] = FUNCTIONAL_DIRECTION_CODES.index(FunctionalDirection.unknown)
+    return result, sign
+
+
+def get_functional_direction(
+    line_point_1: MinimalPointProtocol, line_point_2: MinimalPointProtocol, azimuth: Optional[float]
+) -> tuple[FunctionalDirection, float]:
+    """Functional direction of an azimuth related to a segment, see get_functional_directions.
+
+    :param line_point_1: first vertex of the segment
+    :param line_point_2: last vertex of the segment
+    :param azimuth: rotation seen from north to the right, None if unknown
+    :return: FunctionalDirection and the direction sign (1 or -1)
+    """
+    if azimuth is None:
+        return FunctionalDirection.unknown, 1.0
+
+    angle = math.radians(azimuth)
+    dx, dy = line_point_2.x - line_point_1.x, line_point_2.y - line_point_1.y
+    dot = math.sin(angle) * dx + math.cos(angle) * dy
+    if dot < 0:
+        return FunctionalDirection.upstream, -1.0
+    return FunctionalDirection.downstream, 1.0
+
+
 def _correct_overshoot(
     point_1: MinimalPointProtocol, point_2: MinimalPointProtocol, point_on_line_2d: MinimalPointProtocol
 ) -> MinimalPoint:
@@ -57,9 +273,10 @@ def _correct_overshoot(
     :param point_to_project: shapely.geometry.Point or shapelyM.MeasurePoint
     :returns
     """
-    #
+    started = instrumentation.start()
     if not check_point_between_points(point_1, point_2, point_on_line_2d):
         point_on_line_2d = MinimalPoint(point_2.x, point_2.y)
+    instrumentation.stop("correct_overshoot", started)
     return point_on_line_2d
 
 
@@ -76,8 +293,7 @@ def _get_3d_point_on_line(
     if point_1.z is not None and point_2.z is not None and point_to_project.z is not None:
         new_point = project_point_on_line(point_1, point_2, point_to_project)
         new_point = _correct_overshoot(point_1, point_2, new_point)
-        new_point.z = get_z_between_points(point_1, point_2, new_point)
-        return MeasurePoint(*new_point.coords)
+        return MeasurePoint(new_point.x, new_point.y, get_z_between_points(point_1, point_2, new_point))
 
     else:
         new_point = project_point_on_line(point_1, point_2, point_to_project)
@@ -107,43 +323,38 @@ def get_line_projection(
     :param debug: draw in autocad todo: remove before 0.1.0 release
 
     """
-    point_on_line = _get_3d_point_on_line(line_point_1, line_point_2, point)
-    distance_to_line_2d = point.distance(point_on_line, force_2d=True)
-    if line_point_1.z is not None and line_point_2.z is not None and point.z is not None:
-        distance_to_line_3d = point.distance(point_on_line)
-    else:
-        distance_to_line_3d = None
-
     if point_on_line_overrule is not None:
         point_on_line = point_on_line_overrule
         distance_along_line = point_on_line_overrule.m
     else:
-        point_on_line = point_on_line
+        started = instrumentation.start()
+        point_on_line = _get_3d_point_on_line(line_point_1, line_point_2, point)
+        instrumentation.stop("point_on_line", started)
         distance_along_line = line_point_1.m + line_point_1.distance(point_on_line)
 
-    point_on_line.m = distance_along_line
-
-    if not azimuth:
-        azimuth_value = get_azimuth_from_points(line_point_1, line_point_2)
+    distance_to_line_2d = point.distance(point_on_line, force_2d=True)
+    if line_point_1.z is not None and line_point_2.z is not None and point.z is not None:
+        distance_to_line_3d = point.distance(point_on_line)
+    else:
+        distance_to_line_3d = None
 
-    line = LineString([[line_point_1.x, line_point_1.y], [line_point_2.x, line_point_2.y]])
-    side_of_line = determinate_left_right_on_line(
-        Point([point.x, point.y]),
-        azimuth_value,
-        line,
+    # plain floats, the same types as ProjectionBatch.take returns
+    z = None if point_on_line.z is None else float(point_on_line.z)
+    point_on_line = MeasurePoint(
+        float(point_on_line.x), float(point_on_line.y), z, float(distance_along_line)
     )
 
-    if function_direction is None:
-        # todo: if same, reproject own on azimut -180m then new next point, if same set unknown.
-        next_point = project_point_on_azimuth(point_on_line, azimuth_value, 0.5)
-        measure = line.project(point_on_line.shapely())
-        next_measure = line.project(next_point)
-        if measure > next_measure:
-            functional_direction = FunctionalDirection.upstream
-        else:
-            functional_direction = FunctionalDirection.downstream
-        if not azimuth:
-            functional_direction = FunctionalDirection.unknown
+    started = instrumentation.start()
+    functional_direction, direction_sign = get_functional_direction(line_point_1, line_point_2, azimuth)
+    instrumentation.stop("functional_direction", started)
+
+    started = instrumentation.start()
+    side_of_line = determinate_left_right_on_segment(
+        line_point_1, line_point_2, point, distance_to_line_2d, direction_sign
+    )
+    instrumentation.stop("side_of_line", started)
+    if function_direction is not None:
+        functional_direction = function_direction
 
     result = LineProjection(
         point=point,
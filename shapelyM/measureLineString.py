@@ -2,36 +2,34 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
-from shapely.geometry import LineString, Point
+import numpy as np
 
-from shapelyM.helpers import (
-    MinimalPoint,
-    check_point_between_points,
-    get_z_between_points,
-    project_point_on_line,
+from shapelyM import instrumentation
+from shapelyM.helpers import determinate_left_right_on_segments
+from shapelyM.linear_reference import (
+    LineProjection,
+    ProjectionBatch,
+    get_functional_directions,
+    get_line_projection,
 )
-from shapelyM.linear_reference import LineProjection, get_line_projection
-from shapelyM.measurePoint import MeasurePoint
+from shapelyM.measurePoint import MeasurePoint, as_measure_point
+from shapelyM.segmentIndex import SegmentIndex
 
+if TYPE_CHECKING:
+    from shapely.geometry import LineString, Point
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class DistancePoint:
-    index: str
+    """Nearest segment by the index of its first vertex, memory budget 56 bytes excluding the values."""
+
+    index: int
     measurePoint: MeasurePoint
     distance: float
 
 
-@dataclass
-class DistancePoints:
-    values: List[DistancePoint]
-
-    def sorted_on_distance(self) -> List[DistancePoint]:
-        self.values.sort(key=lambda x: x.distance)
-        return self.values
-
-
 class CutProfileStatus(str, Enum):
     """Enumeration to determinate if a measure cut is correct."""
 
@@ -47,273 +45,543 @@ class MeasureProfile:
     from_measure: float = None
     to_measure: float = None
     status: CutProfileStatus = None
-    pre_cut: Optional[MeasureLineString] = None
-    result: Optional[MeasureLineString] = None
-    post_cut: Optional[MeasureLineString] = None
+    pre_cut: Optional[Union[MeasureLineString, MeasureLineStringView]] = None
+    result: Optional[Union[MeasureLineString, MeasureLineStringView]] = None
+    post_cut: Optional[Union[MeasureLineString, MeasureLineStringView]] = None
 
 
 @dataclass
 class MeasureCut:
     measure: float = None
     status: CutProfileStatus = None
-    result: Optional[MeasureLineString] = None
-    post_cut: Optional[MeasureLineString] = None
+    result: Optional[Union[MeasureLineString, MeasureLineStringView]] = None
+    post_cut: Optional[Union[MeasureLineString, MeasureLineStringView]] = None
+
+
+def _get_profile_status(
+    from_measure: float, to_measure: float, start_measure: float, end_measure: float
+) -> CutProfileStatus:
+
+    if from_measure < start_measure and to_measure > end_measure:
+        return CutProfileStatus.under_and_overshoot
+
+    elif from_measure < start_measure or to_measure < start_measure:
+        return CutProfileStatus.undershoot
+
+    elif from_measure > end_measure or to_measure > end_measure:
+        return CutProfileStatus.overshoot
+
+    return CutProfileStatus.valid
 
 
 class MeasureLineString:
+    """Line with measures to project points on and cut by measure.
+
+    Thread safety: the vertex and measure arrays are never changed after construction, so threads can project
+    on and cut the same line at the same time. Derived data (segment index, measure scale, shapely geometry)
+    is built on first use, two threads can both build it and one result is kept. Call prepare before sharing
+    the line to build it once.
+    """
 
     # todo:
     #  - add has_z()
     #  - make dataclass, make frozen
 
-    def __init__(self, coordinates: List[List[float]], m_given: bool = False):
-        self._line_coordinates_raw: List[List[float]] = coordinates
+    def __init__(self, coordinates: Union[List[List[float]], np.ndarray], m_given: bool = False):
         self.m_given: bool = m_given
-        self.shapely: LineString = LineString(self._get_xyz_from_coordinates(coordinates))
-        self.line_measure_points: List[MeasurePoint] = self._measure_points_list_factory(coordinates)
-        coordinates_xyz = self._get_xyz_from_coordinates(coordinates)
-        if len(coordinates_xyz[0]) == 3:
-            self.length_3d: float = self._get_length_by_geometry(coordinates_xyz)
-        else:
-            self.length_3d: Optional[float] = None
+        self._set_arrays(*self._measure_arrays_factory(coordinates))
+
+    @classmethod
+    def from_arrays(
+        cls,
+        xy: np.ndarray,
+        z: Optional[np.ndarray] = None,
+        m: Optional[np.ndarray] = None,
+        m_given: bool = False,
+        cumulative_2d: Optional[np.ndarray] = None,
+        cumulative_3d: Optional[np.ndarray] = None,
+    ) -> MeasureLineString:
+        """Create a line on existing vertex arrays without copying them, e.g. arrays in shared memory.
+
+        :param xy: contiguous (n, 2) float64 array
+        :param z: optional contiguous (n,) float64 array
+        :param m: optional (n,) float64 array of measures, computed from the lengths if not given
+        :param m_given: True if m are given (calibrated) measures
+        :param cumulative_2d: optional (n,) cumulative 2d length, computed if not given with m
+        :param cumulative_3d: optional (n,) cumulative 3d length of a line with z
+        :return: MeasureLineString
+        """
+        line = cls.__new__(cls)
+        line.m_given = m_given
+        line._set_arrays(xy, z, m, cumulative_2d, cumulative_3d)
+        return line
+
+    def _array_state(self, index: bool = True) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """Returns the json serializable settings and the arrays to rebuild the line with _from_array_state.
 
-        self.length_2d: float = self._get_length_by_geometry(coordinates_xyz, force_2d=True)
-        self.end_measure: float = self.line_measure_points[-1].m
-        self.start_measure: float = self.line_measure_points[0].m
+        Used to store a line in a file (storage) and in shared memory (parallel), arrays are not copied.
+
+        :param index: True to include the segment index, it is build if not done yet
+        """
+        arrays = {"xy": self.xy, "m": self.m, "cumulative_2d": self._cumulative_2d}
+        if self.z is not None:
+            arrays["z"] = self.z
+            arrays["cumulative_3d"] = self._cumulative_3d
+
+        settings: Dict[str, Any] = {"m_given": self.m_given, "index": None}
+        if index:
+            settings["index"], index_arrays = self.spatial_index._array_state()
+            arrays.update(index_arrays)
+        return settings, arrays
+
+    @classmethod
+    def _from_array_state(cls, settings: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> MeasureLineString:
+        """Create a line and its segment index on the settings and arrays of _array_state, without copying."""
+        line = cls.from_arrays(
+            arrays["xy"],
+            arrays.get("z"),
+            arrays["m"],
+            m_given=settings["m_given"],
+            cumulative_2d=arrays["cumulative_2d"],
+            cumulative_3d=arrays.get("cumulative_3d"),
+        )
+        if settings["index"] is not None:
+            line._spatial_index = SegmentIndex._from_array_state(
+                arrays["xy"][:-1], arrays["xy"][1:], settings["index"], arrays
+            )
+        return line
+
+    def _set_arrays(
+        self,
+        xy: np.ndarray,
+        z: Optional[np.ndarray],
+        m: Optional[np.ndarray],
+        cumulative_2d: Optional[np.ndarray] = None,
+        cumulative_3d: Optional[np.ndarray] = None,
+    ) -> None:
+        self.xy, self.z = xy, z
+        if m is not None and cumulative_2d is not None and (z is None or cumulative_3d is not None):
+            self.m, self._cumulative_2d, self._cumulative_3d = m, cumulative_2d, cumulative_3d
+        else:
+            self.m, self._cumulative_2d, self._cumulative_3d = self._measure_and_length_factory(m)
+        self.length_2d: float = float(self._cumulative_2d[-1])
+        self.length_3d: Optional[float] = (
+            None if self._cumulative_3d is None else float(self._cumulative_3d[-1])
+        )
+        self.end_measure: float = float(self.m[-1])
+        self.start_measure: float = float(self.m[0])
         self.measure_length: float = self.end_measure - self.start_measure
+        self._line_measure_points: Optional[List[MeasurePoint]] = None
+        self._shapely: Optional[LineString] = None
+        self._spatial_index: Optional[SegmentIndex] = None
+        self._measure_scale: Optional[np.ndarray] = None
+        self._is_monotonic: Optional[bool] = None
 
     # def __repr__(self):
     #     return str(self.__dict__)
 
+    @property
+    def shapely(self) -> LineString:
+        """Shapely geometry of the line, created on first use."""
+        if self._shapely is None:
+            from shapely.geometry import LineString
+
+            self._shapely = LineString(self.xy if self.z is None else np.column_stack([self.xy, self.z]))
+        return self._shapely
+
+    @property
+    def line_measure_points(self) -> List[MeasurePoint]:
+        """Vertices of the line as MeasurePoint objects, materialized from the arrays on first use."""
+        if self._line_measure_points is None:
+            self._line_measure_points = [self._measure_point(idx) for idx in range(len(self.m))]
+        return self._line_measure_points
+
+    def _measure_point(self, index: int) -> MeasurePoint:
+        """Returns a vertex of the line as MeasurePoint."""
+        z = None if self.z is None else float(self.z[index])
+        return MeasurePoint(self.xy[index, 0], self.xy[index, 1], z, float(self.m[index]))
+
     def coordinate_list(self):
-        return [[item.x, item.y, item.z] for item in self.line_measure_points]
-
-    def _get_xyz_from_coordinates(self, coordinates):
-        if self.m_given and len(coordinates[0]) == 4 and coordinates[0][2] is None:
-            return [item[:2] for item in coordinates]
-        elif self.m_given and len(coordinates[0]) > 3:
-            return [item[:3] for item in coordinates]
-        elif self.m_given and len(coordinates[0]) > 2:
-            return [item[:2] for item in coordinates]
-        elif self.m_given and len(coordinates[0]) <= 2:
+        if self.z is None:
+            return [[x, y, None] for x, y in self.xy.tolist()]
+        return np.column_stack([self.xy, self.z]).tolist()
+
+    def _measure_arrays_factory(
+        self, coordinates
+    ) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+        """Returns contiguous xy (n, 2), optional z (n,) and optional given m (n,) arrays.
+
+        A None or nan z is read as no z.
+        """
+        values = np.asarray(coordinates, dtype=float)
+        if values.ndim != 2 or values.shape[1] < 2:
+            raise ValueError("bad coordinates for measure line")
+
+        m = None
+        if self.m_given and values.shape[1] <= 2:
             raise ValueError("bad coordinates for measure line")
+        elif self.m_given and values.shape[1] == 3:
+            z = None
+            m = values[:, 2]
+        elif values.shape[1] >= 4:
+            z = values[:, 2]
+            m = values[:, 3]
+        elif values.shape[1] == 3:
+            z = values[:, 2]
         else:
-            return coordinates
+            z = None
 
-    @staticmethod
-    def _get_length_by_geometry(coordinates, force_2d: bool = False) -> List[MeasurePoint]:
-        # todo: move to helpers
-        _length = 0.0
-        response = []
-        for idx, item in enumerate(coordinates):
-            line_point = MeasurePoint(*item)
-            if idx != 0:
-                line_point_min_1 = MeasurePoint(*coordinates[idx - 1])
-                if force_2d:
-                    _length = _length + line_point.distance(line_point_min_1, force_2d=True)
-                else:
-                    _length = _length + line_point.distance(line_point_min_1)
-                line_point.m = _length
-            else:
-                line_point.m = 0
-            response.append(line_point)
-        return response[-1].m
-
-    def _measure_points_list_factory(self, coordinates, force_2d: bool = False) -> List[MeasurePoint]:
-        _length = 0.0
-        response = []
-
-        for idx, item in enumerate(coordinates):
-            if self.m_given and len(item) == 3:
-                line_point = MeasurePoint(*item[:2])
-                line_point.m = item[2]
-            elif self.m_given and len(item) == 4:
-                line_point = MeasurePoint(*item[:3])
-                line_point.m = item[3]
-            else:
-                line_point = MeasurePoint(*item)
-
-            if idx != 0:
-                line_point_min_1 = MeasurePoint(*coordinates[idx - 1])
-                if line_point.m is None:
-                    if force_2d:
-                        _length = _length + line_point.distance(line_point_min_1, force_2d=True)
-                    else:
-                        _length = _length + line_point.distance(line_point_min_1)
-                    line_point.m = _length
-                else:
-                    _length = line_point.m
-            else:
-                if line_point.m is None:
-                    line_point.m = 0
-            response.append(line_point)
-        return response
-
-    def _get_points_sorted_on_distance(self, point: MeasurePoint) -> List[DistancePoint]:
-        return DistancePoints(
-            [
-                DistancePoint(
-                    index=idx, measurePoint=line_point, distance=point.distance(line_point, force_2d=True)
-                )
-                for idx, line_point in enumerate(self.line_measure_points)
-            ]
-        ).sorted_on_distance()
+        xy = np.ascontiguousarray(values[:, :2])
+        if z is not None:
+            z = None if np.isnan(z).any() else np.ascontiguousarray(z)
 
-    def project(self, point: Union[MeasurePoint, Point], azimuth: Optional[float] = None) -> LineProjection:
-        """Returns a linear reference object given a point and an optional rotation.
+        if m is not None:
+            m = np.ascontiguousarray(m)
+        return xy, z, m
 
-        :param point: MinimalPoint or shapely.Point
-        :param azimuth: rotations as a float (seen from north to the right).
-        :return: LineProjection
+    def _measure_and_length_factory(
+        self, m: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """Returns the measures, cumulative 2d and optional cumulative 3d length in a single pass.
+
+        If no measures are given they are the cumulative 3d length, or 2d length for a 2d line.
         """
-        if self.m_given is True:
-            raise NotImplementedError
+        segments = np.diff(self.xy, axis=0)
+        squared_2d = segments[:, 0] ** 2 + segments[:, 1] ** 2
+        cumulative_2d = np.concatenate([[0.0], np.cumsum(np.sqrt(squared_2d))])
 
-        if isinstance(point, Point):
-            point = MeasurePoint(*point.coords[0])
+        cumulative_3d = None
+        if self.z is not None:
+            cumulative_3d = np.concatenate([[0.0], np.cumsum(np.sqrt(squared_2d + np.diff(self.z) ** 2))])
 
-        points_sorted_on_distance = self._get_points_sorted_on_distance(point)
-        closed_point_index = points_sorted_on_distance[0].index
+        if m is None:
+            m = cumulative_2d if cumulative_3d is None else cumulative_3d
+        return m, cumulative_2d, cumulative_3d
 
-        # exactly in the middle of 2 points
-        if points_sorted_on_distance[0].distance == points_sorted_on_distance[1].distance:
-            return get_line_projection(
-                self.line_measure_points[points_sorted_on_distance[0].index],
-                self.line_measure_points[points_sorted_on_distance[1].index],
-                point,
-            )
+    @property
+    def measure_scale(self) -> np.ndarray:
+        """Calibration table, per segment the measure range divided by the (3d) length of the segment.
 
-        else:
-            closest_point = self.line_measure_points[closed_point_index]
-
-            previous_point = None
-            if closed_point_index != 0:
-                previous_point = self.line_measure_points[closed_point_index - 1]
-
-            next_point = None
-            if closed_point_index + 1 != len(self.line_measure_points):
-                next_point = self.line_measure_points[closed_point_index + 1]
-
-            if not previous_point:
-                # should be on first part of the line
-                projected_on_line = project_point_on_line(
-                    closest_point, self.line_measure_points[closed_point_index + 1], point
-                ).coords
-                projected_on_line_point = MeasurePoint(*projected_on_line)
-
-                # return if between points
-                if check_point_between_points(
-                    self.line_measure_points[0],
-                    self.line_measure_points[1],
-                    projected_on_line_point,
-                ):
-                    return get_line_projection(closest_point, next_point, point)
-
-                # else point undershoot line return first point
-                return get_line_projection(
-                    self.line_measure_points[0],
-                    self.line_measure_points[1],
-                    point,
-                    point_on_line_overrule=self.line_measure_points[0],
+        Precomputed once, a measure on a segment is one multiply-add: m[i] + length along segment * scale[i].
+        Ones for a line without given m values, 0 for a segment without length.
+        """
+        if self._measure_scale is None:
+            cumulative = self._cumulative_2d if self._cumulative_3d is None else self._cumulative_3d
+            segment_length = np.diff(cumulative)
+            if self.m_given:
+                self._measure_scale = np.divide(
+                    np.diff(self.m),
+                    segment_length,
+                    out=np.zeros(len(segment_length)),
+                    where=segment_length != 0,
                 )
+            else:
+                self._measure_scale = np.ones(len(segment_length))
+        return self._measure_scale
 
-            elif not next_point:
-                # end of the line or overshoot, so force last point
-                return get_line_projection(previous_point, closest_point, point)
+    @property
+    def is_monotonic(self) -> bool:
+        """True if the measures never decrease along the line, checked once."""
+        if self._is_monotonic is None:
+            self._is_monotonic = not len(self.non_monotonic_segments())
+        return self._is_monotonic
 
-            else:
-                # somewhere on the line
-                projected_on_line = project_point_on_line(previous_point, closest_point, point).coords
-                projected_on_line_point = MeasurePoint(*projected_on_line)
-                on_previous = check_point_between_points(
-                    previous_point, closest_point, projected_on_line_point
-                )
-                next_projected = project_point_on_line(closest_point, next_point, point).coords
-                next_projected_point = MeasurePoint(*next_projected)
-                on_next = check_point_between_points(closest_point, next_point, next_projected_point)
+    def non_monotonic_segments(self) -> np.ndarray:
+        """Returns the index of segments where the (given) measure decreases."""
+        return np.flatnonzero(np.diff(self.m) < 0)
 
-                if on_previous and not on_next:
-                    # on segment before the closest point
-                    return get_line_projection(previous_point, closest_point, point)
+    def prepare(self) -> MeasureLineString:
+        """Build the lazy segment index, measure scale and monotonic check now, returns the line.
 
-                elif on_next and not on_previous:
-                    # on segment after the closest point
-                    return get_line_projection(closest_point, next_point, point)
+        Threads sharing a prepared line only read it.
+        """
+        self.spatial_index
+        self.measure_scale
+        self.is_monotonic
+        return self
+
+    @property
+    def spatial_index(self) -> SegmentIndex:
+        """Segment index of the line, build once on first use."""
+        if self._spatial_index is None:
+            self._spatial_index = SegmentIndex(self.xy[:-1], self.xy[1:])
+        return self._spatial_index
+
+    def _get_nearest_segment(self, point: MeasurePoint) -> DistancePoint:
+        """Returns the nearest segment, by the index of its first vertex, and the 2d point on it."""
+        started = instrumentation.start()
+        segment_index, fraction, distance_squared = self.spatial_index.nearest(np.array([[point.x, point.y]]))
+        index = int(segment_index[0])
+        t = float(fraction[0])
+        x, y = self.xy[index] + t * (self.xy[index + 1] - self.xy[index])
+        result = DistancePoint(
+            index=index,
+            measurePoint=MeasurePoint(x, y),
+            distance=float(np.sqrt(distance_squared[0])),
+        )
+        instrumentation.stop("nearest_segment", started)
+        return result
 
-                else:
-                    # on vertices
-                    return get_line_projection(closest_point, next_point, point)
+    def project(self, point: Union[MeasurePoint, Point], azimuth: Optional[float] = None) -> LineProjection:
+        """Returns a linear reference object given a point and an optional rotation.
 
-    @staticmethod
-    def _cut(line_to_cut: LineString, measure: float) -> List[MeasureLineString]:
-        if measure <= 0.0:
-            return [None, line_to_cut]
-        elif measure >= line_to_cut.line_measure_points[-1].m:
-            return [line_to_cut, None]
+        :param point: MinimalPoint or shapely.Point
+        :param azimuth: rotations as a float (seen from north to the right).
+        :return: LineProjection
+        """
+        started = instrumentation.start()
+        point = as_measure_point(point)
+
+        result = self._project_on_segment(point, self._get_nearest_segment(point), azimuth)
+        instrumentation.count("points_projected")
+        instrumentation.stop("project", started)
+        return result
+
+    def _project_on_segment(
+        self, point: MeasurePoint, nearest_segment: DistancePoint, azimuth: Optional[float] = None
+    ) -> LineProjection:
+        """Returns the linear reference of a point on the given nearest segment."""
+        index = nearest_segment.index
+        line_point_1 = self._measure_point(index)
+        line_point_2 = self._measure_point(index + 1)
+
+        point_on_line_overrule = None
+        if (
+            nearest_segment.measurePoint.x == line_point_1.x
+            and nearest_segment.measurePoint.y == line_point_1.y
+        ):
+            # undershoot or on the first vertex of the segment, force first vertex
+            point_on_line_overrule = self._measure_point(index)
+
+        elif self.m_given:
+            # calibrated measure by the calibration table instead of the geometric distance
+            length_2d = self._cumulative_2d[index + 1] - self._cumulative_2d[index]
+            t = nearest_segment.measurePoint.distance(line_point_1) / length_2d if length_2d else 0.0
+            z = None
+            if self.z is not None and point.z is not None:
+                z = float(line_point_1.z + t * (line_point_2.z - line_point_1.z))
+            cumulative = self._cumulative_2d if self._cumulative_3d is None else self._cumulative_3d
+            length = t * (cumulative[index + 1] - cumulative[index])
+            point_on_line_overrule = MeasurePoint(
+                nearest_segment.measurePoint.x,
+                nearest_segment.measurePoint.y,
+                z,
+                float(self.m[index] + length * self.measure_scale[index]),
+            )
 
-        coords = line_to_cut.line_measure_points
-        for i, p in enumerate(coords):
-            pd = p.m
+        return get_line_projection(
+            line_point_1,
+            line_point_2,
+            point,
+            point_on_line_overrule=point_on_line_overrule,
+            azimuth=azimuth,
+        )
 
-            if pd == measure:
-                return [
-                    MeasureLineString([item.coordinate_list() for item in coords[: i + 1]]),
-                    MeasureLineString([item.coordinate_list() for item in coords[i:]]),
-                ]
+    def project_many(
+        self,
+        xy: np.ndarray,
+        z: Optional[np.ndarray] = None,
+        azimuth: Optional[Union[float, np.ndarray]] = None,
+    ) -> ProjectionBatch:
+        """Returns the linear reference of many points at once, vectorized.
 
-            if pd > measure:
+        Same rules as project, computed in a single pass over all points.
 
-                # leftover measure on line segment
-                if i == 0:
-                    left_over_measure = measure
-                else:
-                    left_over_measure = measure - coords[i - 1].m
+        :param xy: (N, 2) or (N, 3) array of points, a third column is used as z
+        :param z: optional (N,) array of z values, nan for a 2d point
+        :param azimuth: optional rotation as a float or (N,) array seen from north, nan if unknown
+        :return: ProjectionBatch
+        """
+        started = instrumentation.start()
+        points_xy, points_z, azimuths = self._points_arrays(xy, z, azimuth)
 
-                # percentage leftover measure
-                measure_length = coords[i].m - coords[i - 1].m
-                percentage = left_over_measure / measure_length
+        started_stage = instrumentation.start()
+        segment_index, t, distance_squared = self.spatial_index.nearest(points_xy)
+        instrumentation.stop("nearest_segments", started_stage)
 
-                # true measure == segment length * percentage leftover
-                segment_length = coords[i - 1].distance(coords[i])
-                true_measure = segment_length * percentage
+        result = self._projection_batch(points_xy, points_z, azimuths, segment_index, t, distance_squared)
+        instrumentation.count("points_projected", len(points_xy))
+        instrumentation.stop("project_many", started)
+        return result
 
-                # interpolate line
-                line = LineString([coords[i - 1].coordinate_list()[:2], coords[i].coordinate_list()[:2]])
-                point_along_line = line.interpolate(true_measure)
+    @staticmethod
+    def _points_arrays(
+        xy: np.ndarray, z: Optional[np.ndarray], azimuth: Optional[Union[float, np.ndarray]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns contiguous (N, 2) xy, (N,) z and (N,) azimuth arrays of points, nan if not given."""
+        points = np.asarray(xy, dtype=float)
+        if points.ndim != 2 or points.shape[1] not in (2, 3):
+            raise ValueError("xy should be an (N, 2) or (N, 3) array.")
+        n_points = len(points)
+
+        if z is not None:
+            points_z = np.asarray(z, dtype=float).reshape(n_points)
+        elif points.shape[1] == 3:
+            points_z = points[:, 2].copy()
+        else:
+            points_z = np.full(n_points, np.nan)
+        points_xy = np.ascontiguousarray(points[:, :2])
 
-                # acad.DrawShapelyObject(point_along_line)
+        if azimuth is None:
+            azimuths = np.full(n_points, np.nan)
+        else:
+            azimuths = np.broadcast_to(np.asarray(azimuth, dtype=float), (n_points,)).copy()
+
+        return points_xy, points_z, azimuths
+
+    def _projection_batch(
+        self,
+        points_xy: np.ndarray,
+        points_z: np.ndarray,
+        azimuths: np.ndarray,
+        segment_index: np.ndarray,
+        t: np.ndarray,
+        distance_squared: np.ndarray,
+    ) -> ProjectionBatch:
+        """Returns the linear reference of many points on the given nearest segments, vectorized."""
+        started = instrumentation.start()
+        n_points = len(points_xy)
+        line_xy, line_z, line_m = self.xy, self.z, self.m
+        start_xy = line_xy[segment_index]
+        end_xy = line_xy[segment_index + 1]
+        on_line_xy = start_xy + t[:, None] * (end_xy - start_xy)
+        distance_2d = np.sqrt(distance_squared)
+
+        segment_length = np.hypot(*(end_xy - start_xy).T)
+        if line_z is not None:
+            start_z = line_z[segment_index]
+            end_z = line_z[segment_index + 1]
+            on_line_z = start_z + t * (end_z - start_z)
+            segment_length = np.hypot(segment_length, end_z - start_z)
+            distance_3d = np.hypot(distance_2d, points_z - on_line_z)
+        else:
+            on_line_z = np.full(n_points, np.nan)
+            distance_3d = np.full(n_points, np.nan)
+        distance_along_line = line_m[segment_index] + t * segment_length * self.measure_scale[segment_index]
 
-                point_along_line = MinimalPoint(point_along_line.x, point_along_line.y)
-                try:
-                    point_along_line.z = get_z_between_points(
-                        coords[i - 1], coords[i], MinimalPoint(point_along_line.x, point_along_line.y)
-                    )
-                except Exception as e:
-                    print(e)
-                    point_along_line.z = None
+        functional_direction, direction_sign = get_functional_directions(start_xy, end_xy, azimuths)
+        side_of_line = determinate_left_right_on_segments(
+            start_xy, end_xy, points_xy, distance_2d, direction_sign
+        )
 
-                # make (3d) line form start
-                point_list = [[item.x, item.y, item.z, item.m] for idx, item in enumerate(coords) if idx < i]
-                if point_along_line.z is not None:
-                    point_list.append([point_along_line.x, point_along_line.y, point_along_line.z, measure])
-                else:
-                    point_list.append([point_along_line.x, point_along_line.y, None, measure])
+        result = ProjectionBatch(
+            point=np.column_stack([points_xy, points_z]),
+            azimuth=azimuths,
+            functional_direction_code=functional_direction,
+            side_of_line_code=side_of_line,
+            point_on_line=np.column_stack([on_line_xy, on_line_z, distance_along_line]),
+            distance_to_line_2d=distance_2d,
+            distance_to_line_3d=distance_3d,
+            distance_along_line=distance_along_line,
+            segment_index=segment_index,
+        )
+        instrumentation.stop("projection_batch", started)
+        return result
+
+    def _locate_segments(self, measures: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the segment index and the fraction along it of measures, by binary search on m."""
+        if not self.is_monotonic:
+            segments = self.non_monotonic_segments().tolist()
+            raise ValueError(f"measures decrease on segments {segments}, can not locate measures.")
+        segment_index = np.clip(np.searchsorted(self.m, measures, side="right") - 1, 0, len(self.m) - 2)
+        start_m = self.m[segment_index]
+        measure_length = self.m[segment_index + 1] - start_m
+        fraction = np.divide(
+            measures - start_m, measure_length, out=np.zeros(len(measures)), where=measure_length != 0
+        )
+        return segment_index, fraction
 
-                line_1 = MeasureLineString(point_list, m_given=True)
+    def locate_many(self, measures: np.ndarray) -> np.ndarray:
+        """Returns the coordinates of many measures along the line, vectorized.
 
-                # make (3d) line to end
-                if point_along_line.z is not None:
-                    point_list = [[point_along_line.x, point_along_line.y, point_along_line.z, measure]]
-                else:
-                    point_list = [[point_along_line.x, point_along_line.y, None, measure]]
-                points_to_end = [
-                    [item.x, item.y, item.z, item.m] for idx, item in enumerate(coords) if idx >= i
-                ]
-                point_list.extend(points_to_end)
+        :param measures: (N,) array of measures
+        :return: (N, 3) array of x, y, z, z is nan for a 2d line and all is nan for a measure outside the line
+        """
+        measures = np.asarray(measures, dtype=float).reshape(-1)
+        segment_index, fraction = self._locate_segments(measures)
+        result = self._points_at(segment_index, fraction, measures)[:, :3]
+        result[(measures < self.start_measure) | (measures > self.end_measure)] = np.nan
+        return result
+
+    def stations(
+        self, interval: float, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the stations on every multiple of interval between start and end, vectorized.
+
+        The measures are calibrated for a line with given m values, z is interpolated along the segment.
+
+        :param interval: measure distance between stations, e.g. 1 or 100
+        :param start: optional first measure, default the start measure of the line
+        :param end: optional last measure, default the end measure of the line
+        :return: (N, 4) array of x, y, z, m and (N,) array of the segment index of every station
+        """
+        if interval <= 0:
+            raise ValueError("interval should be larger then 0.")
+        start = self.start_measure if start is None else max(start, self.start_measure)
+        end = self.end_measure if end is None else min(end, self.end_measure)
+        if start > end:
+            return np.empty((0, 4)), np.empty(0, dtype=np.intp)
+
+        # tolerate rounding, 0.3 / 0.1 is just below 3
+        first = np.ceil(start / interval - 1e-9)
+        last = np.floor(end / interval + 1e-9)
+        measures = np.clip(np.arange(first, last + 1) * interval, start, end)
+        segment_index, fraction = self._locate_segments(measures)
+        return self._points_at(segment_index, fraction, measures), segment_index
+
+    def _points_at(self, segment_index: np.ndarray, fraction: np.ndarray, measures: np.ndarray) -> np.ndarray:
+        """Returns (N, 4) x, y, z, m of points given by segment index and fraction, z is nan for a 2d line."""
+        start_xy = self.xy[segment_index]
+        xy = start_xy + fraction[:, None] * (self.xy[segment_index + 1] - start_xy)
+        if self.z is None:
+            z = np.full(len(fraction), np.nan)
+        else:
+            z = self.z[segment_index] + fraction * (self.z[segment_index + 1] - self.z[segment_index])
+        return np.column_stack([xy, z, measures])
+
+    def locate(self, measure: float) -> MeasurePoint:
+        """Returns the point on a given measure along the line.
+
+        :param measure: measure as a float
+        :return: MeasurePoint, raises a ValueError if the measure is not on the line
+        """
+        if not self.start_measure <= measure <= self.end_measure:
+            raise ValueError("measure is not on the line.")
+        x, y, z = self.locate_many(np.array([measure]))[0]
+        return MeasurePoint(x, y, None if self.z is None else float(z), measure)
+
+    def _slice(
+        self,
+        from_measure: float,
+        to_measure: float,
+        from_location: Tuple[int, float],
+        to_location: Tuple[int, float],
+        end_points: Optional[np.ndarray] = None,
+    ) -> MeasureLineStringView:
+        """Returns the part of the line between two measures given their segment index and fraction."""
+        return MeasureLineStringView(self, from_measure, to_measure, from_location, to_location, end_points)
 
-                line_2 = MeasureLineString(point_list, m_given=True)
+    @staticmethod
+    def _cut(line_to_cut: MeasureLineString, measure: float) -> List[MeasureLineString]:
+        if measure <= line_to_cut.start_measure:
+            return [None, line_to_cut]
+        elif measure >= line_to_cut.end_measure:
+            return [line_to_cut, None]
 
-                return [line_1, line_2]
+        segment_index, fraction = line_to_cut._locate_segments(
+            np.array([line_to_cut.start_measure, measure, line_to_cut.end_measure])
+        )
+        start, cut, end = zip(segment_index.tolist(), fraction.tolist())
+        return [
+            line_to_cut._slice(line_to_cut.start_measure, measure, start, cut),
+            line_to_cut._slice(measure, line_to_cut.end_measure, cut, end),
+        ]
+
+    def _xyzm(self, vertices: slice = slice(None)) -> np.ndarray:
+        """Returns the (selected) vertices as (n, 4) array, z is nan for a 2d line."""
+        xy, m = self.xy[vertices], self.m[vertices]
+        z = np.full(len(m), np.nan) if self.z is None else self.z[vertices]
+        return np.column_stack([xy, z, m])
 
     def cut(self, measure: float) -> MeasureCut:
         """Cut on a given measure returns both parts.
@@ -360,54 +628,199 @@ class MeasureLineString:
         :param: to_measure: line cut to measure as a float.
         :return: a MeasureLineString of the result
         """
+        if from_measure >= to_measure:
+            raise ValueError("from_measure should be lower then to_measure.")
+        elif from_measure == to_measure:
+            raise ValueError("from_measure shouldn't be same as to_measure.")
 
-        def get_profile_status(from_measure, to_measure, start_measure, end_measure):
-
-            if from_measure < start_measure and to_measure > end_measure:
-                return CutProfileStatus.under_and_overshoot
-
-            elif from_measure < start_measure or to_measure < start_measure:
-                return CutProfileStatus.undershoot
-
-            elif from_measure > end_measure or to_measure > end_measure:
-                return CutProfileStatus.overshoot
+        return self.cut_profiles([from_measure], [to_measure])[0]
 
-            return CutProfileStatus.valid
+    def cut_profiles(self, from_measures: np.ndarray, to_measures: np.ndarray) -> List[MeasureProfile]:
+        """Cut many from and to measures in one sweep, same rules as cut_profile.
 
-        def return_invalid(from_measure, to_measure):
-            return MeasureProfile(
-                from_measure=from_measure,
-                to_measure=to_measure,
-                status=CutProfileStatus.invalid,
-                pre_cut=None,
-                result=None,
-                post_cut=None,
-            )
+        All interval boundaries are sorted and located on the line at once and their points are interpolated
+        in one call, every profile is sliced from the located boundaries without cutting the line again.
 
-        if from_measure >= to_measure:
+        :param: from_measures: (N,) array of from measures.
+        :param: to_measures: (N,) array of to measures.
+        :return: list of MeasureProfile in the order of the given intervals
+        """
+        from_measures = np.asarray(from_measures, dtype=float).reshape(-1)
+        to_measures = np.asarray(to_measures, dtype=float).reshape(-1)
+        if len(from_measures) != len(to_measures):
+            raise ValueError("from_measures and to_measures should have the same length.")
+        if not (np.isfinite(from_measures).all() and np.isfinite(to_measures).all()):
+            raise ValueError("from_measure and to_measure should be finite.")
+        if np.any(from_measures >= to_measures):
             raise ValueError("from_measure should be lower then to_measure.")
-        elif from_measure == to_measure:
-            raise ValueError("from_measure shouldn't be same as to_measure.")
 
-        pre_cut = self._cut(self, from_measure)
+        # one sorted sweep over all boundaries, clamped on the line
+        boundaries = np.clip(
+            np.concatenate([from_measures, to_measures]), self.start_measure, self.end_measure
+        )
+        order = np.argsort(boundaries, kind="stable")
+        segment_index = np.empty(len(boundaries), dtype=np.intp)
+        fraction = np.empty(len(boundaries), dtype=float)
+        segment_index[order], fraction[order] = self._locate_segments(boundaries[order])
+        locations = list(zip(segment_index.tolist(), fraction.tolist()))
+        n_profiles = len(from_measures)
+
+        start_location = (0, 0.0)
+        end_location = (len(self.m) - 2, 1.0)
+        # the (2, 4) end points of every pre cut, result and post cut
+        points = self._points_at(
+            np.r_[segment_index, 0, len(self.m) - 2],
+            np.r_[fraction, 0.0, 1.0],
+            np.r_[boundaries, self.start_measure, self.end_measure],
+        )
+        from_points, to_points = points[:n_profiles], points[n_profiles:-2]
+        start_points = np.broadcast_to(points[-2], from_points.shape)
+        end_points = np.broadcast_to(points[-1], to_points.shape)
+        pre_points = np.stack([start_points, from_points], axis=1)
+        result_points = np.stack([from_points, to_points], axis=1)
+        post_points = np.stack([to_points, end_points], axis=1)
+        profiles = []
+        for idx, (from_measure, to_measure) in enumerate(zip(from_measures.tolist(), to_measures.tolist())):
+            if from_measure >= self.end_measure or to_measure <= self.start_measure:
+                profiles.append(
+                    MeasureProfile(
+                        from_measure=from_measure,
+                        to_measure=to_measure,
+                        status=CutProfileStatus.invalid,
+                        pre_cut=None,
+                        result=None,
+                        post_cut=None,
+                    )
+                )
+                continue
 
-        if pre_cut[1] is None:
-            return return_invalid(from_measure, to_measure)
+            from_location, to_location = locations[idx], locations[n_profiles + idx]
+            under = from_measure <= self.start_measure
+            over = to_measure >= self.end_measure
 
-        result = self._cut(pre_cut[1], to_measure)
+            pre_cut = (
+                None
+                if under
+                else self._slice(
+                    self.start_measure, from_measure, start_location, from_location, pre_points[idx]
+                )
+            )
+            if under and over:
+                result = self
+            else:
+                lower, upper = max(from_measure, self.start_measure), min(to_measure, self.end_measure)
+                result = self._slice(lower, upper, from_location, to_location, result_points[idx])
+            post_cut = (
+                None
+                if over
+                else self._slice(to_measure, self.end_measure, to_location, end_location, post_points[idx])
+            )
+
+            profiles.append(
+                MeasureProfile(
+                    from_measure=from_measure,
+                    to_measure=to_measure,
+                    status=_get_profile_status(
+                        from_measure, to_measure, self.start_measure, self.end_measure
+                    ),
+                    pre_cut=pre_cut,
+                    result=result,
+                    post_cut=post_cut,
+                )
+            )
+        return profiles
 
-        if result[0] is None and from_measure > self.start_measure:
-            return return_invalid(from_measure, to_measure)
-        if result[0] is None and to_measure < self.end_measure:
-            return return_invalid(from_measure, to_measure)
+    def split_every(self, length: float) -> List[MeasureLineString]:
+        """Split the line in parts of a fixed measure length, the last part holds the leftover.
 
-        status = get_profile_status(from_measure, to_measure, self.start_measure, self.end_measure)
+        :param: length: measure length of a part as a float.
+        :return: list of MeasureLineString from start to end
+        """
+        if length <= 0:
+            raise ValueError("length should be larger then 0.")
+
+        boundaries = self.start_measure + length * np.arange(int(np.ceil(self.measure_length / length)))
+        boundaries = np.append(boundaries[boundaries < self.end_measure], self.end_measure)
+        return [profile.result for profile in self.cut_profiles(boundaries[:-1], boundaries[1:])]
+
+
+class MeasureLineStringView:
+    """Part of a MeasureLineString between two measures, as a view on the arrays of the line.
+
+    Only holds the parent line, the segment index and fraction of both ends and the two interpolated end
+    points. Coordinates, shapely geometry and all other MeasureLineString attributes are materialized on
+    first access, as a measured line (m_given).
+    """
+
+    def __init__(
+        self,
+        parent: MeasureLineString,
+        from_measure: float,
+        to_measure: float,
+        from_location: Tuple[int, float],
+        to_location: Tuple[int, float],
+        end_points: Optional[np.ndarray] = None,
+    ):
+        """Create a view, end_points is an optional (2, 4) array of the located x, y, z, m of both ends."""
+        self._line: Optional[MeasureLineString] = None
+        self.parent: MeasureLineString = parent
+        self.m_given: bool = True
+        self.start_measure: float = float(from_measure)
+        self.end_measure: float = float(to_measure)
+        self.measure_length: float = self.end_measure - self.start_measure
+        self.start_index, self.start_fraction = from_location
+        self.end_index, self.end_fraction = to_location
+        if end_points is None:
+            end_points = parent._points_at(
+                np.array([self.start_index, self.end_index]),
+                np.array([self.start_fraction, self.end_fraction]),
+                np.array([self.start_measure, self.end_measure]),
+            )
+        self.start_point, self.end_point = end_points
+
+    def __repr__(self):
+        return f"MeasureLineStringView(start_measure={self.start_measure}, end_measure={self.end_measure})"
+
+    def __getattr__(self, name):
+        # only called for attributes the view does not have, those come from the materialized line
+        if name.startswith("__") or name in ("_line", "parent"):
+            raise AttributeError(name)
+        return getattr(self.to_measure_line_string(), name)
+
+    @property
+    def vertex_slice(self) -> slice:
+        """Slice of the parent vertices between the end points of the view."""
+        stop = self.end_index + 1 if self.end_fraction > 0 else self.end_index
+        return slice(self.start_index + 1, stop)
+
+    def _length_between(self, cumulative: np.ndarray) -> float:
+        start, end = self.start_index, self.end_index
+        from_length = cumulative[start] + self.start_fraction * (cumulative[start + 1] - cumulative[start])
+        to_length = cumulative[end] + self.end_fraction * (cumulative[end + 1] - cumulative[end])
+        return float(to_length - from_length)
+
+    @property
+    def length_2d(self) -> float:
+        return self._length_between(self.parent._cumulative_2d)
+
+    @property
+    def length_3d(self) -> Optional[float]:
+        if self.parent._cumulative_3d is None:
+            return None
+        return self._length_between(self.parent._cumulative_3d)
+
+    def _xyzm(self) -> np.ndarray:
+        """Returns the vertices as (n, 4) array, z is nan for a 2d line."""
+        return np.vstack([self.start_point, self.parent._xyzm(self.vertex_slice), self.end_point])
 
-        return MeasureProfile(
-            from_measure=from_measure,
-            to_measure=to_measure,
-            status=status,
-            pre_cut=pre_cut[0],
-            result=result[0],
-            post_cut=result[1],
-        )
+    def coordinate_list(self):
+        xyzm = self._xyzm()
+        if self.parent.z is None:
+            return [[x, y, None] for x, y in xyzm[:, :2].tolist()]
+        return xyzm[:, :3].tolist()
+
+    def to_measure_line_string(self) -> MeasureLineString:
+        """Returns the view as a MeasureLineString, created on first use."""
+        if self._line is None:
+            self._line = MeasureLineString(self._xyzm(), m_given=True)
+        return self._line
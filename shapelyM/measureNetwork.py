@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from shapelyM.linear_reference import LineProjection, ProjectionBatch
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.measurePoint import MeasurePoint, as_measure_point
+
+if TYPE_CHECKING:
+    from shapely.geometry import Point
+
+
+@dataclass
+class NetworkProjection:
+    """Projection of a point on one line of a network."""
+
+    key: Hashable
+    line: MeasureLineString
+    projection: LineProjection
+
+
+@dataclass
+class NetworkProjectionBatch:
+    """Columnar response of a network batch projection, one row per point and candidate line.
+
+    Rows are sorted on point_index and then on distance to the line, rank 0 is the nearest line of a point.
+    """
+
+    point_index: np.ndarray
+    line_key: np.ndarray
+    rank: np.ndarray
+    projection: ProjectionBatch
+
+    def __len__(self) -> int:
+        return len(self.point_index)
+
+
+class MeasureNetwork:
+    """Many MeasureLineStrings behind one spatial index.
+
+    Lines are registered in a grid of fixed size cells, by the bounding boxes of their segments. Adding a line
+    only registers the cells of that line. A query collects the candidate lines of the cells around the
+    points, the exact projection is done on the segment index of every candidate line.
+    """
+
+    def __init__(self, search_radius: float = 10.0, k: int = 1, cell_size: Optional[float] = None):
+        """Create an empty network.
+
+        :param search_radius: default max 2d distance of a line to a point to be a candidate
+        :param k: default max number of candidate lines per point
+        :param cell_size: size of a grid cell, default 4 times the search radius
+        """
+        if search_radius <= 0:
+            raise ValueError("search_radius should be larger then 0.")
+        self.search_radius: float = search_radius
+        self.k: int = k
+        self.cell_size: float = cell_size if cell_size is not None else 4 * search_radius
+        self._lines: List[MeasureLineString] = []
+        self._keys: List[Hashable] = []
+        self._index_of_key: Dict[Hashable, int] = {}
+        self._cells: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._keys)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._index_of_key
+
+    def __getitem__(self, key: Hashable) -> MeasureLineString:
+        return self._lines[self._index_of_key[key]]
+
+    def keys(self) -> List[Hashable]:
+        return list(self._keys)
+
+    def _cell_keys(self, cell_min: np.ndarray, cell_max: np.ndarray) -> np.ndarray:
+        """Returns the cell keys of all cells in the given (N, 2) cell ranges, concatenated."""
+        size = cell_max - cell_min + 1
+        n_cells = size[:, 0] * size[:, 1]
+        owner = np.repeat(np.arange(len(cell_min)), n_cells)
+        local = np.arange(len(owner)) - np.repeat(np.cumsum(n_cells) - n_cells, n_cells)
+        cell_x = cell_min[owner, 0] + local % size[owner, 0]
+        cell_y = cell_min[owner, 1] + local // size[owner, 0]
+        return cell_x * 2**32 + cell_y
+
+    def _cell_of(self, xy: np.ndarray) -> np.ndarray:
+        return np.floor(xy / self.cell_size).astype(np.int64)
+
+    def add(self, line: MeasureLineString, key: Optional[Hashable] = None) -> Hashable:
+        """Add a line to the network, only the cells of this line are updated.
+
+        :param line: MeasureLineString to add
+        :param key: optional unique key of the line, default the position in the network
+        :return: key of the line
+        """
+        if key is None:
+            key = len(self._lines)
+        if key in self._index_of_key:
+            raise ValueError(f"line with key {key} already in network.")
+
+        line_index = len(self._lines)
+        self._lines.append(line)
+        self._keys.append(key)
+        self._index_of_key[key] = line_index
+
+        start, end = line.xy[:-1], line.xy[1:]
+        cells = self._cell_keys(self._cell_of(np.minimum(start, end)), self._cell_of(np.maximum(start, end)))
+        for cell in np.unique(cells).tolist():
+            self._cells.setdefault(cell, []).append(line_index)
+        return key
+
+    def extend(self, lines: Union[List[MeasureLineString], Dict[Hashable, MeasureLineString]]) -> None:
+        """Add many lines, a dict adds the lines by key."""
+        if isinstance(lines, dict):
+            for key, line in lines.items():
+                self.add(line, key)
+        else:
+            for line in lines:
+                self.add(line)
+
+    def _candidates(self, points_xy: np.ndarray, search_radius: float) -> tuple[np.ndarray, np.ndarray]:
+        """Returns unique (point index, line index) pairs of lines in the cells within the search radius."""
+        cells = self._cell_keys(
+            self._cell_of(points_xy - search_radius), self._cell_of(points_xy + search_radius)
+        )
+        cell_size = self._cell_of(points_xy + search_radius) - self._cell_of(points_xy - search_radius) + 1
+        point_of_cell = np.repeat(np.arange(len(points_xy)), cell_size[:, 0] * cell_size[:, 1])
+
+        unique_cells, inverse = np.unique(cells, return_inverse=True)
+        lines_of_cell = [self._cells.get(cell, []) for cell in unique_cells.tolist()]
+        counts = np.array([len(item) for item in lines_of_cell], dtype=np.intp)
+        flat_lines = np.fromiter(
+            (idx for item in lines_of_cell for idx in item), dtype=np.intp, count=counts.sum()
+        )
+        starts = np.cumsum(counts) - counts
+
+        pair_counts = counts[inverse]
+        point_index = np.repeat(point_of_cell, pair_counts)
+        local = np.arange(len(point_index)) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+        line_index = flat_lines[np.repeat(starts[inverse], pair_counts) + local]
+
+        pairs = np.unique(np.column_stack([point_index, line_index]), axis=0)
+        return pairs[:, 0], pairs[:, 1]
+
+    def project_many(
+        self,
+        xy: np.ndarray,
+        z: Optional[np.ndarray] = None,
+        azimuth: Optional[Union[float, np.ndarray]] = None,
+        search_radius: Optional[float] = None,
+        k: Optional[int] = None,
+    ) -> NetworkProjectionBatch:
+        """Returns the projections of many points on their k nearest lines within the search radius.
+
+        Points without a line within the search radius have no rows in the result.
+
+        :param xy: (N, 2) or (N, 3) array of points, a third column is used as z
+        :param z: optional (N,) array of z values, nan for a 2d point
+        :param azimuth: optional rotation as a float or (N,) array seen from north, nan if unknown
+        :param search_radius: max 2d distance of a candidate line, default the network search radius
+        :param k: max number of candidate lines per point, default the network k
+        :return: NetworkProjectionBatch
+        """
+        search_radius = self.search_radius if search_radius is None else search_radius
+        k = self.k if k is None else k
+
+        points = np.asarray(xy, dtype=float)
+        if points.ndim != 2 or points.shape[1] not in (2, 3):
+            raise ValueError("xy should be an (N, 2) or (N, 3) array.")
+        n_points = len(points)
+        if z is not None:
+            points = np.column_stack([points[:, :2], np.asarray(z, dtype=float).reshape(n_points)])
+        azimuths = np.full(n_points, np.nan) if azimuth is None else np.broadcast_to(azimuth, (n_points,))
+
+        point_index, line_index = self._candidates(points[:, :2], search_radius)
+
+        # exact projection per candidate line
+        order = np.argsort(line_index, kind="stable")
+        point_index, line_index = point_index[order], line_index[order]
+        groups = np.flatnonzero(np.r_[True, line_index[1:] != line_index[:-1]]) if len(line_index) else []
+        bounds = np.append(groups, len(line_index))
+        batches = [
+            self._lines[line_index[start]].project_many(
+                points[point_index[start:end]], azimuth=azimuths[point_index[start:end]]
+            )
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        if batches:
+            projection = ProjectionBatch.concatenate(batches)
+        else:
+            projection = ProjectionBatch.empty()
+
+        # within radius, nearest first, at most k per point
+        within = projection.distance_to_line_2d <= search_radius
+        point_index, line_index, projection = point_index[within], line_index[within], projection.take(within)
+        order = np.lexsort((line_index, projection.distance_to_line_2d, point_index))
+        point_index, line_index, projection = point_index[order], line_index[order], projection.take(order)
+
+        first_of_point = np.r_[True, point_index[1:] != point_index[:-1]] if len(point_index) else np.empty(0)
+        group_start = np.maximum.accumulate(np.where(first_of_point, np.arange(len(point_index)), 0))
+        rank = np.arange(len(point_index)) - group_start if len(point_index) else np.empty(0, dtype=np.intp)
+        keep = rank < k
+
+        line_key = np.empty(int(keep.sum()), dtype=object)
+        line_key[:] = [self._keys[idx] for idx in line_index[keep].tolist()]
+        return NetworkProjectionBatch(
+            point_index=point_index[keep],
+            line_key=line_key,
+            rank=rank[keep],
+            projection=projection.take(keep),
+        )
+
+    def project(
+        self,
+        point: Union[MeasurePoint, Point],
+        azimuth: Optional[float] = None,
+        search_radius: Optional[float] = None,
+        k: Optional[int] = None,
+    ) -> List[NetworkProjection]:
+        """Returns the projections of a point on the k nearest lines within the search radius.
+
+        :param point: MeasurePoint or shapely.Point
+        :param azimuth: rotations as a float (seen from north to the right).
+        :param search_radius: max 2d distance of a candidate line, default the network search radius
+        :param k: max number of candidate lines, default the network k
+        :return: list of NetworkProjection, nearest first
+        """
+        point = as_measure_point(point)
+        z = np.nan if point.z is None else point.z
+        batch = self.project_many(
+            np.array([[point.x, point.y, z]]),
+            azimuth=np.nan if azimuth is None else azimuth,
+            search_radius=search_radius,
+            k=k,
+        )
+        return [
+            NetworkProjection(key=key, line=self[key], projection=batch.projection[idx])
+            for idx, key in enumerate(batch.line_key.tolist())
+        ]
@@ -1,33 +1,41 @@
 from __future__ import annotations
 
 import math
-from typing import List
+import sys
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, List, Optional
 
-from shapely.geometry import Point
+if TYPE_CHECKING:
+    from shapelyM.helpers import MinimalPoint
 
-from shapelyM.helpers import MinimalPoint
 
-# todo: make dataclass and frozen
+@dataclass(frozen=True, slots=True)
+class MeasurePoint:
+    """Immutable measure point, x and y are stored as floats.
 
+    Slotted without a __dict__, memory budget 64 bytes per point excluding the float values.
 
-class MeasurePoint:
-    def __init__(self, x: float, y: float, z: float = None, m: float = None):
-        """First implementation of a measure point.
+    :param x: x point value
+    :param y: y point value
+    :param z: z point value
+    :param m: measure along line value
+    """
 
-        Implemented a distance to other point and
+    x: float
+    y: float
+    z: Optional[float] = None
+    m: Optional[float] = None
 
-        :param x: x point value
-        :param y: y point value
-        :param z: z point value
-        :param m: measure along line value
-        """
-        self.x = float(x)
-        self.y = float(y)
-        self.z = z
-        self.m = m
+    def __post_init__(self):
+        if type(self.x) is not float:
+            object.__setattr__(self, "x", float(self.x))
+        if type(self.y) is not float:
+            object.__setattr__(self, "y", float(self.y))
 
     def shapely(self):
         """Returns a shapely Point object."""
+        from shapely.geometry import Point
+
         return Point(self.coordinate_list())
 
     def coordinate_list(self) -> List[float]:
@@ -50,3 +58,14 @@ class MeasurePoint:
             )
         else:
             return math.sqrt((self.x - point_geometry.x) ** 2 + (self.y - point_geometry.y) ** 2)
+
+
+def as_measure_point(point: Any) -> Any:
+    """Returns a MeasurePoint for a shapely Point, other points as they are.
+
+    Shapely is not imported for this check, a shapely Point can only exist if shapely is imported already.
+    """
+    shapely_geometry = sys.modules.get("shapely.geometry")
+    if shapely_geometry is not None and isinstance(point, shapely_geometry.Point):
+        return MeasurePoint(*point.coords[0])
+    return point
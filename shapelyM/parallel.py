@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from shapelyM.linear_reference import ProjectionBatch
+from shapelyM.measureLineString import MeasureLineString
+
+# (name, dtype, shape, offset) of every array in a shared memory block
+ArraySpec = List[Tuple[str, str, Tuple[int, ...], int]]
+
+# line and shared memory of a worker process, set once by the pool initializer
+_worker_line: Optional[MeasureLineString] = None
+_worker_memory: Optional[SharedMemory] = None
+
+
+def _share_arrays(arrays: Dict[str, np.ndarray]) -> Tuple[SharedMemory, ArraySpec]:
+    """Copy arrays once in a new shared memory block, returns the block and the spec to attach to it."""
+    spec: ArraySpec = []
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // 8) * 8
+        spec.append((name, array.dtype.str, array.shape, offset))
+        offset += array.nbytes
+
+    memory = SharedMemory(create=True, size=max(offset, 1))
+    for (name, dtype, shape, start), array in zip(spec, arrays.values()):
+        np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=start)[...] = array
+    return memory, spec
+
+
+def _attach_arrays(memory: SharedMemory, spec: ArraySpec) -> Dict[str, np.ndarray]:
+    """Returns read only views on the arrays in a shared memory block."""
+    arrays = {}
+    for name, dtype, shape, offset in spec:
+        array = np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+        array.flags.writeable = False
+        arrays[name] = array
+    return arrays
+
+
+def _init_worker(memory_name: str, spec: ArraySpec, settings: Dict[str, Any]) -> None:
+    global _worker_line, _worker_memory
+    _worker_memory = SharedMemory(name=memory_name)
+    _worker_line = MeasureLineString._from_array_state(settings, _attach_arrays(_worker_memory, spec))
+
+
+def _project_chunk(xy: np.ndarray, azimuth: Optional[np.ndarray]) -> ProjectionBatch:
+    assert _worker_line is not None
+    return _worker_line.project_many(xy, azimuth=azimuth)
+
+
+def _chunks(
+    xy: np.ndarray,
+    z: Optional[np.ndarray],
+    azimuth: Optional[Union[float, np.ndarray]],
+    chunk_size: int,
+) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    """Yields the (n, 2) or (n, 3) points and optional azimuths of every chunk, at least one chunk."""
+    points = np.asarray(xy, dtype=float)
+    if points.ndim != 2 or points.shape[1] not in (2, 3):
+        raise ValueError("xy should be an (N, 2) or (N, 3) array.")
+    n_points = len(points)
+    if z is not None:
+        points = np.column_stack([points[:, :2], np.asarray(z, dtype=float).reshape(n_points)])
+    azimuths = None
+    if azimuth is not None:
+        azimuths = np.broadcast_to(np.asarray(azimuth, dtype=float), (n_points,))
+
+    for start in range(0, max(n_points, 1), chunk_size):
+        yield (
+            points[start : start + chunk_size],
+            None if azimuths is None else azimuths[start : start + chunk_size],
+        )
+
+
+class ParallelProjector:
+    """Project points on a line in a pool of worker processes.
+
+    The vertex and segment index arrays of the line are copied once in shared memory, every worker builds its
+    line on views of these arrays so nothing is pickled per chunk except the points. Results are gathered in
+    input order. Use as a context manager, or call close to stop the workers and free the shared memory.
+
+    Example:
+        with ParallelProjector(line, workers=8) as projector:
+            batch = projector.project_many(points)
+    """
+
+    def __init__(
+        self,
+        line: MeasureLineString,
+        workers: Optional[int] = None,
+        chunk_size: int = 65536,
+        mp_context: Optional[str] = None,
+    ):
+        """Start the workers.
+
+        :param line: MeasureLineString to project on
+        :param workers: number of worker processes, default the number of cpus
+        :param chunk_size: number of points per task
+        :param mp_context: optional multiprocessing start method, "spawn", "fork" or "forkserver"
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size should be at least 1.")
+
+        self.workers: int = workers or os.cpu_count() or 1
+        self.chunk_size: int = chunk_size
+        self._memory: Optional[SharedMemory]
+        settings, arrays = line._array_state()
+        self._memory, spec = _share_arrays(arrays)
+        try:
+            self._executor: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=get_context(mp_context),
+                initializer=_init_worker,
+                initargs=(self._memory.name, spec, settings),
+            )
+        except Exception:
+            self._release_memory()
+            raise
+
+    def __enter__(self) -> ParallelProjector:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def project_many(
+        self,
+        xy: np.ndarray,
+        z: Optional[np.ndarray] = None,
+        azimuth: Optional[Union[float, np.ndarray]] = None,
+    ) -> ProjectionBatch:
+        """Returns the linear reference of many points, same result as MeasureLineString.project_many.
+
+        :param xy: (N, 2) or (N, 3) array of points, a third column is used as z
+        :param z: optional (N,) array of z values, nan for a 2d point
+        :param azimuth: optional rotation as a float or (N,) array seen from north, nan if unknown
+        :return: ProjectionBatch
+        """
+        if self._executor is None:
+            raise RuntimeError("ParallelProjector is closed.")
+
+        chunks, azimuth_chunks = zip(*_chunks(xy, z, azimuth, self.chunk_size))
+        return ProjectionBatch.concatenate(list(self._executor.map(_project_chunk, chunks, azimuth_chunks)))
+
+    def close(self) -> None:
+        """Stop the workers and free the shared memory."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._release_memory()
+
+    def _release_memory(self) -> None:
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+
+class ThreadProjector:
+    """Project points on a line in a pool of threads of this process.
+
+    Nothing is copied or pickled, every thread projects its chunk on the same line. The numpy kernels of
+    project_many release the GIL on large arrays, so chunks of some thousands of points run in parallel
+    without the start up and transfer costs of ParallelProjector. Small chunks hold the GIL most of the time,
+    use ParallelProjector for these. The line is prepared before the threads start, see
+    MeasureLineString.prepare. Use as a context manager, or call close to stop the threads.
+
+    Example:
+        with ThreadProjector(line, workers=8) as projector:
+            batch = projector.project_many(points)
+    """
+
+    def __init__(self, line: MeasureLineString, workers: Optional[int] = None, chunk_size: int = 65536):
+        """Start the threads.
+
+        :param line: MeasureLineString to project on
+        :param workers: number of threads, default the number of cpus
+        :param chunk_size: number of points per task
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size should be at least 1.")
+
+        self.line: MeasureLineString = line.prepare()
+        self.workers: int = workers or os.cpu_count() or 1
+        self.chunk_size: int = chunk_size
+        self._executor: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="shapelyM-project"
+        )
+
+    def __enter__(self) -> ThreadProjector:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def project_many(
+        self,
+        xy: np.ndarray,
+        z: Optional[np.ndarray] = None,
+        azimuth: Optional[Union[float, np.ndarray]] = None,
+    ) -> ProjectionBatch:
+        """Returns the linear reference of many points, same result as MeasureLineString.project_many.
+
+        :param xy: (N, 2) or (N, 3) array of points, a third column is used as z
+        :param z: optional (N,) array of z values, nan for a 2d point
+        :param azimuth: optional rotation as a float or (N,) array seen from north, nan if unknown
+        :return: ProjectionBatch
+        """
+        if self._executor is None:
+            raise RuntimeError("ThreadProjector is closed.")
+
+        chunks, azimuth_chunks = zip(*_chunks(xy, z, azimuth, self.chunk_size))
+        return ProjectionBatch.concatenate(
+            list(
+                self._executor.map(
+                    lambda points, azimuths: self.line.project_many(points, azimuth=azimuths),
+                    chunks,
+                    azimuth_chunks,
+                )
+            )
+        )
+
+    def close(self) -> None:
+        """Stop the threads."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
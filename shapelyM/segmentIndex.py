@@ -0,0 +1,463 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from shapelyM import instrumentation
+from shapelyM.helpers import project_points_on_segments
+
+
+class SegmentIndex:
+    """Uniform grid over the bounding boxes of line segments to find the nearest segment of points.
+
+    Every segment is registered in all grid cells its bounding box overlaps. Only occupied cells are stored,
+    as flat arrays (sorted cell_keys, cell_start and cell_items) so the index can be built once per line and
+    shared. The cell size follows the segment lengths, not the extent of the line, so a long sparse line gets
+    small cells. A query searches a growing square of cells around the point till the nearest segment found
+    is closer than the edge of the searched square. Points far from the line continue on a coarser grid.
+
+    Points with too many candidates, or a square covering the grid, are checked against the cells of a coarse
+    level with few cells instead of all segments: only segments in cells closer than the nearest segment found
+    are checked. Candidate pairs are evaluated in chunks of at most pair_budget, so memory stays bounded.
+    """
+
+    # max mean number of cells a segment is registered in before the cells are made larger
+    max_cells_per_segment: int = 4
+    # max number of cells of the grid, the key of a cell should fit an int64
+    max_cells: int = 2**52
+    # max radius in cells of the searched square, points not found within continue on a coarser grid
+    max_radius: int = 3
+    # cell size of the coarser grid relative to this grid
+    coarse_factor: int = 4
+    # max number of point-segment pairs evaluated at once
+    pair_budget: int = 2**20
+    # max number of candidate segments of a point in a ring, more continue on the pruned search
+    max_candidates: int = 4096
+
+    def __init__(
+        self,
+        segments_start: np.ndarray,
+        segments_end: np.ndarray,
+        cell_size: Optional[float] = None,
+    ):
+        """Build the grid.
+
+        :param segments_start: (S, 2) array of segment start vertices
+        :param segments_end: (S, 2) array of segment end vertices
+        :param cell_size: optional size of a grid cell, default based on the segment lengths
+        """
+        self.segments_start: np.ndarray = np.ascontiguousarray(segments_start, dtype=float)
+        self.segments_end: np.ndarray = np.ascontiguousarray(segments_end, dtype=float)
+        if len(self.segments_start) == 0:
+            raise ValueError("SegmentIndex needs at least one segment.")
+
+        bounds_min = np.minimum(self.segments_start, self.segments_end)
+        bounds_max = np.maximum(self.segments_start, self.segments_end)
+        self.origin: np.ndarray = bounds_min.min(axis=0)
+        extent = bounds_max.max(axis=0) - self.origin
+
+        n_segments = len(self.segments_start)
+        if cell_size is None:
+            cell_size = float(np.mean((bounds_max - bounds_min).max(axis=1)))
+        if cell_size <= 0:
+            cell_size = max(float(extent.max()), 1.0)
+
+        # grow the cells till the registrations stay linear in the number of segments
+        while True:
+            cell_min = np.floor((bounds_min - self.origin) / cell_size).astype(np.int64)
+            cell_max = np.floor((bounds_max - self.origin) / cell_size).astype(np.int64)
+            shape = cell_max.max(axis=0) + 1
+            cells_per_segment = np.prod(cell_max - cell_min + 1, axis=1)
+            budget = self.max_cells_per_segment * n_segments + 16
+            if cells_per_segment.sum() <= budget and float(shape[0]) * float(shape[1]) <= self.max_cells:
+                break
+            cell_size *= 2
+
+        self.cell_size: float = float(cell_size)
+        self.shape: Tuple[int, int] = (int(shape[0]), int(shape[1]))
+        self._coarse: Optional[SegmentIndex] = None
+
+        # every (cell, segment) registration, sorted on cell
+        offsets = np.cumsum(cells_per_segment) - cells_per_segment
+        segment_ids = np.repeat(np.arange(n_segments), cells_per_segment)
+        local = np.arange(len(segment_ids)) - np.repeat(offsets, cells_per_segment)
+        width = np.repeat(cell_max[:, 0] - cell_min[:, 0] + 1, cells_per_segment)
+        cell_x = np.repeat(cell_min[:, 0], cells_per_segment) + local % width
+        cell_y = np.repeat(cell_min[:, 1], cells_per_segment) + local // width
+        cells = cell_y * self.shape[0] + cell_x
+
+        order = np.argsort(cells, kind="stable")
+        self.cell_items: np.ndarray = segment_ids[order]
+        self.cell_keys: np.ndarray
+        self.cell_keys, counts = np.unique(cells[order], return_counts=True)
+        self.cell_start: np.ndarray = np.concatenate([[0], np.cumsum(counts)])
+
+    @classmethod
+    def from_arrays(
+        cls,
+        segments_start: np.ndarray,
+        segments_end: np.ndarray,
+        origin: np.ndarray,
+        cell_size: float,
+        shape: Tuple[int, int],
+        cell_keys: np.ndarray,
+        cell_items: np.ndarray,
+        cell_start: np.ndarray,
+    ) -> SegmentIndex:
+        """Create an index on the arrays of an index build before, without copying them."""
+        index = cls.__new__(cls)
+        index.segments_start = segments_start
+        index.segments_end = segments_end
+        index.origin = origin
+        index.cell_size = cell_size
+        index.shape = shape
+        index.cell_keys = cell_keys
+        index.cell_items = cell_items
+        index.cell_start = cell_start
+        index._coarse = None
+        return index
+
+    def _array_state(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """Returns the json serializable settings and the arrays of the index, for _from_array_state."""
+        settings = {"cell_size": self.cell_size, "shape": list(self.shape)}
+        arrays = {
+            "origin": self.origin,
+            "cell_keys": self.cell_keys,
+            "cell_items": self.cell_items,
+            "cell_start": self.cell_start,
+        }
+        return settings, arrays
+
+    @classmethod
+    def _from_array_state(
+        cls,
+        segments_start: np.ndarray,
+        segments_end: np.ndarray,
+        settings: Dict[str, Any],
+        arrays: Dict[str, np.ndarray],
+    ) -> SegmentIndex:
+        """Create an index on the settings and arrays of _array_state, arrays of the line may be included."""
+        missing = sorted({"origin", "cell_keys", "cell_items", "cell_start"} - set(arrays))
+        if missing:
+            raise ValueError(f"segment index misses arrays {missing}.")
+        return cls.from_arrays(
+            segments_start,
+            segments_end,
+            origin=arrays["origin"],
+            cell_size=settings["cell_size"],
+            shape=tuple(settings["shape"]),
+            cell_keys=arrays["cell_keys"],
+            cell_items=arrays["cell_items"],
+            cell_start=arrays["cell_start"],
+        )
+
+    def __len__(self) -> int:
+        return len(self.segments_start)
+
+    @property
+    def coarse(self) -> SegmentIndex:
+        """Index with larger cells on the same segments, build on first use."""
+        if self._coarse is None:
+            self._coarse = SegmentIndex(
+                self.segments_start, self.segments_end, cell_size=self.cell_size * self.coarse_factor
+            )
+        return self._coarse
+
+    def nearest(self, points_xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Find the nearest segment for every point.
+
+        Same result as helpers.project_points_on_segments: on a tie a non-degenerate segment wins, then the
+        lowest segment index.
+
+        :param points_xy: (N, 2) array of points
+        :return: segment index (N,), fraction along the segment (N,) and squared 2d distance (N,)
+        """
+        points_xy = np.ascontiguousarray(points_xy, dtype=float).reshape(-1, 2)
+        n_points = len(points_xy)
+        segment_index = np.zeros(n_points, dtype=np.intp)
+        fraction = np.zeros(n_points, dtype=float)
+        distance_squared = np.full(n_points, np.inf)
+
+        # the searched squares of a chunk hold at most pair_budget cells
+        rows = max(1, self.pair_budget // (2 * self.max_radius + 1) ** 2)
+        for start in range(0, n_points, rows):
+            chunk = slice(start, start + rows)
+            self._nearest_chunk(
+                points_xy[chunk], segment_index[chunk], fraction[chunk], distance_squared[chunk]
+            )
+        return segment_index, fraction, distance_squared
+
+    def _nearest_chunk(
+        self,
+        points_xy: np.ndarray,
+        segment_index: np.ndarray,
+        fraction: np.ndarray,
+        distance_squared: np.ndarray,
+    ) -> None:
+        """Ring search of a chunk of points, fills the results in place."""
+        n_points = len(points_xy)
+        nx, ny = self.shape
+        limit = 2**40
+        cells_xy = np.clip(np.floor((points_xy - self.origin) / self.cell_size), -limit, limit).astype(
+            np.int64
+        )
+
+        # searching more cells than there are segments (or cells) is slower than checking all segments
+        max_square = min(nx * ny, len(self.segments_start))
+
+        active = np.arange(n_points)
+        inner_radius, radius = -1, 1
+        while active.size:
+            cx, cy = cells_xy[active, 0], cells_xy[active, 1]
+            covers_grid = (
+                (cx - radius <= 0) & (cx + radius >= nx - 1) & (cy - radius <= 0) & (cy + radius >= ny - 1)
+            )
+            if (2 * radius + 1) ** 2 >= max_square:
+                covers_grid[:] = True
+
+            brute = active[covers_grid]
+            if brute.size:
+                result = self._nearest_all(points_xy[brute])
+                segment_index[brute], fraction[brute], distance_squared[brute] = result
+
+            active, cx, cy = active[~covers_grid], cx[~covers_grid], cy[~covers_grid]
+            if not active.size:
+                break
+
+            instrumentation.count("index_rings", active.size)
+            found, crowded = self._search_cells(
+                points_xy, active, cx, cy, radius, inner_radius, segment_index, fraction, distance_squared
+            )
+            brute = active[crowded]
+            if brute.size:
+                result = self._nearest_all(points_xy[brute])
+                segment_index[brute], fraction[brute], distance_squared[brute] = result
+
+            # exact once the nearest segment is closer than the edge of the searched square
+            left = self.origin[0] + (cx - radius) * self.cell_size
+            bottom = self.origin[1] + (cy - radius) * self.cell_size
+            right = self.origin[0] + (cx + radius + 1) * self.cell_size
+            top = self.origin[1] + (cy + radius + 1) * self.cell_size
+            px, py = points_xy[active, 0], points_xy[active, 1]
+            reach = np.minimum(np.minimum(px - left, right - px), np.minimum(py - bottom, top - py))
+            done = (found & (distance_squared[active] <= reach**2)) | crowded
+
+            active = active[~done]
+            inner_radius, radius = radius, radius * 2 + 1
+            if radius > self.max_radius and active.size:
+                if self.pruning_level is self:
+                    # coarser grids have too few cells to prune well
+                    result = self._nearest_all(points_xy[active])
+                else:
+                    instrumentation.count("index_coarse_points", active.size)
+                    result = self.coarse.nearest(points_xy[active])
+                segment_index[active], fraction[active], distance_squared[active] = result
+                break
+
+    def _search_cells(
+        self,
+        points_xy: np.ndarray,
+        active: np.ndarray,
+        cx: np.ndarray,
+        cy: np.ndarray,
+        radius: int,
+        inner_radius: int,
+        segment_index: np.ndarray,
+        fraction: np.ndarray,
+        distance_squared: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search the ring of cells around the active points, updates the results in place if nearer.
+
+        The ring is the square of radius without the square of inner_radius, searched before.
+
+        :return: boolean arrays, True if a segment is known for the active point and True if the point has
+            more than max_candidates segments in the ring, those are not searched
+        """
+        nx, ny = self.shape
+        x0, x1 = np.maximum(cx - radius, 0), np.minimum(cx + radius, nx - 1)
+        y0, y1 = np.maximum(cy - radius, 0), np.minimum(cy + radius, ny - 1)
+        width = np.maximum(x1 - x0 + 1, 0)
+        n_cells = width * np.maximum(y1 - y0 + 1, 0)
+
+        # all cells of every square
+        point_of_cell = np.repeat(np.arange(len(active)), n_cells)
+        local = np.arange(len(point_of_cell)) - np.repeat(np.cumsum(n_cells) - n_cells, n_cells)
+        width_of_cell = width[point_of_cell]
+        cell_x = x0[point_of_cell] + local % width_of_cell
+        cell_y = y0[point_of_cell] + local // width_of_cell
+        in_ring = (
+            np.maximum(np.abs(cell_x - cx[point_of_cell]), np.abs(cell_y - cy[point_of_cell])) > inner_radius
+        )
+        point_of_cell = point_of_cell[in_ring]
+        cells = cell_y[in_ring] * nx + cell_x[in_ring]
+
+        # all segments in the occupied cells
+        position = np.minimum(np.searchsorted(self.cell_keys, cells), len(self.cell_keys) - 1)
+        counts = np.where(
+            self.cell_keys[position] == cells, self.cell_start[position + 1] - self.cell_start[position], 0
+        )
+
+        # points with too many candidates are left to the pruned search
+        crowded = np.bincount(point_of_cell, weights=counts, minlength=len(active)) > self.max_candidates
+        keep = ~crowded[point_of_cell]
+        self._update(
+            points_xy,
+            active,
+            point_of_cell[keep],
+            position[keep],
+            counts[keep],
+            segment_index,
+            fraction,
+            distance_squared,
+        )
+        return np.isfinite(distance_squared[active]), crowded
+
+    def _pair_chunks(self, point_of_cell: np.ndarray, counts: np.ndarray) -> Iterator[slice]:
+        """Yields slices of cells, sorted on point, of at most pair_budget pairs unless one point has more.
+
+        Cells of a point are never split over two slices.
+        """
+        ends = np.cumsum(counts)
+        start = 0
+        while start < len(counts):
+            offset = ends[start - 1] if start else 0
+            stop = int(np.searchsorted(ends, offset + self.pair_budget, side="right"))
+            # keep the cells of the last point together, at least one point per slice
+            point = point_of_cell[min(stop, len(counts) - 1)]
+            if stop < len(counts):
+                stop = int(np.searchsorted(point_of_cell, point, side="left"))
+            if stop <= start:
+                stop = int(np.searchsorted(point_of_cell, point_of_cell[start], side="right"))
+            yield slice(start, stop)
+            start = stop
+
+    def _tie_key(self, items: np.ndarray) -> np.ndarray:
+        """Order of segments on an equal distance: non-degenerate segments first, then the lowest index."""
+        degenerate = np.all(self.segments_start[items] == self.segments_end[items], axis=1)
+        return items.astype(np.int64) + len(self.segments_start) * degenerate
+
+    def _update(
+        self,
+        points_xy: np.ndarray,
+        active: np.ndarray,
+        point_of_cell: np.ndarray,
+        position: np.ndarray,
+        counts: np.ndarray,
+        segment_index: np.ndarray,
+        fraction: np.ndarray,
+        distance_squared: np.ndarray,
+    ) -> None:
+        """Check the segments of cells, by position in cell_keys, updates the results of a point if nearer.
+
+        :param point_of_cell: sorted index in active of the point of every cell
+        :param counts: number of segments of every cell
+        """
+        for cells in self._pair_chunks(point_of_cell, counts):
+            cell_counts = counts[cells]
+            point_of_item = np.repeat(point_of_cell[cells], cell_counts)
+            if not point_of_item.size:
+                continue
+            local = np.arange(len(point_of_item)) - np.repeat(
+                np.cumsum(cell_counts) - cell_counts, cell_counts
+            )
+            items = self.cell_items[np.repeat(self.cell_start[position[cells]], cell_counts) + local]
+
+            start = self.segments_start[items]
+            ab = self.segments_end[items] - start
+            ap = points_xy[active[point_of_item]] - start
+            ab_dot = np.einsum("ij,ij->i", ab, ab)
+            t = np.clip(np.einsum("ij,ij->i", ap, ab) / np.where(ab_dot == 0, 1.0, ab_dot), 0.0, 1.0)
+            d2 = np.einsum("ij,ij->i", ap - t[:, None] * ab, ap - t[:, None] * ab)
+
+            # nearest, then lowest tie key, per run of a point
+            starts = np.flatnonzero(np.r_[True, point_of_item[1:] != point_of_item[:-1]])
+            run_counts = np.diff(np.r_[starts, len(point_of_item)])
+            nearest = d2 == np.repeat(np.minimum.reduceat(d2, starts), run_counts)
+            keys = self._tie_key(items)
+            candidates = np.where(nearest, keys, np.iinfo(keys.dtype).max)
+            lowest = np.repeat(np.minimum.reduceat(candidates, starts), run_counts)
+            chosen = np.flatnonzero(nearest & (keys == lowest))
+            first = chosen[np.r_[True, point_of_item[chosen][1:] != point_of_item[chosen][:-1]]]
+            target = active[point_of_item[first]]
+
+            # keep the nearest of an inner ring or an earlier chunk
+            nearer = (d2[first] < distance_squared[target]) | (
+                (d2[first] == distance_squared[target]) & (keys[first] < self._tie_key(segment_index[target]))
+            )
+            first, target = first[nearer], target[nearer]
+            segment_index[target] = items[first]
+            fraction[target] = t[first]
+            distance_squared[target] = d2[first]
+
+    @property
+    def pruning_level(self) -> Optional[SegmentIndex]:
+        """Level of the coarse chain with about 4 * sqrt(S) occupied cells, None for a few segments."""
+        n_segments = len(self.segments_start)
+        if n_segments <= 256:
+            return None
+        level = self
+        while len(level.cell_keys) > 4 * np.sqrt(n_segments):
+            level = level.coarse
+        return level
+
+    def _nearest_all(self, points_xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Nearest segment of points without a ring search, pruned on the cells of the pruning level."""
+        instrumentation.count("index_brute_force_points", len(points_xy))
+        level = self.pruning_level
+        if level is None:
+            return project_points_on_segments(points_xy, self.segments_start, self.segments_end)
+        return level._nearest_pruned(points_xy)
+
+    def _nearest_pruned(self, points_xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Check only the segments in cells closer than a first upper bound, exact like brute force.
+
+        The point on the nearest segment lies in a cell the segment is registered in, so no cell further than
+        the nearest segment needs to be checked. The segments of the nearest cell give the upper bound.
+        """
+        n_points, n_cells = len(points_xy), len(self.cell_keys)
+        segment_index = np.zeros(n_points, dtype=np.intp)
+        fraction = np.zeros(n_points, dtype=float)
+        distance_squared = np.full(n_points, np.inf)
+
+        nx = self.shape[0]
+        box_min = self.origin + np.column_stack([self.cell_keys % nx, self.cell_keys // nx]) * self.cell_size
+        box_max = box_min + self.cell_size
+        counts = self.cell_start[1:] - self.cell_start[:-1]
+
+        rows = max(1, self.pair_budget // n_cells)
+        for start in range(0, n_points, rows):
+            active = np.arange(start, min(start + rows, n_points))
+            px, py = points_xy[active, 0, None], points_xy[active, 1, None]
+            dx = np.maximum(np.maximum(box_min[:, 0] - px, px - box_max[:, 0]), 0.0)
+            dy = np.maximum(np.maximum(box_min[:, 1] - py, py - box_max[:, 1]), 0.0)
+            lower = dx * dx + dy * dy
+
+            # upper bound by the nearest cell, then every cell that can hold a nearer segment
+            nearest_cell = np.argmin(lower, axis=1)
+            own = np.arange(len(active))
+            self._update(
+                points_xy,
+                active,
+                own,
+                nearest_cell,
+                counts[nearest_cell],
+                segment_index,
+                fraction,
+                distance_squared,
+            )
+            lower[own, nearest_cell] = np.inf
+            # tolerate rounding of the cell edges
+            bound = distance_squared[active] * (1 + 1e-9) + 1e-9 * self.cell_size**2
+            point_of_cell, cell = np.nonzero(lower <= bound[:, None])
+            self._update(
+                points_xy,
+                active,
+                point_of_cell,
+                cell,
+                counts[cell],
+                segment_index,
+                fraction,
+                distance_squared,
+            )
+        return segment_index, fraction, distance_squared
@@ -0,0 +1,398 @@
+"""Asyncio JSON projection service that gathers concurrent requests in micro-batches.
+
+Requests for the same line that arrive within a short window (default 2 ms, or till 1024 points are waiting)
+are projected together by one vectorized project_many call in a worker thread, so the per-call overhead is
+shared. Only the standard library is used, the service speaks a minimal HTTP/1.1 with keep-alive:
+
+    GET /lines      {"lines": [{"key": "a", "vertices": 120, "bounds": [x_min, y_min, x_max, y_max]}]}
+    POST /project   {"line": "a", "points": [[x, y], [x, y, z]], "azimuth": [90, null]}
+                    {"results": [{"x_on_line": ..., "distance_along_line": ..., "side_of_line": "Left"}]}
+
+The line can be left out if the service has one line, azimuth can be one value or a value per point. Bad
+requests are answered with status 400 or 404, unexpected errors with 500 and {"error": message}.
+
+Example:
+    shapelyM serve --lines lines.geojson --port 8765 --window-ms 2 --max-points 1024
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from shapelyM.linear_reference import ProjectionBatch
+from shapelyM.measureLineString import MeasureLineString
+
+
+@dataclass
+class BatcherStats:
+    """Number of requests, points and project_many calls of a MicroBatcher."""
+
+    requests: int = 0
+    points: int = 0
+    batches: int = 0
+
+
+class MicroBatcher:
+    """Gathers concurrent projection requests on one line in batches for project_many.
+
+    A batch starts with the first waiting request and is projected when the window has passed or max_points
+    points are waiting. Batches are projected one at the time in a worker thread, so the event loop keeps
+    accepting requests meanwhile. If a batch fails its requests are projected on their own, so only the
+    failing requests get the error.
+    """
+
+    def __init__(
+        self,
+        line: MeasureLineString,
+        window: float = 0.002,
+        max_points: int = 1024,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ):
+        """Create a batcher, the batch loop starts on the first request.
+
+        :param line: MeasureLineString to project on
+        :param window: max seconds the first request of a batch waits for more requests
+        :param max_points: number of waiting points that starts a batch before the window has passed
+        :param executor: optional thread pool to project in, default the loop's default executor
+        """
+        if window < 0:
+            raise ValueError("window should be 0 or larger.")
+        if max_points < 1:
+            raise ValueError("max_points should be at least 1.")
+        self.line: MeasureLineString = line
+        self.window: float = window
+        self.max_points: int = max_points
+        self.stats: BatcherStats = BatcherStats()
+        self._executor = executor
+        self._pending: List[Tuple[np.ndarray, np.ndarray, asyncio.Future]] = []
+        self._n_pending: int = 0
+        self._has_pending: Optional[asyncio.Event] = None
+        self._more: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def project(self, xyz: np.ndarray, azimuth: np.ndarray) -> ProjectionBatch:
+        """Project points in the next batch.
+
+        :param xyz: (N, 3) array of points, z nan if unknown
+        :param azimuth: (N,) array of azimuths, nan if unknown
+        :return: ProjectionBatch of the points
+        """
+        if len(xyz) != len(azimuth):
+            raise ValueError("azimuth should have a value per point.")
+        if self._task is None:
+            self._has_pending, self._more = asyncio.Event(), asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        assert self._has_pending is not None and self._more is not None
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((xyz, azimuth, future))
+        self._n_pending += len(xyz)
+        self._has_pending.set()
+        self._more.set()
+        return await future
+
+    async def _run(self) -> None:
+        assert self._has_pending is not None and self._more is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._has_pending.wait()
+            deadline = loop.time() + self.window
+            while self._n_pending < self.max_points:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._more.clear()
+                try:
+                    await asyncio.wait_for(self._more.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            # waiting requests up to max_points, at least one
+            count, n_points = 0, 0
+            for xyz, _, _ in self._pending:
+                if count and n_points + len(xyz) > self.max_points:
+                    break
+                count += 1
+                n_points += len(xyz)
+            requests, self._pending = self._pending[:count], self._pending[count:]
+            self._n_pending -= n_points
+            if not self._pending:
+                self._has_pending.clear()
+            await self._project(requests)
+
+    async def _project(self, requests: List[Tuple[np.ndarray, np.ndarray, asyncio.Future]]) -> None:
+        self.stats.requests += len(requests)
+        self.stats.points += sum(len(request[0]) for request in requests)
+        try:
+            results = [(requests, await self._project_many(requests))]
+        except Exception as error:
+            if len(requests) == 1:
+                self._set_exception(requests, error)
+                return
+            # project the requests on their own, only the failing requests get an error
+            results = []
+            for request in requests:
+                try:
+                    results.append(([request], await self._project_many([request])))
+                except Exception as request_error:
+                    self._set_exception([request], request_error)
+
+        for group, batch in results:
+            start = 0
+            for points, _, future in group:
+                stop = start + len(points)
+                if not future.done():
+                    future.set_result(batch.take(slice(start, stop)))
+                start = stop
+
+    async def _project_many(
+        self, requests: List[Tuple[np.ndarray, np.ndarray, asyncio.Future]]
+    ) -> ProjectionBatch:
+        self.stats.batches += 1
+        xyz = np.concatenate([request[0] for request in requests])
+        azimuth = np.concatenate([request[1] for request in requests])
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, lambda: self.line.project_many(xyz, azimuth=azimuth)
+        )
+
+    @staticmethod
+    def _set_exception(
+        requests: List[Tuple[np.ndarray, np.ndarray, asyncio.Future]], error: Exception
+    ) -> None:
+        for _, _, future in requests:
+            if not future.done():
+                future.set_exception(error)
+
+    async def close(self) -> None:
+        """Stop the batch loop, waiting requests are cancelled."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for _, _, future in self._pending:
+            future.cancel()
+        self._pending, self._n_pending = [], 0
+
+
+def _json_value(value: Any) -> Any:
+    value = value.item() if isinstance(value, np.generic) else value
+    return None if isinstance(value, float) and np.isnan(value) else value
+
+
+def batch_results(batch: ProjectionBatch) -> List[Dict[str, Any]]:
+    """Returns the rows of a batch as json serializable dicts, nan as None and enums as their value."""
+    columns: Dict[str, Any] = {
+        name: values.tolist() for name, values in batch.columns().items() if name not in ("x", "y", "z")
+    }
+    columns["functional_direction"] = [item.value for item in batch.functional_direction]
+    columns["side_of_line"] = [item.value for item in batch.side_of_line]
+    names = list(columns)
+    return [{name: _json_value(value) for name, value in zip(names, row)} for row in zip(*columns.values())]
+
+
+class _RequestError(Exception):
+    """Bad request, answered with the status and message."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status: HTTPStatus = status
+
+
+def _is_number(value: Any) -> bool:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    try:
+        return math.isfinite(value)
+    except OverflowError:
+        return False
+
+
+def _parse_points(body: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the (N, 3) points and (N,) azimuths of a project request.
+
+    Every point should be 2 or 3 finite numbers, an azimuth a finite number or null.
+    """
+    points = body.get("points")
+    if not isinstance(points, list) or not all(
+        isinstance(row, list) and len(row) in (2, 3) and all(_is_number(value) for value in row)
+        for row in points
+    ):
+        raise _RequestError(HTTPStatus.BAD_REQUEST, "points should be a list of [x, y] or [x, y, z].")
+    xyz = np.full((len(points), 3), np.nan)
+    for idx, row in enumerate(points):
+        xyz[idx, : len(row)] = row
+
+    azimuth = body.get("azimuth")
+    values = azimuth if isinstance(azimuth, list) else [azimuth] * len(xyz)
+    if not all(value is None or _is_number(value) for value in values):
+        raise _RequestError(HTTPStatus.BAD_REQUEST, "azimuth should be a number or a list of numbers.")
+    values = np.array([np.nan if value is None else value for value in values], dtype=float)
+    if len(values) != len(xyz):
+        raise _RequestError(HTTPStatus.BAD_REQUEST, "azimuth should have a value per point.")
+    return xyz, values
+
+
+class ProjectionServer:
+    """Asyncio HTTP service with a MicroBatcher per line.
+
+    Example:
+        server = ProjectionServer({"a": line}, port=8765)
+        asyncio.run(server.serve_forever())
+    """
+
+    def __init__(
+        self,
+        lines: Dict[Hashable, MeasureLineString],
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        window: float = 0.002,
+        max_points: int = 1024,
+    ):
+        """Create the service, lines are kept loaded for the lifetime of the service.
+
+        :param lines: lines by key, keys are matched as string in requests
+        :param host: host to listen on
+        :param port: port to listen on, 0 for a free port
+        :param window: max seconds a request waits for more requests of a batch
+        :param max_points: number of waiting points that starts a batch before the window has passed
+        """
+        if not lines:
+            raise ValueError("the server needs at least one line.")
+        self.host: str = host
+        self.port: int = port
+        # one thread, batches of different lines are projected one after the other like the requests arrive
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shapelyM-project")
+        self.batchers: Dict[str, MicroBatcher] = {
+            str(key): MicroBatcher(line, window, max_points, self._executor) for key, line in lines.items()
+        }
+        self._server: Optional[asyncio.Server] = None
+
+    async def start(self) -> int:
+        """Start listening, returns the port."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for batcher in self.batchers.values():
+            await batcher.close()
+        self._executor.shutdown(wait=False)
+
+    def _lines(self) -> Dict[str, Any]:
+        lines = []
+        for key, batcher in self.batchers.items():
+            xy = batcher.line.xy
+            bounds = np.concatenate([xy.min(axis=0), xy.max(axis=0)]).tolist()
+            lines.append({"key": key, "vertices": len(xy), "bounds": bounds})
+        return {"lines": lines}
+
+    async def _project(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        key = body.get("line")
+        if key is None and len(self.batchers) == 1:
+            key = next(iter(self.batchers))
+        batcher = self.batchers.get(str(key))
+        if batcher is None:
+            raise _RequestError(HTTPStatus.NOT_FOUND, f"line {key} not found.")
+        xyz, azimuth = _parse_points(body)
+        batch = await batcher.project(xyz, azimuth)
+        return {"results": batch_results(batch)}
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        try:
+            if path == "/lines" and method == "GET":
+                return HTTPStatus.OK, self._lines()
+            if path == "/project" and method == "POST":
+                try:
+                    request = json.loads(body)
+                except ValueError:
+                    raise _RequestError(HTTPStatus.BAD_REQUEST, "body should be json.") from None
+                if not isinstance(request, dict):
+                    raise _RequestError(HTTPStatus.BAD_REQUEST, "body should be a json object.")
+                return HTTPStatus.OK, await self._project(request)
+            raise _RequestError(HTTPStatus.NOT_FOUND, f"no route {method} {path}.")
+        except _RequestError as error:
+            return error.status, {"error": str(error)}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the requests of one keep-alive connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as error:
+                    status = HTTPStatus.INTERNAL_SERVER_ERROR
+                    payload = {"error": f"{type(error).__name__}: {error}"}
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(server: ProjectionServer) -> None:
+    port = await server.start()
+    print(
+        f"{len(server.batchers)} line(s), listening on http://{server.host}:{port}",
+        file=sys.stderr,
+        flush=True,
+    )
+    await server.serve_forever()
+
+
+def serve(
+    lines: Dict[Hashable, MeasureLineString],
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    window: float = 0.002,
+    max_points: int = 1024,
+) -> None:
+    """Run a ProjectionServer till interrupted, reports the address it listens on to stderr."""
+    try:
+        asyncio.run(_serve(ProjectionServer(lines, host, port, window, max_points)))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,169 @@
+"""Compact binary file format for measured lines and networks, opened memory mapped.
+
+Layout of a file, all numbers little endian:
+    magic        8 bytes  b"SHAPELYM"
+    version      uint32   FORMAT_VERSION
+    header size  uint32   size of the json header in bytes
+    checksum     16 bytes blake2b of the json header and the array data
+    header       json     kind, network settings, per line the key, m_given and segment index settings, and
+                          the name, dtype, shape and offset of every array
+    data         arrays   64 byte aligned, offsets relative to the start of the data
+
+Arrays of a loaded file are read only views on the file, a memory mapped file is shared by the OS between
+processes and only pages that are used are read.
+
+Example:
+    from shapelyM import storage
+
+    storage.save(line, "line.shpm")
+    line = storage.load("line.shpm")
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap as _mmap
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.measureNetwork import MeasureNetwork
+
+MAGIC = b"SHAPELYM"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<8sII16s")
+_ALIGNMENT = 64
+
+
+def _checksum(header: Union[bytes, memoryview], data: Union[bytes, memoryview]) -> bytes:
+    digest = hashlib.blake2b(header, digest_size=16)
+    digest.update(data)
+    return digest.digest()
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def save(item: Union[MeasureLineString, MeasureNetwork], path: Union[str, Path], index: bool = True) -> None:
+    """Save a line or network to a binary file.
+
+    :param item: MeasureLineString or MeasureNetwork, keys of a network should be json serializable
+    :param path: file to write
+    :param index: True to store the segment index of the lines, else it is build on first use after loading
+    """
+    if isinstance(item, MeasureNetwork):
+        header: Dict[str, Any] = {
+            "kind": "network",
+            "network": {"search_radius": item.search_radius, "k": item.k, "cell_size": item.cell_size},
+        }
+        lines = [(key, item[key]) for key in item]
+    elif isinstance(item, MeasureLineString):
+        header = {"kind": "line"}
+        lines = [(None, item)]
+    else:
+        raise TypeError(f"can not save {type(item).__name__}, expected MeasureLineString or MeasureNetwork.")
+
+    header["lines"] = []
+    header["arrays"] = []
+    to_write: List[np.ndarray] = []
+    offset = 0
+    for line_index, (key, line) in enumerate(lines):
+        settings, arrays = line._array_state(index)
+        header["lines"].append({"key": key, **settings})
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            offset = _aligned(offset)
+            header["arrays"].append(
+                [f"{line_index}/{name}", array.dtype.newbyteorder("<").str, array.shape, offset]
+            )
+            to_write.append(array.astype(array.dtype.newbyteorder("<"), copy=False))
+            offset += array.nbytes
+
+    try:
+        header_bytes = json.dumps(header, separators=(",", ":"), allow_nan=False).encode()
+    except TypeError as error:
+        raise TypeError(f"network keys should be json serializable: {error}") from None
+    header_bytes += b" " * (_aligned(_PREAMBLE.size + len(header_bytes)) - _PREAMBLE.size - len(header_bytes))
+
+    # arrays are written one by one, the checksum is filled in the preamble at the end
+    digest = hashlib.blake2b(header_bytes, digest_size=16)
+    with open(path, "wb") as file:
+        file.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes), bytes(16)))
+        file.write(header_bytes)
+        position = 0
+        for (_, _, _, start), array in zip(header["arrays"], to_write):
+            for chunk in (bytes(start - position), memoryview(array).cast("B")):
+                digest.update(chunk)
+                file.write(chunk)
+            position = start + array.nbytes
+        file.seek(0)
+        file.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes), digest.digest()))
+
+
+def _read(path: Union[str, Path], mmap: bool, verify: bool) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Returns the header and read only views on the arrays of a file."""
+    with open(path, "rb") as file:
+        if mmap:
+            buffer: Union[bytes, _mmap.mmap] = _mmap.mmap(file.fileno(), 0, access=_mmap.ACCESS_READ)
+        else:
+            buffer = file.read()
+
+    if len(buffer) < _PREAMBLE.size:
+        raise ValueError(f"{path} is not a shapelyM file.")
+    magic, version, header_size, checksum = _PREAMBLE.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a shapelyM file.")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {version}, this version reads up to {FORMAT_VERSION}.")
+
+    view = memoryview(buffer)
+    header_bytes = view[_PREAMBLE.size : _PREAMBLE.size + header_size]
+    data = view[_PREAMBLE.size + header_size :]
+    if verify and _checksum(header_bytes, data) != checksum:
+        raise ValueError(f"{path} is corrupt, checksum does not match.")
+
+    header = json.loads(bytes(header_bytes))
+    arrays = {}
+    for name, dtype, shape, offset in header["arrays"]:
+        count = int(np.prod(shape))
+        if offset + count * np.dtype(dtype).itemsize > len(data):
+            raise ValueError(f"{path} is truncated.")
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(shape)
+        array.flags.writeable = False
+        arrays[name] = array
+    return header, arrays
+
+
+def load(
+    path: Union[str, Path], mmap: bool = True, verify: bool = True
+) -> Union[MeasureLineString, MeasureNetwork]:
+    """Load a line or network saved by save, without building the lines again.
+
+    :param path: file to read
+    :param mmap: True to memory map the file, else it is read in memory
+    :param verify: True to check the checksum, this reads the whole file once
+    :return: MeasureLineString or MeasureNetwork
+    """
+    header, arrays = _read(path, mmap, verify)
+
+    arrays_of_line: List[Dict[str, np.ndarray]] = [{} for _ in header["lines"]]
+    for name, array in arrays.items():
+        line_index, array_name = name.split("/", 1)
+        arrays_of_line[int(line_index)][array_name] = array
+    lines = [
+        (settings["key"], MeasureLineString._from_array_state(settings, line_arrays))
+        for settings, line_arrays in zip(header["lines"], arrays_of_line)
+    ]
+
+    if header["kind"] == "line":
+        return lines[0][1]
+
+    network = MeasureNetwork(**header["network"])
+    for key, line in lines:
+        network.add(line, key)
+    return network
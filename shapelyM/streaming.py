@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from shapelyM.linear_reference import ProjectionBatch
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.parallel import ParallelProjector
+
+# a point row: x, y and optional z and azimuth, nan if unknown
+PointRow = Sequence[float]
+PointReader = Callable[..., Iterator[Tuple[float, float, float, float]]]
+
+
+def read_csv_points(
+    path: Union[str, Path],
+    x: str = "x",
+    y: str = "y",
+    z: Optional[str] = None,
+    azimuth: Optional[str] = None,
+    delimiter: str = ",",
+) -> Iterator[Tuple[float, float, float, float]]:
+    """Read points from a csv file with a header row, one row at the time.
+
+    :param path: path of the csv file
+    :param x: name of the x column
+    :param y: name of the y column
+    :param z: optional name of the z column, an empty value is read as nan
+    :param azimuth: optional name of the azimuth column, an empty value is read as nan
+    :param delimiter: column delimiter
+    :return: iterator of x, y, z, azimuth tuples
+    """
+
+    def _value(row, column):
+        if column is None or row[column] in (None, ""):
+            return np.nan
+        return float(row[column])
+
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file, delimiter=delimiter):
+            yield float(row[x]), float(row[y]), _value(row, z), _value(row, azimuth)
+
+
+def read_geojson_lines_points(
+    path: Union[str, Path], azimuth: Optional[str] = None
+) -> Iterator[Tuple[float, float, float, float]]:
+    """Read Point features from a newline delimited GeoJSON file, one feature at the time.
+
+    :param path: path of the GeoJSON lines file
+    :param azimuth: optional name of the feature property holding the azimuth
+    :return: iterator of x, y, z, azimuth tuples
+    """
+    with open(path) as file:
+        for line in file:
+            line = line.strip().lstrip("\x1e")
+            if not line:
+                continue
+            feature = json.loads(line)
+            coordinates = feature["geometry"]["coordinates"]
+            z = coordinates[2] if len(coordinates) > 2 else np.nan
+            value = np.nan
+            if azimuth is not None:
+                value = (feature.get("properties") or {}).get(azimuth)
+                value = np.nan if value is None else float(value)
+            yield float(coordinates[0]), float(coordinates[1]), float(z), value
+
+
+readers = {
+    ".csv": read_csv_points,
+    ".geojsonl": read_geojson_lines_points,
+    ".geojsons": read_geojson_lines_points,
+    ".geojsonseq": read_geojson_lines_points,
+    ".ndjson": read_geojson_lines_points,
+    ".jsonl": read_geojson_lines_points,
+}
+
+
+def iter_chunks(points: Iterable[PointRow], chunk_size: int = 65536) -> Iterator[np.ndarray]:
+    """Group point rows in arrays of at most chunk_size rows, rows are only read when a chunk is needed.
+
+    :param points: iterable of x, y and optional z and azimuth rows
+    :param chunk_size: max number of rows in a chunk
+    :return: iterator of (n, 2), (n, 3) or (n, 4) float arrays
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size should be at least 1.")
+    iterator = iter(points)
+    while True:
+        rows = list(islice(iterator, chunk_size))
+        if not rows:
+            return
+        chunk = np.array(rows, dtype=float)
+        if chunk.ndim != 2 or not 2 <= chunk.shape[1] <= 4:
+            raise ValueError("point rows should be x, y and optional z and azimuth.")
+        yield chunk
+
+
+def project_stream(
+    line: Union[MeasureLineString, ParallelProjector],
+    points: Iterable[PointRow],
+    chunk_size: int = 65536,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Iterator[ProjectionBatch]:
+    """Project a stream of points in fixed size chunks, yields a ProjectionBatch per chunk.
+
+    Memory use depends on the chunk size only, the next chunk is read when the previous result is consumed.
+
+    :param line: MeasureLineString or ParallelProjector to project on
+    :param points: iterable of x, y and optional z and azimuth rows, nan if unknown
+    :param chunk_size: number of points per chunk
+    :param progress: optional callback called with the total number of projected points after every chunk
+    :return: iterator of ProjectionBatch in input order
+    """
+    done = 0
+    for chunk in iter_chunks(points, chunk_size):
+        azimuth = chunk[:, 3] if chunk.shape[1] == 4 else None
+        yield line.project_many(chunk[:, :3], azimuth=azimuth)
+        done += len(chunk)
+        if progress is not None:
+            progress(done)
+
+
+def project_file(
+    line: Union[MeasureLineString, ParallelProjector],
+    path: Union[str, Path],
+    reader: Optional[PointReader] = None,
+    chunk_size: int = 65536,
+    progress: Optional[Callable[[int], None]] = None,
+    **reader_kwargs,
+) -> Iterator[ProjectionBatch]:
+    """Project all points of a file in fixed size chunks, see project_stream.
+
+    :param line: MeasureLineString or ParallelProjector to project on
+    :param path: path of the points file
+    :param reader: optional reader, default by the file extension (csv or GeoJSON lines)
+    :param chunk_size: number of points per chunk
+    :param progress: optional callback called with the total number of projected points after every chunk
+    :param reader_kwargs: keyword arguments of the reader, e.g. column names
+    :return: iterator of ProjectionBatch in input order
+    """
+    if reader is None:
+        suffix = Path(path).suffix.lower()
+        if suffix not in readers:
+            raise ValueError(f"no reader for {suffix} files, give a reader.")
+        reader = readers[suffix]
+    return project_stream(line, reader(path, **reader_kwargs), chunk_size=chunk_size, progress=progress)
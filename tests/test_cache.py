@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from shapely.geometry import Point
+
+from shapelyM.cache import ProjectionCache
+from shapelyM.measureLineString import MeasureLineString
+
+
+class TestProjectionCache:
+    @pytest.fixture
+    def line(self):
+        return MeasureLineString([[3, 0, 0], [3, 10, 0], [3, 20, 0]])
+
+    def test_hit_and_miss(self, line):
+        cache = ProjectionCache()
+        first = cache.project(line, Point(0, 5), azimuth=90)
+        assert cache.project(line, Point(0, 5 + 1e-9), azimuth=90) is first
+        assert cache.project(line, Point(0, 5), azimuth=270) is not first
+        assert first == line.project(Point(0, 5), azimuth=90)
+
+        profile = cache.cut_profile(line, 5, 15)
+        assert cache.cut_profile(line, 5, 15) is profile
+        assert cache.cut(line, 5).result.end_measure == 5
+
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.size) == (2, 4, 4)
+
+    def test_nan_values(self, line):
+        cache = ProjectionCache()
+        first = cache.project(line, Point(0, 5), azimuth=float("nan"))
+        assert cache.project(line, Point(0, 5), azimuth=float("nan")) is first
+        assert cache.project(line, Point(0, 5), azimuth=None) is not first
+        assert first.distance_along_line == 5
+        cache.project(line, Point(0, 5, float("nan")))
+        with pytest.raises(ValueError, match="finite"):
+            cache.cut_profile(line, float("-inf"), float("inf"))
+        assert cache.stats().hits == 1
+
+    def test_same_content_shares_entries(self, line):
+        cache = ProjectionCache()
+        cache.project(line, Point(0, 5))
+        rebuilt = MeasureLineString([[3, 0, 0], [3, 10, 0], [3, 20, 0]])
+        cache.project(rebuilt, Point(0, 5))
+        other = MeasureLineString([[3, 0, 0], [3, 10, 0], [3, 30, 0]])
+        assert cache.project(other, Point(0, 25)).distance_along_line == 25
+        assert cache.stats().hits == 1
+
+    def test_lru_eviction(self, line):
+        cache = ProjectionCache(max_size=2)
+        for y in [1, 2, 1, 3]:
+            cache.project(line, Point(0, y))
+        stats = cache.stats()
+        assert (stats.evictions, stats.size) == (1, 2)
+        cache.project(line, Point(0, 1))
+        assert cache.stats().hits == 2
+
+    def test_invalidate(self, line):
+        cache = ProjectionCache()
+        cache.project(line, Point(0, 5))
+        line.xy[:, 0] += 1
+        assert cache.invalidate(line) == 1
+        assert cache.project(line, Point(0, 5)).distance_to_line_2d == 4
+        cache.clear()
+        assert cache.stats().misses == 0 and len(cache) == 0
+
+    def test_threads(self, line):
+        cache = ProjectionCache(max_size=50)
+        points = [Point(0, idx % 80 / 4) for idx in range(2000)]
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda point: cache.project(line, point), points))
+        assert [result.point.y for result in results] == [point.y for point in points]
+        stats = cache.stats()
+        assert stats.hits + stats.misses == 2000
+        assert stats.size <= 50
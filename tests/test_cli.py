@@ -0,0 +1,136 @@
+import csv
+import json
+import sys
+
+import numpy as np
+import pytest
+
+from shapelyM import storage
+from shapelyM.cli import load_target, main
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.measureNetwork import MeasureNetwork
+
+COORDINATES = [[0, 0, 0], [0, 10, 1], [10, 10, 2], [10, 30, 3]]
+
+
+def write_lines(path, lines):
+    features = [
+        {"type": "Feature", "id": key, "properties": {"name": f"line {key}"}, "geometry": geometry}
+        for key, geometry in lines.items()
+    ]
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+    return path
+
+
+@pytest.fixture
+def line_file(tmp_path):
+    return write_lines(tmp_path / "line.geojson", {"a": {"type": "LineString", "coordinates": COORDINATES}})
+
+
+@pytest.fixture
+def network_file(tmp_path):
+    shifted = (np.array(COORDINATES) + [2, 0, 0]).tolist()
+    return write_lines(
+        tmp_path / "network.geojson",
+        {
+            "a": {"type": "LineString", "coordinates": COORDINATES},
+            "b": {"type": "LineString", "coordinates": shifted},
+        },
+    )
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(8)
+    return np.column_stack([rng.uniform(-2, 12, 250), rng.uniform(-2, 32, 250), rng.uniform(0, 360, 250)])
+
+
+@pytest.fixture
+def points_file(tmp_path, points):
+    path = tmp_path / "points.csv"
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["x", "y", "heading"])
+        writer.writerows(points.tolist())
+    return path
+
+
+def read_csv(path):
+    with open(path, newline="") as file:
+        return list(csv.DictReader(file))
+
+
+class TestProject:
+    def test_line_csv(self, line_file, points_file, points, tmp_path, capsys):
+        out = tmp_path / "out.csv"
+        arguments = ["project", "--lines", str(line_file), "--points", str(points_file), "--out", str(out)]
+        assert main(arguments + ["--azimuth", "heading", "--chunk-size", "64"]) == 0
+        assert "projected 250 points" in capsys.readouterr().err
+
+        expected = MeasureLineString(COORDINATES).project_many(points[:, :2], azimuth=points[:, 2])
+        rows = read_csv(out)
+        assert [int(row["point_index"]) for row in rows] == list(range(250))
+        assert np.allclose([float(row["distance_along_line"]) for row in rows], expected.distance_along_line)
+        assert [row["side_of_line"] for row in rows] == [item.value for item in expected.side_of_line]
+        assert [row["functional_direction"] for row in rows] == [
+            item.value for item in expected.functional_direction
+        ]
+
+    def test_network_workers(self, network_file, points_file, tmp_path):
+        arguments = ["project", "--lines", str(network_file), "--points", str(points_file), "--k", "2"]
+        assert main(arguments + ["--out", str(tmp_path / "one.npz"), "--chunk-size", "64"]) == 0
+        assert (
+            main(arguments + ["--out", str(tmp_path / "two.npz"), "--chunk-size", "64", "--workers", "2"])
+            == 0
+        )
+
+        one, two = np.load(tmp_path / "one.npz"), np.load(tmp_path / "two.npz")
+        assert set(one.files) == set(two.files)
+        for name in one.files:
+            assert np.array_equal(one[name], two[name], equal_nan=one[name].dtype.kind == "f")
+        assert set(one["line_key"]) == {"a", "b"}
+        assert np.all(np.diff(one["point_index"]) >= 0)
+
+    def test_parquet_and_storage_file(self, line_file, points_file, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        lines = tmp_path / "line.shpm"
+        storage.save(MeasureLineString(COORDINATES), lines)
+        out = tmp_path / "out.parquet"
+        arguments = ["project", "--lines", str(lines), "--points", str(points_file), "--out", str(out)]
+        assert main(arguments + ["--chunk-size", "100"]) == 0
+        assert pq.read_table(out).num_rows == 250
+        assert pq.ParquetFile(out).num_row_groups == 3
+
+    def test_no_points(self, line_file, tmp_path):
+        points = tmp_path / "points.csv"
+        points.write_text("x,y\n")
+        out = tmp_path / "out.csv"
+        assert main(["project", "--lines", str(line_file), "--points", str(points), "--out", str(out)]) == 0
+        assert out.read_text().startswith("point_index,x,y")
+
+    def test_errors(self, line_file, points_file, tmp_path, capsys):
+        arguments = ["project", "--lines", str(line_file), "--points", str(points_file)]
+        assert main(arguments + ["--out", str(tmp_path / "out.txt")]) == 1
+        assert main(arguments + ["--out", str(tmp_path / "out.csv"), "--workers", "0"]) == 2
+        multi = write_lines(tmp_path / "multi.geojson", {"m": {"type": "MultiLineString", "coordinates": []}})
+        arguments = ["project", "--lines", str(multi), "--points", str(points_file)]
+        assert main(arguments + ["--out", str(tmp_path / "out.csv")]) == 1
+        assert "only LineStrings" in capsys.readouterr().err
+
+
+def test_load_target(line_file, network_file):
+    assert isinstance(load_target(line_file), MeasureLineString)
+    network = load_target(network_file, key="name", search_radius=5)
+    assert isinstance(network, MeasureNetwork)
+    assert network.keys() == ["line a", "line b"]
+    assert network.search_radius == 5
+
+
+def test_console_script():
+    if sys.version_info < (3, 11):
+        pytest.skip("tomllib needs python 3.11")
+    import tomllib
+    from pathlib import Path
+
+    pyproject = tomllib.loads((Path(__file__).parents[1] / "pyproject.toml").read_text())
+    assert pyproject["project"]["scripts"]["shapelyM"] == "shapelyM.cli:main"
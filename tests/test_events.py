@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from shapelyM.events import EventTable, overlay, overlay_arrays
+from shapelyM.measureLineString import MeasureLineString
+
+
+@pytest.fixture
+def line():
+    return MeasureLineString([[0, 0, 0], [0, 500, 5], [500, 500, 10], [500, 1000, 20]])
+
+
+@pytest.fixture
+def tables():
+    return [
+        EventTable("speed", [400, 0], [1000, 400], [120, 80]),
+        EventTable("zone", [250], [600], ["works"]),
+        EventTable("gradient", [0, 100, 300], [100, 300, 2000], [1, 1, 2]),
+    ]
+
+
+class TestEventTable:
+    def test_sorted(self, tables):
+        speed = tables[0]
+        assert speed.from_measures.tolist() == [0, 400]
+        assert speed.values == [80, 120]
+        assert len(speed) == 2
+        assert speed.codes(np.array([-1, 0, 399, 400, 1000])).tolist() == [-1, 0, 0, 1, -1]
+
+    def test_equal_values_same_code(self, tables):
+        gradient = tables[2]
+        assert gradient.unique_values == [1, 2]
+        assert gradient.codes(np.array([50, 150, 350])).tolist() == [0, 0, 1]
+
+    @pytest.mark.parametrize(
+        "from_measures, to_measures, values",
+        [([0, 10], [10], [1, 2]), ([10], [0], [1]), ([0, 5], [10, 20], [1, 2])],
+    )
+    def test_bad_table(self, from_measures, to_measures, values):
+        with pytest.raises(ValueError):
+            EventTable("bad", from_measures, to_measures, values)
+
+
+class TestOverlay:
+    def test_sections(self, line, tables):
+        sections = overlay(line, tables)
+        assert [(section.from_measure, section.to_measure) for section in sections] == [
+            (0, 250),
+            (250, 300),
+            (300, 400),
+            (400, 600),
+            (600, 1000),
+            (1000, line.end_measure),
+        ]
+        assert [section.attributes for section in sections] == [
+            (80, None, 1),
+            (80, "works", 1),
+            (80, "works", 2),
+            (120, "works", 2),
+            (120, None, 2),
+            (None, None, 2),
+        ]
+        for section in sections:
+            expected = line.cut_profile(section.from_measure, section.to_measure).result
+            assert np.allclose(
+                np.array(section.line.coordinate_list(), dtype=float),
+                np.array(expected.coordinate_list(), dtype=float),
+            )
+            assert section.line.start_point.tolist() == expected.start_point.tolist()
+            assert section.line.end_point.tolist() == expected.end_point.tolist()
+        assert sum(section.line.length_3d for section in sections) == pytest.approx(line.length_3d)
+
+    def test_no_merge(self, line, tables):
+        boundaries, codes = overlay_arrays(line, tables, merge=False)
+        # the gradient boundary at 100 splits two intervals of the same value
+        assert 100 in boundaries.tolist()
+        assert len(codes) == len(boundaries) - 1 == 7
+        assert 100 not in overlay_arrays(line, tables)[0].tolist()
+        assert len(overlay(line, tables, merge=False)) == 7
+
+    def test_events_outside_line(self, line):
+        table = EventTable("before", [-100, line.end_measure], [-10, line.end_measure + 10], ["a", "b"])
+        sections = overlay(line, [table])
+        assert len(sections) == 1
+        assert sections[0].attributes == (None,)
+        assert sections[0].line.measure_length == pytest.approx(line.measure_length)
+
+    def test_no_tables(self, line):
+        sections = overlay(line, [])
+        assert [(section.from_measure, section.to_measure, section.attributes) for section in sections] == [
+            (line.start_measure, line.end_measure, ())
+        ]
+
+    def test_many_events(self):
+        rng = np.random.default_rng(2)
+        line = MeasureLineString(np.cumsum(rng.uniform(0, 10, (1000, 2)), axis=0))
+        tables = []
+        for name in "abc":
+            boundaries = np.sort(rng.uniform(0, line.end_measure, 200))
+            values = rng.integers(0, 3, 199).tolist()
+            tables.append(EventTable(name, boundaries[:-1], boundaries[1:], values))
+
+        sections = overlay(line, tables)
+        middle = np.array([(section.from_measure + section.to_measure) / 2 for section in sections])
+        for column, table in enumerate(tables):
+            codes = table.codes(middle)
+            expected = [None if code < 0 else table.unique_values[code] for code in codes]
+            assert [section.attributes[column] for section in sections] == expected
+        # neighbours differ in at least one table
+        assert all(a.attributes != b.attributes for a, b in zip(sections[:-1], sections[1:]))
+        assert sections[0].from_measure == line.start_measure and sections[-1].to_measure == line.end_measure
+
+    def test_not_monotonic(self):
+        line = MeasureLineString([[0, 0, 0], [0, 10, 100], [0, 20, 50]], m_given=True)
+        with pytest.raises(ValueError):
+            overlay(line, [EventTable("a", [0], [10], [1])])
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from shapelyM.helpers import (
+    LEFT_RIGHT_CODES,
+    LeftRightOnLineEnum,
+    MinimalPoint,
+    determinate_left_right_on_line,
+    determinate_left_right_on_segment,
+    determinate_left_right_on_segments,
+)
+from shapelyM.linear_reference import (
+    FUNCTIONAL_DIRECTION_CODES,
+    FunctionalDirection,
+    get_functional_direction,
+    get_functional_directions,
+)
+
+start, end = MinimalPoint(0, 0), MinimalPoint(0, 10)
+
+
+@pytest.mark.parametrize(
+    "point, distance, sign, expected",
+    [
+        (MinimalPoint(-1, 5), 1, 1, LeftRightOnLineEnum.left),
+        (MinimalPoint(1, 5), 1, 1, LeftRightOnLineEnum.right),
+        (MinimalPoint(1, 5), 1, -1, LeftRightOnLineEnum.left),
+        (MinimalPoint(0.1, 5), 0.1, 1, LeftRightOnLineEnum.on),
+        (MinimalPoint(0, 15), 5, 1, LeftRightOnLineEnum.on),
+    ],
+)
+def test_left_right_on_segment(point, distance, sign, expected):
+    assert determinate_left_right_on_segment(start, end, point, distance, sign) == expected
+    code = determinate_left_right_on_segments(
+        np.array([[start.x, start.y]]),
+        np.array([[end.x, end.y]]),
+        np.array([[point.x, point.y]]),
+        np.array([distance]),
+        np.array([sign]),
+    )[0]
+    assert LEFT_RIGHT_CODES[code] == expected
+
+
+@pytest.mark.parametrize(
+    "point, azimuth, expected",
+    [
+        (MinimalPoint(-1, 5), 0, LeftRightOnLineEnum.left),
+        (MinimalPoint(1, 5), 0, LeftRightOnLineEnum.right),
+        (MinimalPoint(-1, 5), 180, LeftRightOnLineEnum.right),
+        (MinimalPoint(-1, 5), -180, LeftRightOnLineEnum.right),
+        (MinimalPoint(0.1, 5), 0, LeftRightOnLineEnum.on),
+    ],
+)
+def test_left_right_on_line(point, azimuth, expected):
+    from shapely.geometry import LineString
+
+    line = LineString([[start.x, start.y], [end.x, end.y]])
+    assert determinate_left_right_on_line(point, azimuth, line) == expected
+
+
+@pytest.mark.parametrize(
+    "point, azimuth, expected",
+    [
+        # north along the first segment
+        ((-1, 5), 0, LeftRightOnLineEnum.left),
+        ((1, 5), 0, LeftRightOnLineEnum.right),
+        # east and west along the second segment
+        ((5, 11), 90, LeftRightOnLineEnum.left),
+        ((5, 9), 90, LeftRightOnLineEnum.right),
+        ((5, 11), 270, LeftRightOnLineEnum.right),
+        ((5, 11), -90, LeftRightOnLineEnum.right),
+        ((5, 9), 450, LeftRightOnLineEnum.right),
+        # before the start and after the end of the line
+        ((-0.5, -1), 0, LeftRightOnLineEnum.left),
+        ((11, 10.5), 90, LeftRightOnLineEnum.left),
+        ((11, 9.5), 90, LeftRightOnLineEnum.right),
+        # within projection distance
+        ((0.1, 5), 0, LeftRightOnLineEnum.on),
+        ((5, 10.1), 90, LeftRightOnLineEnum.on),
+    ],
+)
+def test_left_right_on_bent_line(point, azimuth, expected):
+    from shapely.geometry import LineString, Point
+
+    line = LineString([[0, 0], [0, 10], [10, 10]])
+    assert determinate_left_right_on_line(Point(*point), azimuth, line) == expected
+
+
+@pytest.mark.parametrize(
+    "azimuth, expected",
+    [
+        (None, FunctionalDirection.unknown),
+        (0, FunctionalDirection.downstream),
+        (80, FunctionalDirection.downstream),
+        (100, FunctionalDirection.upstream),
+        (180, FunctionalDirection.upstream),
+    ],
+)
+def test_functional_direction(azimuth, expected):
+    assert get_functional_direction(start, end, azimuth)[0] == expected
+    codes, _ = get_functional_directions(
+        np.array([[start.x, start.y]]),
+        np.array([[end.x, end.y]]),
+        np.array([np.nan if azimuth is None else azimuth]),
+    )
+    assert FUNCTIONAL_DIRECTION_CODES[codes[0]] == expected
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from shapelyM import instrumentation
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.measurePoint import MeasurePoint
+
+
+@pytest.fixture
+def line():
+    return MeasureLineString([[0, 0, 0], [0, 10, 0], [10, 10, 0]])
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_records_nothing(line):
+    instrumentation.disable()
+    line.project(MeasurePoint(1, 5))
+    line.project_many(np.array([[1, 5], [9, 11]]))
+    snapshot = instrumentation.snapshot()
+    assert snapshot.stages == {}
+    assert snapshot.counters == {}
+
+
+def test_project_stages(line):
+    instrumentation.enable()
+    line.project(MeasurePoint(1, 5), azimuth=0)
+    stages = instrumentation.snapshot().stages
+    for stage in ("project", "nearest_segment", "point_on_line", "side_of_line", "functional_direction"):
+        assert stages[stage].calls == 1
+        assert stages[stage].seconds >= 0
+    assert stages["project"].seconds >= stages["nearest_segment"].seconds
+    assert stages["project"].max_seconds == stages["project"].mean_seconds
+
+
+def test_project_many_stages_and_counters(line):
+    instrumentation.enable()
+    line.project_many(np.array([[1, 5], [9, 11], [5, 5]]))
+    snapshot = instrumentation.snapshot()
+    assert {"project_many", "nearest_segments", "projection_batch"} <= set(snapshot.stages)
+    assert snapshot.counters["points_projected"] == 3
+    assert snapshot.counters.get("index_rings", 0) + snapshot.counters.get("index_brute_force_points", 0) >= 3
+
+
+def test_hooks(line):
+    calls = []
+
+    def hook(stage, seconds):
+        calls.append((stage, seconds))
+
+    instrumentation.enable()
+    instrumentation.add_hook(hook)
+    try:
+        line.project(MeasurePoint(1, 5))
+    finally:
+        instrumentation.remove_hook(hook)
+    assert "project" in [stage for stage, _ in calls]
+    assert all(seconds >= 0 for _, seconds in calls)
+
+    calls.clear()
+    line.project(MeasurePoint(1, 5))
+    assert calls == []
+
+
+def test_reset(line):
+    instrumentation.enable()
+    line.project(MeasurePoint(1, 5))
+    assert instrumentation.is_enabled()
+    instrumentation.reset()
+    snapshot = instrumentation.snapshot()
+    assert snapshot.stages == {}
+    assert snapshot.counters == {}
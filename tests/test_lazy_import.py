@@ -0,0 +1,54 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+import shapelyM
+
+
+def heavy_modules_after(code: str) -> list:
+    """Returns the heavy modules imported after running code in a fresh interpreter."""
+    check = "import sys, json; print(json.dumps([m for m in ('numpy', 'shapely') if m in sys.modules]))"
+    result = subprocess.run(
+        [sys.executable, "-c", f"{code}\n{check}"], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+@pytest.mark.parametrize(
+    "code, expected",
+    [
+        ("import shapelyM", []),
+        ("from shapelyM import MeasurePoint; MeasurePoint(1, 2).distance(MeasurePoint(4, 6))", []),
+        ("from shapelyM import instrumentation", []),
+        (
+            "from shapelyM import MeasureLineString\n"
+            "line = MeasureLineString([[0, 0, 0], [0, 10, 1], [10, 10, 2]])\n"
+            "line.project(line.locate(3)); line.cut_profile(1, 5); line.project_many([[1, 1]])",
+            ["numpy"],
+        ),
+        (
+            "from shapelyM import MeasureLineString\nMeasureLineString([[0, 0], [0, 10]]).shapely",
+            ["numpy", "shapely"],
+        ),
+    ],
+)
+def test_heavy_modules_imported_lazily(code, expected):
+    assert heavy_modules_after(code) == expected
+
+
+def test_lazy_attributes():
+    from shapelyM.measureLineString import MeasureLineString
+
+    assert shapelyM.MeasureLineString is MeasureLineString
+    assert set(shapelyM.__all__) <= set(dir(shapelyM))
+    with pytest.raises(AttributeError):
+        shapelyM.does_not_exist
+
+
+def test_project_shapely_point():
+    from shapely.geometry import Point
+
+    line = shapelyM.MeasureLineString([[0, 0], [0, 10]])
+    assert line.project(Point(1, 5)).distance_along_line == 5
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from shapely.geometry import Point
+
+from shapelyM.lineTracker import LineTracker
+from shapelyM.measureLineString import MeasureLineString
+
+
+class TestLineTracker:
+    @pytest.fixture
+    def curved_line(self):
+        x = np.linspace(0, 2000, 2001)
+        return MeasureLineString(np.column_stack([x, 50 * np.sin(x / 100), x / 100]))
+
+    @pytest.fixture
+    def trajectory(self, curved_line):
+        rng = np.random.default_rng(4)
+        measures = np.sort(rng.uniform(0, curved_line.end_measure, 1500))
+        return curved_line.locate_many(measures)[:, :2] + rng.normal(0, 1, (1500, 2))
+
+    def test_track_same_as_project_many(self, curved_line, trajectory):
+        tracker = LineTracker(curved_line)
+        batch = tracker.track(trajectory, azimuth=90)
+        expected = curved_line.project_many(trajectory, azimuth=90)
+        assert tracker.global_searches == 1
+        assert np.array_equal(batch.segment_index, expected.segment_index)
+        assert np.allclose(batch.distance_along_line, expected.distance_along_line)
+        assert batch.side_of_line.tolist() == expected.side_of_line.tolist()
+
+    def test_project_same_as_line(self, curved_line, trajectory):
+        tracker = LineTracker(curved_line)
+        for x, y in trajectory[:200].tolist():
+            assert tracker.project(Point(x, y)) == curved_line.project(Point(x, y))
+        assert tracker.global_searches == 1
+
+    def test_shares_vertices(self, curved_line, trajectory):
+        # the tracker reads the vertices of the line, also a read only line like one loaded from a file
+        xy = curved_line.xy.copy()
+        xy.flags.writeable = False
+        line = MeasureLineString.from_arrays(xy, curved_line.z, curved_line.m)
+        tracker = LineTracker(line)
+        assert tracker._xy.obj is xy
+        assert np.array_equal(
+            tracker.track(trajectory[:100]).segment_index, line.project_many(trajectory[:100]).segment_index
+        )
+
+    def test_jump_and_reset(self, curved_line):
+        tracker = LineTracker(curved_line, max_distance=10)
+        tracker.project(Point(10, 5))
+        assert tracker.project(Point(1500, 0)).distance_along_line == pytest.approx(
+            curved_line.project(Point(1500, 0)).distance_along_line
+        )
+        assert tracker.global_searches == 2
+        tracker.reset()
+        tracker.project(Point(1500, 0))
+        assert tracker.global_searches == 3
+
+    def test_stays_on_followed_part(self):
+        # hairpin, the way back passes at 4 meter
+        line = MeasureLineString([[0, 0], [100, 0], [100, 4], [0, 4]])
+        tracker = LineTracker(line, window=1)
+        batch = tracker.track(np.array([[10, 0], [50, 1], [90, 2.5]]))
+        assert batch.distance_along_line.tolist() == [10, 50, 90]
+        assert line.project(Point(90, 2.5)).distance_along_line == 114
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from shapely.geometry import Point
+
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.measureNetwork import MeasureNetwork
+
+
+class TestMeasureNetwork:
+    @pytest.fixture
+    def grid_network(self):
+        network = MeasureNetwork(search_radius=5, k=2)
+        for idx in range(50):
+            network.add(MeasureLineString([[0, idx * 10], [500, idx * 10]]), key=f"h{idx}")
+            network.add(MeasureLineString([[idx * 10 + 5, 0], [idx * 10 + 5, 500]]), key=f"v{idx}")
+        return network
+
+    def test_same_as_brute_force(self, grid_network):
+        rng = np.random.default_rng(3)
+        points = rng.uniform(-10, 510, (300, 2))
+        batch = grid_network.project_many(points, k=1, search_radius=20)
+
+        distances = np.array(
+            [grid_network[key].project_many(points).distance_to_line_2d for key in grid_network]
+        )
+        nearest = distances.min(axis=0)
+        assert np.array_equal(batch.point_index, np.flatnonzero(nearest <= 20))
+        assert np.allclose(batch.projection.distance_to_line_2d, nearest[nearest <= 20])
+
+    def test_k_and_rank(self, grid_network):
+        batch = grid_network.project_many(np.array([[7, 11], [1000, 1000]]))
+        assert batch.point_index.tolist() == [0, 0]
+        assert batch.rank.tolist() == [0, 1]
+        assert batch.line_key.tolist() == ["h1", "v0"]
+        assert batch.projection.distance_along_line.tolist() == [7, 11]
+
+    def test_project(self, grid_network):
+        result = grid_network.project(Point(7, 11), k=1)
+        assert len(result) == 1
+        assert result[0].key == "h1"
+        assert result[0].line is grid_network["h1"]
+        assert result[0].projection.distance_to_line_2d == pytest.approx(1)
+        assert grid_network.project(Point(7, 11), search_radius=0.5) == []
+
+    def test_add_updates_index(self):
+        network = MeasureNetwork(search_radius=1)
+        assert network.project(Point(0, 0)) == []
+        assert network.add(MeasureLineString([[-5, 0], [5, 0]])) == 0
+        cells = dict((cell, list(lines)) for cell, lines in network._cells.items())
+
+        network.add(MeasureLineString([[100, 0], [100, 10]]))
+        assert all(network._cells[cell] == lines for cell, lines in cells.items())
+        assert network.project(Point(100.5, 5))[0].key == 1
+        assert network.project(Point(0, 0.5))[0].key == 0
+        assert len(network) == 2
+
+        with pytest.raises(ValueError):
+            network.add(MeasureLineString([[0, 0], [1, 0]]), key=1)
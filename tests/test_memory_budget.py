@@ -0,0 +1,38 @@
+import sys
+from dataclasses import FrozenInstanceError, fields
+
+import pytest
+
+from shapelyM.helpers import LeftRightOnLineEnum, MinimalPoint
+from shapelyM.linear_reference import FunctionalDirection, LineProjection
+from shapelyM.measureLineString import DistancePoint
+from shapelyM.measurePoint import MeasurePoint
+
+point = MeasurePoint(1, 2, 3, 4)
+
+
+@pytest.mark.parametrize(
+    "instance, budget",
+    [
+        (point, 64),
+        (MinimalPoint(1.0, 2.0, 3.0), 56),
+        (
+            LineProjection(
+                point, 0.0, FunctionalDirection.unknown, LeftRightOnLineEnum.on, point, 0.0, 0.0, 0.0
+            ),
+            96,
+        ),
+        (DistancePoint(0, point, 0.0), 56),
+    ],
+)
+def test_memory_budget(instance, budget):
+    assert not hasattr(instance, "__dict__")
+    assert sys.getsizeof(instance) <= budget
+    with pytest.raises(FrozenInstanceError):
+        setattr(instance, fields(instance)[0].name, 1)
+
+
+def test_measure_point_floats():
+    assert type(point.x) is float and type(point.y) is float
+    assert point == MeasurePoint(1.0, 2.0, 3, 4)
+    assert hash(point) == hash(MeasurePoint(1.0, 2.0, 3, 4))
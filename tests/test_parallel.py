@@ -0,0 +1,119 @@
+import threading
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pytest
+
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.parallel import ParallelProjector, ThreadProjector
+
+
+@pytest.fixture
+def line():
+    rng = np.random.default_rng(5)
+    return MeasureLineString(np.cumsum(rng.normal(0, 1, (500, 3)), axis=0))
+
+
+class TestParallelProjector:
+    @pytest.mark.parametrize("mp_context", [None, "spawn"])
+    def test_same_as_project_many(self, line, mp_context):
+        rng = np.random.default_rng(6)
+        points = line.xy[rng.integers(0, 500, 1001)] + rng.normal(0, 2, (1001, 2))
+        z = rng.normal(0, 5, 1001)
+        azimuth = rng.uniform(0, 360, 1001)
+        expected = line.project_many(points, z=z, azimuth=azimuth)
+
+        with ParallelProjector(line, workers=2, chunk_size=100, mp_context=mp_context) as projector:
+            batch = projector.project_many(points, z=z, azimuth=azimuth)
+            assert len(projector.project_many(np.empty((0, 2)))) == 0
+
+        assert np.array_equal(batch.point_on_line, expected.point_on_line)
+        assert np.array_equal(batch.distance_to_line_3d, expected.distance_to_line_3d)
+        assert np.array_equal(batch.segment_index, expected.segment_index)
+        assert batch.side_of_line.tolist() == expected.side_of_line.tolist()
+        assert batch.functional_direction.tolist() == expected.functional_direction.tolist()
+
+    def test_close(self, line):
+        projector = ParallelProjector(line, workers=1)
+        name = projector._memory.name
+        projector.close()
+        with pytest.raises(RuntimeError):
+            projector.project_many(np.zeros((1, 2)))
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=name)
+
+    def test_bad_input(self, line):
+        with pytest.raises(ValueError):
+            ParallelProjector(line, chunk_size=0)
+
+
+class TestThreadProjector:
+    def test_same_as_project_many(self, line):
+        rng = np.random.default_rng(6)
+        points = line.xy[rng.integers(0, 500, 1001)] + rng.normal(0, 2, (1001, 2))
+        azimuth = rng.uniform(0, 360, 1001)
+        expected = line.project_many(points, azimuth=azimuth)
+
+        with ThreadProjector(line, workers=4, chunk_size=100) as projector:
+            assert line._spatial_index is not None
+            batch = projector.project_many(points, azimuth=azimuth)
+            assert len(projector.project_many(np.empty((0, 2)))) == 0
+
+        assert np.array_equal(batch.point_on_line, expected.point_on_line)
+        assert np.array_equal(batch.distance_along_line, expected.distance_along_line)
+        assert batch.side_of_line.tolist() == expected.side_of_line.tolist()
+        with pytest.raises(RuntimeError):
+            projector.project_many(points)
+
+    def test_bad_input(self, line):
+        with pytest.raises(ValueError):
+            ThreadProjector(line, chunk_size=0)
+        with ThreadProjector(line, workers=1) as projector, pytest.raises(ValueError):
+            projector.project_many(np.zeros((2, 4)))
+
+
+def test_line_thread_safety():
+    """Threads projecting on and cutting a line that is not prepared get the same results as one thread."""
+    rng = np.random.default_rng(9)
+    coordinates = np.column_stack([np.cumsum(rng.uniform(0, 10, (2000, 2)), axis=0), rng.normal(0, 1, 2000)])
+    points = coordinates[rng.integers(0, 2000, 2000), :2] + rng.normal(0, 500, (2000, 2))
+    measures = rng.uniform(0, 20000, 50)
+
+    def work(line):
+        batch = line.project_many(points)
+        cuts = [line.cut(measure) for measure in measures]
+        return batch.distance_along_line, [None if cut.result is None else cut.result.xy for cut in cuts]
+
+    expected = work(MeasureLineString(coordinates))
+
+    shared = MeasureLineString(coordinates)
+    barrier = threading.Barrier(8)
+    results = [None] * 8
+
+    def run(index):
+        barrier.wait()
+        results[index] = work(shared)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for distance, cuts in results:
+        assert np.array_equal(distance, expected[0])
+        assert all((a is None and b is None) or np.array_equal(a, b) for a, b in zip(cuts, expected[1]))
+
+
+def test_calibrated_line():
+    line = MeasureLineString([[0, 0, 0], [0, 10, 100], [0, 20, 150]], m_given=True)
+    points = np.array([[1, 5], [1, 15]])
+    with ParallelProjector(line, workers=1) as projector:
+        assert projector.project_many(points).distance_along_line.tolist() == [50, 125]
+
+
+def test_from_arrays_shares_memory():
+    xy = np.array([[0.0, 0.0], [3.0, 4.0]])
+    line = MeasureLineString.from_arrays(xy)
+    assert line.xy is xy
+    assert line.end_measure == 5
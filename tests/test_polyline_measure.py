@@ -1,8 +1,16 @@
 from __future__ import annotations
 
+import numpy as np
+import pytest
 from shapely.geometry import Point
 
-from shapelyM.measureLineString import CutProfileStatus, MeasureLineString
+from shapelyM.helpers import MinimalPoint, get_z_between_points
+from shapelyM.measureLineString import (
+    CutProfileStatus,
+    MeasureLineString,
+    MeasureLineStringView,
+)
+from shapelyM.measurePoint import MeasurePoint
 
 # import json
 
@@ -88,6 +96,8 @@ def test_3d_line_cut():
 
     assert line.length_2d == 30
     assert line.shapely.length == line.length_2d
+    assert line.shapely.has_z
+    assert not MeasureLineString([[0, 0], [0, 10]]).shapely.has_z
     assert line.length_3d == 85.95241580617241
     assert line.end_measure == line.length_3d
 
@@ -139,10 +149,7 @@ def test_2d_line_m_cut():
     assert line.length_3d is None
     assert line.end_measure == 300
 
-    try:
-        line.project(Point(0, 0))
-    except NotImplementedError:
-        assert True
+    assert line.project(Point(0, 5)).distance_along_line == 50
 
     line_cut = line.cut(-1)
     assert line_cut.status == CutProfileStatus.undershoot
@@ -173,10 +180,9 @@ def test_3d_line_m_cut():
     assert line.length_3d == 85.95241580617241
     assert line.end_measure == 300
 
-    try:
-        line.project(Point(0, 0))
-    except NotImplementedError:
-        assert True
+    projection = line.project(MeasurePoint(0, 15, 30))
+    assert projection.distance_along_line == 150
+    assert projection.point_on_line.z == 30
 
     line_cut = line.cut(-1)
     assert line_cut.status == CutProfileStatus.undershoot
@@ -220,3 +226,218 @@ def test_3d_line_m_cut():
 #             end = line.end_measure * 0.8
 #         profile_cut = line.cut_profile(start, end)
 #         acad.DrawShapelyObject(profile_cut.shapely, color=3)
+
+
+def test_line_arrays():
+    coordinates = [[3, 0, 0], [3, 10, 20], [3, 20, 40], [3, 30, 80]]
+    line = MeasureLineString(coordinates)
+    # the input list is not kept alive by the line
+    assert all(value is not coordinates for value in vars(line).values())
+    assert line.xy.dtype == line.z.dtype == line.m.dtype == np.float64
+    assert line.xy.flags.c_contiguous
+    assert line.xy.tolist() == [[3, 0], [3, 10], [3, 20], [3, 30]]
+    assert line.z.tolist() == [0, 20, 40, 80]
+    assert line.m[-1] == line.length_3d
+    assert line._line_measure_points is None
+    assert line.line_measure_points[1].m == line.m[1]
+
+    line = MeasureLineString(np.array([[3, 0, np.nan, 0], [3, 10, np.nan, 100]]), m_given=True)
+    assert line.z is None
+    assert line.m.tolist() == [0, 100]
+
+
+@pytest.mark.parametrize("index", [True, False])
+@pytest.mark.parametrize("coordinates", [[[0, 0, 0], [0, 10, 100], [0, 20, 150]], [[0, 0], [3, 4], [6, 8]]])
+def test_array_state_shares_arrays(coordinates, index):
+    # storage and parallel rebuild a line on these arrays without computing or copying them again
+    line = MeasureLineString(coordinates)
+    settings, arrays = line._array_state(index)
+    rebuilt = MeasureLineString._from_array_state(settings, arrays)
+    assert rebuilt.xy is arrays["xy"] and rebuilt.m is arrays["m"]
+    assert rebuilt._cumulative_2d is arrays["cumulative_2d"]
+    assert rebuilt._cumulative_3d is arrays.get("cumulative_3d")
+    assert (rebuilt.length_2d, rebuilt.length_3d) == (line.length_2d, line.length_3d)
+    if not index:
+        assert rebuilt._spatial_index is None
+        return
+
+    assert rebuilt._spatial_index.cell_items is arrays["cell_items"]
+    del arrays["cell_keys"]
+    with pytest.raises(ValueError, match="cell_keys"):
+        MeasureLineString._from_array_state(settings, arrays)
+
+
+def test_line_lazy_shapely():
+    line = MeasureLineString([[3, 0, 0], [3, 10, 20], [3, 20, 40], [3, 30, 80]])
+    assert line._shapely is None
+    assert line.shapely.length == line.length_2d
+    assert line.shapely.has_z
+    assert not MeasureLineString([[0, 0], [0, 10]]).shapely.has_z
+    assert line.shapely is line.shapely
+    assert line.shapely.has_z
+    assert not MeasureLineString([[0, 0], [0, 10]]).shapely.has_z
+
+
+def test_locate():
+    line = MeasureLineString(
+        [[3, 0, 0, 0], [3, 10, 20, 100], [3, 20, 40, 200], [3, 30, 80, 300]], m_given=True
+    )
+    point = line.locate(150)
+    assert point.coordinate_list() == [3, 15, 30]
+    assert point.m == 150
+    assert line.locate(300).coordinate_list() == [3, 30, 80]
+
+    with pytest.raises(ValueError):
+        line.locate(301)
+
+    located = line.locate_many(np.array([0, 100, 250, -1]))
+    assert located[:3].tolist() == [[3, 0, 0], [3, 10, 20], [3, 25, 60]]
+    assert np.isnan(located[3]).all()
+
+    line = MeasureLineString([[3, 0], [3, 10], [3, 20], [3, 30]])
+    assert line.locate(5).z is None
+    assert np.isnan(line.locate_many(np.array([5]))[0, 2])
+
+
+def test_stations():
+    line = MeasureLineString(
+        [[3, 0, 0, 0], [3, 10, 20, 100], [3, 20, 40, 200], [3, 30, 80, 300]], m_given=True
+    )
+    stations, segment_index = line.stations(100)
+    assert stations.tolist() == [[3, 0, 0, 0], [3, 10, 20, 100], [3, 20, 40, 200], [3, 30, 80, 300]]
+    assert segment_index.tolist() == [0, 1, 2, 2]
+
+    stations, segment_index = line.stations(30, start=40, end=500)
+    assert stations[:, 3].tolist() == [60, 90, 120, 150, 180, 210, 240, 270, 300]
+    assert segment_index.tolist() == [0, 0, 1, 1, 1, 2, 2, 2, 2]
+    # z interpolated like get_z_between_points
+    for (x, y, z, m), index in zip(stations, segment_index):
+        start, end = line.line_measure_points[index], line.line_measure_points[index + 1]
+        assert z == pytest.approx(get_z_between_points(start, end, MinimalPoint(x, y)))
+    assert np.allclose(stations[:, :3], line.locate_many(stations[:, 3]))
+
+    assert line.stations(100, start=310)[0].shape == (0, 4)
+    with pytest.raises(ValueError):
+        line.stations(0)
+
+
+def test_stations_rounding():
+    line = MeasureLineString([[0, 0], [0.3, 0]])
+    stations, _ = line.stations(0.1)
+    assert len(stations) == 4
+    assert stations[-1].tolist()[:2] == [0.3, 0]
+    assert np.isnan(stations[:, 2]).all()
+
+    line = MeasureLineString(np.column_stack([np.arange(1001.0), np.zeros(1001)]))
+    assert len(line.stations(1)[0]) == 1001
+    assert len(line.stations(1, start=0.5, end=10.5)[0]) == 10
+
+
+def test_cut_on_vertex_keeps_measures():
+    line = MeasureLineString([[3, 0], [3, 10], [3, 20], [3, 30]])
+    line_cut = line.cut(10)
+    assert line_cut.result.end_measure == 10
+    assert line_cut.post_cut.start_measure == 10
+
+    line_profile = line.cut_profile(10, 20)
+    assert line_profile.result.coordinate_list() == [[3, 10, None], [3, 20, None]]
+
+
+def test_cut_profiles_same_as_cut_profile():
+    line = MeasureLineString([[3, 0, 0], [3, 10, 20], [3, 20, 40], [3, 30, 80]])
+    from_measures = [33, -5, 5, -1, 1, 90, 22.360679774997898, 50]
+    to_measures = [40, -1, 10, 31, 100, 95, 44.721359549995796, 85]
+    profiles = line.cut_profiles(from_measures, to_measures)
+    assert len(profiles) == len(from_measures)
+
+    for profile, from_measure, to_measure in zip(profiles, from_measures, to_measures):
+        expected = line.cut_profile(from_measure, to_measure)
+        assert profile.status == expected.status
+        for part in ["pre_cut", "result", "post_cut"]:
+            if getattr(expected, part) is None:
+                assert getattr(profile, part) is None
+            else:
+                assert getattr(profile, part).coordinate_list() == getattr(expected, part).coordinate_list()
+                assert getattr(profile, part).m.tolist() == getattr(expected, part).m.tolist()
+
+    with pytest.raises(ValueError):
+        line.cut_profiles([1, 5], [2, 4])
+
+
+@pytest.mark.parametrize(
+    "from_measure, to_measure",
+    [(float("nan"), 5), (1, float("nan")), (float("-inf"), 5), (1, float("inf"))],
+)
+def test_cut_profile_not_finite(from_measure, to_measure):
+    line = MeasureLineString([[3, 0], [3, 10], [3, 20], [3, 30]])
+    with pytest.raises(ValueError, match="finite"):
+        line.cut_profile(from_measure, to_measure)
+    with pytest.raises(ValueError, match="finite"):
+        line.cut_profiles([1, from_measure], [2, to_measure])
+
+
+def test_split_every():
+    line = MeasureLineString([[3, 0], [3, 10], [3, 20], [3, 30]])
+    parts = line.split_every(7)
+    assert [part.start_measure for part in parts] == [0, 7, 14, 21, 28]
+    assert [part.end_measure for part in parts] == [7, 14, 21, 28, 30]
+    assert parts[1].coordinate_list() == [[3, 7, None], [3, 10, None], [3, 14, None]]
+
+    assert len(line.split_every(10)) == 3
+    assert line.split_every(50)[0] is line
+
+    with pytest.raises(ValueError):
+        line.split_every(0)
+
+
+def test_cut_results_are_views():
+    line = MeasureLineString([[3, 0, 0], [3, 10, 20], [3, 20, 40], [3, 30, 80]])
+    profile = line.cut_profile(5, 25)
+    result = profile.result
+    assert isinstance(result, MeasureLineStringView)
+    assert result.parent is line
+    assert result.start_measure == 5
+    assert result.end_measure == 25
+    assert result.length_3d == pytest.approx(20)
+    assert result.length_2d == pytest.approx(line.locate(25).y - line.locate(5).y)
+    assert result.start_point.tolist() == [3, *line.locate_many(np.array([5]))[0, 1:].tolist(), 5]
+    assert len(result.coordinate_list()) == 3
+    assert result._line is None
+
+    assert result.shapely.length == pytest.approx(result.length_2d)
+    assert isinstance(result._line, MeasureLineString)
+    assert result.line_measure_points[1].m == line.m[1]
+
+
+@pytest.mark.parametrize(
+    "line_data",
+    [
+        [[3, 0, 0], [3, 10, 100], [3, 20, 150], [3, 20, 150], [13, 20, 400]],
+        [[3, 0, 0, 0], [3, 10, 20, 100], [3, 20, 40, 200], [3, 30, 80, 300]],
+    ],
+)
+def test_project_calibrated(line_data):
+    line = MeasureLineString(line_data, m_given=True)
+    rng = np.random.default_rng(9)
+    points = rng.uniform(-5, 35, (200, 3))
+    batch = line.project_many(points)
+    for idx, point in enumerate(points):
+        expected = line.project(MeasurePoint(*point))
+        assert batch.distance_along_line[idx] == pytest.approx(expected.distance_along_line)
+        assert batch.point_on_line[idx, 3] == pytest.approx(expected.point_on_line.m)
+
+    # measure back to the same point
+    located = line.locate_many(batch.distance_along_line)
+    assert np.allclose(located[:, :2], batch.point_on_line[:, :2])
+
+
+def test_non_monotonic_calibration():
+    line = MeasureLineString([[0, 0, 0], [0, 10, 100], [0, 20, 90], [0, 30, 200]], m_given=True)
+    assert line.is_monotonic is False
+    assert line.non_monotonic_segments().tolist() == [1]
+    assert line.measure_scale.tolist() == [10, -1, 11]
+    assert line.project(Point(1, 15)).distance_along_line == 95
+    with pytest.raises(ValueError):
+        line.locate(50)
+
+    assert MeasureLineString([[0, 0], [0, 10]]).is_monotonic is True
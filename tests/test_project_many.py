@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from shapelyM.helpers import LeftRightOnLineEnum
+from shapelyM.linear_reference import FunctionalDirection, ProjectionBatch
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.measurePoint import MeasurePoint
+
+
+class TestProjectMany:
+    @pytest.fixture
+    def simple_2d_line(self):
+        line_data = [[3, 0], [3, 10], [3, 20], [3, 30]]
+        return MeasureLineString(line_data)
+
+    @pytest.fixture
+    def simple_3d_line_z_increase(self):
+        line_data = [[3, 0, 0], [3, 10, 10], [3, 20, 20], [3, 30, 30]]
+        return MeasureLineString(line_data)
+
+    @pytest.fixture
+    def reversed_2d_line(self):
+        line_data = [[0, 30], [0, 20], [0, 10]]
+        return MeasureLineString(line_data)
+
+    @pytest.fixture
+    def random_points(self):
+        rng = np.random.default_rng(42)
+        points = rng.uniform(-5, 35, (250, 3))
+        azimuths = rng.uniform(0, 360, 250)
+        azimuths[::2] = np.nan
+        return points, azimuths
+
+    @pytest.mark.parametrize(
+        "line_fixture", ["simple_2d_line", "simple_3d_line_z_increase", "reversed_2d_line"]
+    )
+    def test_same_as_project(self, request, line_fixture, random_points):
+        line = request.getfixturevalue(line_fixture)
+        points, azimuths = random_points
+        batch = line.project_many(points, azimuth=azimuths)
+        assert len(batch) == len(points)
+
+        for idx, point in enumerate(points):
+            azimuth = None if np.isnan(azimuths[idx]) else azimuths[idx]
+            expected = line.project(MeasurePoint(*point), azimuth=azimuth)
+            tester = batch[idx]
+            assert tester.distance_along_line == pytest.approx(expected.distance_along_line)
+            assert tester.distance_to_line_2d == pytest.approx(expected.distance_to_line_2d)
+            assert tester.point_on_line.x == pytest.approx(expected.point_on_line.x)
+            assert tester.point_on_line.y == pytest.approx(expected.point_on_line.y)
+            assert tester.side_of_line == expected.side_of_line
+            assert tester.functional_direction == expected.functional_direction
+            for name in ("x", "y", "z", "m"):
+                assert type(getattr(tester.point_on_line, name)) is type(
+                    getattr(expected.point_on_line, name)
+                )
+            if expected.distance_to_line_3d is not None:
+                assert tester.point_on_line.z == pytest.approx(expected.point_on_line.z)
+                assert tester.distance_to_line_3d == pytest.approx(expected.distance_to_line_3d)
+
+    def test_2d_points(self, simple_3d_line_z_increase):
+        batch = simple_3d_line_z_increase.project_many(np.array([[0, 5], [0, 15]]))
+        assert batch.point_on_line[:, 2].tolist() == [5, 15]
+        assert np.isnan(batch.distance_to_line_3d).all()
+        assert batch[0].distance_to_line_3d is None
+        assert batch[0].point.z is None
+
+    def test_z_argument(self, simple_3d_line_z_increase):
+        batch = simple_3d_line_z_increase.project_many(np.array([[0, 5], [0, 15]]), z=np.array([1, 11]))
+        assert batch.distance_to_line_3d.tolist() == [5, 5]
+
+    def test_under_and_overshoot(self, simple_2d_line):
+        batch = simple_2d_line.project_many(np.array([[3, -5], [3, 35]]))
+        assert batch.distance_along_line.tolist() == [0, 30]
+        assert batch.point_on_line[:, :2].tolist() == [[3, 0], [3, 30]]
+
+    def test_side_and_direction(self, simple_2d_line):
+        batch = simple_2d_line.project_many(np.array([[6, 5], [0, 5], [3.1, 5]]), azimuth=180)
+        assert batch.functional_direction.tolist() == [FunctionalDirection.upstream] * 3
+        assert batch.side_of_line.tolist() == [
+            LeftRightOnLineEnum.left,
+            LeftRightOnLineEnum.right,
+            LeftRightOnLineEnum.on,
+        ]
+
+        batch = simple_2d_line.project_many(np.array([[6, 5], [0, 5]]))
+        assert batch.functional_direction.tolist() == [FunctionalDirection.unknown] * 2
+        assert batch.side_of_line.tolist() == [LeftRightOnLineEnum.right, LeftRightOnLineEnum.left]
+
+    def test_bad_shape(self, simple_2d_line):
+        with pytest.raises(ValueError):
+            simple_2d_line.project_many(np.array([1, 2, 3, 4]))
+
+
+class TestProjectionBatch:
+    @pytest.fixture
+    def batch(self):
+        line = MeasureLineString([[3, 0, 0], [3, 10, 10], [3, 20, 20]])
+        return line.project_many(np.array([[0, 5, 1], [6, 15, np.nan], [3, 25, 0]]), azimuth=[180, np.nan, 0])
+
+    def test_codes(self, batch):
+        assert batch.functional_direction_code.dtype == np.int8
+        assert batch.side_of_line_code.dtype == np.int8
+        assert batch.functional_direction.tolist() == [
+            FunctionalDirection.upstream,
+            FunctionalDirection.unknown,
+            FunctionalDirection.downstream,
+        ]
+
+    def test_iter(self, batch):
+        projections = list(batch)
+        assert len(projections) == 3
+        assert projections[1] == batch[1]
+        assert projections[0].side_of_line == LeftRightOnLineEnum.right
+
+    def test_structured(self, batch):
+        records = batch.to_structured()
+        assert records.dtype["side_of_line"] == np.int8
+        assert records["distance_along_line"].tolist() == batch.distance_along_line.tolist()
+        assert records["z_on_line"].tolist() == batch.point_on_line[:, 2].tolist()
+
+    def test_npz(self, batch, tmp_path):
+        batch.to_npz(tmp_path / "batch.npz", compressed=True)
+        loaded = ProjectionBatch.from_npz(tmp_path / "batch.npz")
+        assert list(loaded) == list(batch)
+
+    def test_empty(self):
+        assert len(ProjectionBatch.empty()) == 0
+        assert ProjectionBatch.empty().point.shape == (0, 3)
+
+    def test_arrow(self, batch, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        table = batch.to_arrow()
+        assert table.column("side_of_line").to_pylist() == [item.value for item in batch.side_of_line]
+        batch.to_parquet(tmp_path / "batch.parquet")
+        assert pq.read_table(tmp_path / "batch.parquet").num_rows == 3
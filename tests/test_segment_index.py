@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+from shapely.geometry import Point
+
+from shapelyM.helpers import LeftRightOnLineEnum, project_points_on_segments
+from shapelyM.lineTracker import LineTracker
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.segmentIndex import SegmentIndex
+
+
+class TestSegmentIndex:
+    @pytest.fixture
+    def random_walk(self):
+        rng = np.random.default_rng(7)
+        return np.cumsum(rng.normal(0, 1, (5000, 2)), axis=0)
+
+    def test_same_as_brute_force(self, random_walk):
+        rng = np.random.default_rng(8)
+        index = SegmentIndex(random_walk[:-1], random_walk[1:])
+        points = np.concatenate(
+            [
+                random_walk[rng.integers(0, len(random_walk), 500)] + rng.normal(0, 3, (500, 2)),
+                rng.uniform(-1000, 1000, (20, 2)),
+            ]
+        )
+
+        segment_index, fraction, distance_squared = index.nearest(points)
+        expected = project_points_on_segments(points, random_walk[:-1], random_walk[1:])
+        assert np.array_equal(segment_index, expected[0])
+        assert np.allclose(fraction, expected[1])
+        assert np.allclose(distance_squared, expected[2])
+
+    def test_registrations_linear(self, random_walk):
+        index = SegmentIndex(random_walk[:-1], random_walk[1:])
+        assert len(index.cell_items) <= index.max_cells_per_segment * len(index) + 16
+        assert len(index.cell_keys) <= len(index.cell_items)
+        assert np.all(np.diff(index.cell_keys) > 0)
+
+    @pytest.mark.parametrize(
+        "coordinates",
+        [
+            [[0, 0], [0, 10]],
+            [[0, 0], [0, 0], [0, 5]],
+            [[0, 0], [1000, 0], [1000, 0.001]],
+        ],
+    )
+    def test_degenerated_lines(self, coordinates):
+        line = np.array(coordinates, dtype=float)
+        index = SegmentIndex(line[:-1], line[1:])
+        points = np.array([[5, 5], [-5, -5], [500, 1]])
+        expected = project_points_on_segments(points, line[:-1], line[1:])
+        assert np.allclose(index.nearest(points)[2], expected[2])
+
+    def test_long_sparse_line(self):
+        # a long line in a large, mostly empty extent gets small cells, far points continue on coarser grids
+        angle = np.linspace(0, 6 * np.pi, 20000)
+        line = np.column_stack([angle * 1000 * np.cos(angle), angle * 1000 * np.sin(angle)])
+        index = SegmentIndex(line[:-1], line[1:])
+        assert index.cell_size < 10 * np.mean(np.abs(np.diff(line, axis=0)).max(axis=1))
+        assert len(index.cell_keys) < 4 * len(index)
+
+        rng = np.random.default_rng(9)
+        points = np.concatenate(
+            [
+                line[rng.integers(0, len(line), 300)] + rng.normal(0, scale, (300, 2))
+                for scale in (1, 100, 3000)
+            ]
+        )
+        segment_index, fraction, distance_squared = index.nearest(points)
+        expected = project_points_on_segments(points, line[:-1], line[1:])
+        assert np.array_equal(segment_index, expected[0])
+        assert np.allclose(distance_squared, expected[2])
+        assert index._coarse is not None
+
+    def test_pair_budget(self, random_walk):
+        # tiny chunks and candidate caps give the same result as brute force
+        rng = np.random.default_rng(10)
+        index = SegmentIndex(random_walk[:-1], random_walk[1:])
+        index.pair_budget, index.max_candidates = 64, 16
+        points = np.concatenate(
+            [
+                random_walk[rng.integers(0, len(random_walk), 200)] + rng.normal(0, 3, (200, 2)),
+                random_walk.mean(axis=0) + rng.normal(0, 5000, (50, 2)),
+            ]
+        )
+
+        segment_index, fraction, distance_squared = index.nearest(points)
+        expected = project_points_on_segments(points, random_walk[:-1], random_walk[1:])
+        assert np.array_equal(segment_index, expected[0])
+        assert np.allclose(fraction, expected[1])
+        assert np.allclose(distance_squared, expected[2])
+
+    def test_far_points_pruned(self):
+        # points far from a long line are checked against the cells of the pruning level, not all segments
+        angle = np.linspace(0, 6 * np.pi, 20000)
+        line = np.column_stack([angle * 1000 * np.cos(angle), angle * 1000 * np.sin(angle)])
+        index = SegmentIndex(line[:-1], line[1:])
+        level = index.pruning_level
+        assert level is not None and len(level.cell_keys) <= 4 * np.sqrt(len(index))
+
+        rng = np.random.default_rng(11)
+        angles = rng.uniform(0, 2 * np.pi, 200)
+        points = 100_000 * np.column_stack([np.cos(angles), np.sin(angles)])
+        segment_index, fraction, distance_squared = index.nearest(points)
+        expected = project_points_on_segments(points, line[:-1], line[1:])
+        assert np.array_equal(segment_index, expected[0])
+        assert np.allclose(distance_squared, expected[2])
+
+    @pytest.mark.parametrize(
+        "coordinates",
+        [[[0, 0], [0, 0], [0, 10]], [[0, 0], [0, 10], [0, 10], [10, 10]], [[0, 0], [0, 10], [0, 10]]],
+    )
+    def test_degenerate_segment_loses_tie(self, coordinates):
+        # a zero-length segment is as near as the segments at its vertex, the non-degenerate segment wins
+        line = np.array(coordinates, dtype=float)
+        points = np.array([[1, 0], [-1, 0], [1, 10], [-1, 11], [0, 11]])
+        expected = project_points_on_segments(points, line[:-1], line[1:])
+        degenerate = np.all(line[:-1] == line[1:], axis=1)
+        assert not degenerate[expected[0]].any()
+        assert np.array_equal(SegmentIndex(line[:-1], line[1:]).nearest(points)[0], expected[0])
+
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            SegmentIndex(np.empty((0, 2)), np.empty((0, 2)))
+
+
+def test_project_nearest_segment_not_next_to_closest_vertex():
+    # closest vertex is (0, 10), but the long last segment passes closer by
+    line = MeasureLineString([[0, 0], [0, 10], [100, 10], [100, 11], [0, 11]])
+    projection = line.project(Point(50, 10.9))
+    assert projection.distance_along_line == pytest.approx(161)
+    assert projection.distance_to_line_2d == pytest.approx(0.1)
+
+
+def test_project_outside_corner():
+    line = MeasureLineString([[0, 0], [0, 10], [10, 10]])
+    projection = line.project(Point(-1, 11))
+    assert projection.distance_along_line == 10
+    assert projection.point_on_line.coordinate_list() == [0, 10]
+
+
+def test_project_degenerate_first_segment():
+    line = MeasureLineString([[0, 0], [0, 0], [0, 10]])
+    for point, side in ((Point(1, 0), LeftRightOnLineEnum.right), (Point(-1, 0), LeftRightOnLineEnum.left)):
+        projection = line.project(point)
+        assert projection.side_of_line == side
+        assert projection.distance_to_line_2d == pytest.approx(1)
+        assert line.project_many(np.array([[point.x, point.y]])).side_of_line[0] == side
+
+    tracker = LineTracker(line)
+    tracker.project(Point(1, 5))
+    assert tracker.project(Point(1, 0)).side_of_line == LeftRightOnLineEnum.right
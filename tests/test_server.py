@@ -0,0 +1,229 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.server import MicroBatcher, ProjectionServer, batch_results
+
+COORDINATES = [[0, 0, 0], [0, 10, 1], [10, 10, 2], [10, 30, 3]]
+
+
+@pytest.fixture
+def line():
+    return MeasureLineString(COORDINATES)
+
+
+@pytest.fixture
+def requests():
+    rng = np.random.default_rng(4)
+    xyz = np.column_stack([rng.uniform(-2, 12, 40), rng.uniform(-2, 32, 40), np.full(40, np.nan)])
+    azimuth = rng.uniform(0, 360, 40)
+    return [(xyz[i : i + 4], azimuth[i : i + 4]) for i in range(0, 40, 4)]
+
+
+async def http(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = b"" if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode())
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    payload = json.loads(await reader.readexactly(length))
+    writer.close()
+    return status, payload
+
+
+class TestMicroBatcher:
+    def test_one_batch(self, line, requests):
+        async def run():
+            batcher = MicroBatcher(line, window=1.0, max_points=len(requests) * 4)
+            results = await asyncio.gather(*(batcher.project(xyz, azimuth) for xyz, azimuth in requests))
+            await batcher.close()
+            return batcher.stats, results
+
+        stats, results = asyncio.run(run())
+        assert (stats.requests, stats.points, stats.batches) == (10, 40, 1)
+        for (xyz, azimuth), result in zip(requests, results):
+            expected = line.project_many(xyz, azimuth=azimuth)
+            assert np.array_equal(result.distance_along_line, expected.distance_along_line)
+            assert list(result.side_of_line) == list(expected.side_of_line)
+
+    def test_max_points(self, line, requests):
+        async def run():
+            batcher = MicroBatcher(line, window=1.0, max_points=10)
+            await asyncio.gather(*(batcher.project(xyz, azimuth) for xyz, azimuth in requests))
+            await batcher.close()
+            return batcher.stats
+
+        stats = asyncio.run(run())
+        # two requests of 4 points per batch
+        assert (stats.requests, stats.batches) == (10, 5)
+
+    def test_errors(self, line):
+        with pytest.raises(ValueError):
+            MicroBatcher(line, window=-1)
+        with pytest.raises(ValueError):
+            MicroBatcher(line, max_points=0)
+
+        async def run():
+            batcher = MicroBatcher(line, window=0)
+            try:
+                await batcher.project(np.zeros((2, 3)), np.zeros(3))
+            finally:
+                await batcher.close()
+
+        with pytest.raises(ValueError):
+            asyncio.run(run())
+
+    def test_failing_request(self, line, requests, monkeypatch):
+        # only the request with a bad point fails, the others of the batch are projected on their own
+        project_many = line.project_many
+
+        def failing(xyz, **kwargs):
+            if np.any(xyz[:, 0] == 999):
+                raise ValueError("bad point")
+            return project_many(xyz, **kwargs)
+
+        monkeypatch.setattr(line, "project_many", failing)
+        bad = (np.array([[999.0, 0, np.nan]]), np.array([np.nan]))
+
+        async def run():
+            batcher = MicroBatcher(line, window=1.0, max_points=len(requests) * 4 + 1)
+            results = await asyncio.gather(
+                *(batcher.project(xyz, azimuth) for xyz, azimuth in [requests[0], bad, requests[1]]),
+                return_exceptions=True,
+            )
+            await batcher.close()
+            return batcher.stats, results
+
+        stats, (first, error, second) = asyncio.run(run())
+        assert isinstance(error, ValueError)
+        assert (stats.requests, stats.batches) == (3, 4)
+        for (xyz, azimuth), result in zip(requests[:2], (first, second)):
+            expected = project_many(xyz, azimuth=azimuth)
+            assert np.array_equal(result.distance_along_line, expected.distance_along_line)
+
+
+def test_batch_results(line):
+    batch = line.project_many(np.array([[1.0, 5.0]]))
+    rows = batch_results(batch)
+    assert rows[0]["distance_along_line"] == batch.distance_along_line[0]
+    assert rows[0]["side_of_line"] == "Right"
+    assert rows[0]["functional_direction"] is None or isinstance(rows[0]["functional_direction"], str)
+    assert "x" not in rows[0]
+
+
+class TestProjectionServer:
+    def test_routes(self, line):
+        async def run():
+            server = ProjectionServer({"a": line, "b": line}, port=0, window=0.001)
+            port = await server.start()
+            try:
+                return [
+                    await http(port, "GET", "/lines"),
+                    await http(port, "POST", "/project", {"line": "a", "points": [[1, 5], [9, 12, 2]]}),
+                    await http(port, "POST", "/project", {"line": "c", "points": [[1, 5]]}),
+                    await http(
+                        port, "POST", "/project", {"line": "a", "points": [[1, 5]], "azimuth": [1, 2]}
+                    ),
+                    await http(port, "POST", "/project", {"points": [[1, 5]]}),
+                    await http(port, "POST", "/project", b"not json"),
+                    await http(port, "GET", "/nothing"),
+                ]
+            finally:
+                await server.close()
+
+        lines, project, unknown, azimuth, no_line, bad_json, no_route = asyncio.run(run())
+        assert lines == (
+            200,
+            {"lines": [{"key": key, "vertices": 4, "bounds": [0, 0, 10, 30]} for key in "ab"]},
+        )
+        status, payload = project
+        assert status == 200
+        expected = line.project_many(np.array([[1, 5, np.nan], [9, 12, 2]]))
+        assert [
+            row["distance_along_line"] for row in payload["results"]
+        ] == expected.distance_along_line.tolist()
+        assert payload["results"][0]["side_of_line"] == "Right"
+        assert unknown[0] == 404 and "not found" in unknown[1]["error"]
+        assert azimuth[0] == 400 and "value per point" in azimuth[1]["error"]
+        # the line is needed if the service has more than one
+        assert no_line[0] == 404
+        assert bad_json == (400, {"error": "body should be json."})
+        assert no_route[0] == 404
+
+    @pytest.mark.parametrize(
+        "points",
+        [
+            [[1, 5, 0, 3]],
+            [[1]],
+            [[1, 5], [2]],
+            [[1, 5, 0, 3, 4, 5]],
+            [[1, "5"]],
+            [[1, True]],
+            [[1, 10**400]],
+            [1, 5],
+            "points",
+        ],
+    )
+    def test_bad_points(self, line, points):
+        async def run():
+            server = ProjectionServer({"a": line}, port=0, window=0.001)
+            port = await server.start()
+            try:
+                return await http(port, "POST", "/project", {"points": points})
+            finally:
+                await server.close()
+
+        status, payload = asyncio.run(run())
+        assert status == 400 and "points should be" in payload["error"]
+
+    def test_bad_numbers(self, line):
+        async def run():
+            server = ProjectionServer({"a": line}, port=0, window=0.001)
+            port = await server.start()
+            try:
+                return [
+                    await http(port, "POST", "/project", body.encode())
+                    for body in (
+                        '{"points": [[1, NaN]]}',
+                        '{"points": [[1, 5, Infinity]]}',
+                        '{"points": [[1, 5]], "azimuth": NaN}',
+                    )
+                ]
+            finally:
+                await server.close()
+
+        statuses = [status for status, _ in asyncio.run(run())]
+        assert statuses == [400, 400, 400]
+
+    def test_internal_error(self, line, monkeypatch):
+        def failing(xyz, **kwargs):
+            raise RuntimeError("broken")
+
+        monkeypatch.setattr(line, "project_many", failing)
+
+        async def run():
+            server = ProjectionServer({"a": line}, port=0, window=0.001)
+            port = await server.start()
+            try:
+                return [
+                    await http(port, "POST", "/project", {"points": [[1, 5]]}),
+                    await http(port, "GET", "/lines"),
+                ]
+            finally:
+                await server.close()
+
+        error, lines = asyncio.run(run())
+        assert error == (500, {"error": "RuntimeError: broken"})
+        # the service keeps answering
+        assert lines[0] == 200
+
+    def test_no_lines(self):
+        with pytest.raises(ValueError):
+            ProjectionServer({})
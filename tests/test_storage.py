@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from shapelyM import storage
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.measureNetwork import MeasureNetwork
+
+
+@pytest.fixture
+def line():
+    rng = np.random.default_rng(3)
+    return MeasureLineString(np.cumsum(rng.normal(0, 1, (200, 3)), axis=0))
+
+
+@pytest.fixture
+def points(line):
+    rng = np.random.default_rng(4)
+    return line.xy[rng.integers(0, 200, 300)] + rng.normal(0, 2, (300, 2))
+
+
+class TestLine:
+    @pytest.mark.parametrize("mmap", [True, False])
+    @pytest.mark.parametrize("index", [True, False])
+    def test_round_trip(self, line, points, tmp_path, mmap, index):
+        path = tmp_path / "line.shpm"
+        storage.save(line, path, index=index)
+        loaded = storage.load(path, mmap=mmap)
+
+        assert np.array_equal(loaded.xy, line.xy)
+        assert np.array_equal(loaded.z, line.z)
+        assert np.array_equal(loaded.m, line.m)
+        assert loaded.length_2d == line.length_2d
+        assert loaded.length_3d == line.length_3d
+        assert (loaded._spatial_index is not None) == index
+        assert not loaded.xy.flags.writeable
+
+        expected = line.project_many(points)
+        batch = loaded.project_many(points)
+        assert np.array_equal(batch.point_on_line, expected.point_on_line)
+        assert np.array_equal(batch.segment_index, expected.segment_index)
+        assert (
+            loaded.cut_profile(10, 20).result.coordinate_list()
+            == line.cut_profile(10, 20).result.coordinate_list()
+        )
+
+    def test_2d_calibrated(self, tmp_path):
+        line = MeasureLineString([[0, 0, 0], [0, 10, 100], [0, 20, 150]], m_given=True)
+        path = tmp_path / "line.shpm"
+        storage.save(line, path)
+        loaded = storage.load(path)
+        assert loaded.m_given
+        assert loaded.z is None
+        assert loaded.project_many(np.array([[1, 5], [1, 15]])).distance_along_line.tolist() == [50, 125]
+
+
+class TestNetwork:
+    def test_round_trip(self, line, points, tmp_path):
+        network = MeasureNetwork(search_radius=5, k=2)
+        network.add(line, "a")
+        network.add(MeasureLineString(line.xy + 1), 7)
+        path = tmp_path / "network.shpm"
+        storage.save(network, path)
+        loaded = storage.load(path)
+
+        assert loaded.keys() == ["a", 7]
+        assert (loaded.search_radius, loaded.k, loaded.cell_size) == (5, 2, 20)
+        expected = network.project_many(points)
+        batch = loaded.project_many(points)
+        assert batch.line_key.tolist() == expected.line_key.tolist()
+        assert np.array_equal(
+            batch.projection.point_on_line, expected.projection.point_on_line, equal_nan=True
+        )
+
+    def test_bad_key(self, line, tmp_path):
+        network = MeasureNetwork()
+        network.add(line, ("a", object()))
+        with pytest.raises(TypeError):
+            storage.save(network, tmp_path / "network.shpm")
+
+
+class TestBadFiles:
+    @pytest.fixture
+    def path(self, line, tmp_path):
+        path = tmp_path / "line.shpm"
+        storage.save(line, path)
+        return path
+
+    def test_not_a_file_of_shapelyM(self, tmp_path):
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"not a shapelyM file at all, just some bytes")
+        with pytest.raises(ValueError, match="not a shapelyM file"):
+            storage.load(path)
+
+    def test_newer_version(self, path):
+        data = bytearray(path.read_bytes())
+        data[8:12] = (storage.FORMAT_VERSION + 1).to_bytes(4, "little")
+        path.write_bytes(bytes(data))
+        with pytest.raises(ValueError, match="format version"):
+            storage.load(path)
+
+    def test_missing_index_array(self, line, tmp_path, monkeypatch):
+        array_state = MeasureLineString._array_state
+
+        def without_cell_keys(line, index):
+            settings, arrays = array_state(line, index)
+            del arrays["cell_keys"]
+            return settings, arrays
+
+        monkeypatch.setattr(MeasureLineString, "_array_state", without_cell_keys)
+        path = tmp_path / "line.shpm"
+        storage.save(line, path)
+        with pytest.raises(ValueError, match="cell_keys"):
+            storage.load(path)
+
+    def test_corrupt(self, path):
+        data = bytearray(path.read_bytes())
+        data[-1] ^= 0xFF
+        path.write_bytes(bytes(data))
+        with pytest.raises(ValueError, match="checksum"):
+            storage.load(path)
+        storage.load(path, verify=False)
+
+    def test_truncated(self, path):
+        path.write_bytes(path.read_bytes()[:-8])
+        with pytest.raises(ValueError, match="truncated"):
+            storage.load(path, verify=False)
+
+    def test_save_unknown(self, tmp_path):
+        with pytest.raises(TypeError):
+            storage.save([[0, 0], [1, 1]], tmp_path / "line.shpm")
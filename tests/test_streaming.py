@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pytest
+
+from shapelyM.linear_reference import FunctionalDirection
+from shapelyM.measureLineString import MeasureLineString
+from shapelyM.streaming import iter_chunks, project_file, project_stream
+
+
+class TestStreaming:
+    @pytest.fixture
+    def line(self):
+        return MeasureLineString([[3, 0, 0], [3, 10, 10], [3, 20, 20], [3, 30, 30]])
+
+    def test_chunks_are_lazy(self):
+        consumed = []
+
+        def points():
+            for idx in range(10):
+                consumed.append(idx)
+                yield idx, idx
+
+        chunks = iter_chunks(points(), chunk_size=4)
+        assert next(chunks).shape == (4, 2)
+        assert len(consumed) == 4
+        assert [len(chunk) for chunk in chunks] == [4, 2]
+
+    def test_same_as_project_many(self, line):
+        rng = np.random.default_rng(2)
+        points = rng.uniform(-5, 35, (101, 3))
+        progress = []
+
+        batches = list(project_stream(line, iter(points.tolist()), chunk_size=25, progress=progress.append))
+        assert [len(batch) for batch in batches] == [25, 25, 25, 25, 1]
+        assert progress == [25, 50, 75, 100, 101]
+        expected = line.project_many(points)
+        assert np.array_equal(
+            np.concatenate([batch.distance_along_line for batch in batches]), expected.distance_along_line
+        )
+
+    def test_csv(self, line, tmp_path):
+        path = tmp_path / "points.csv"
+        path.write_text("id;east;north;rotation\n1;0;5;180\n2;6;15;\n")
+        batch = next(project_file(line, path, x="east", y="north", azimuth="rotation", delimiter=";"))
+        assert batch.distance_along_line == pytest.approx(np.sqrt(2) * np.array([5, 15]))
+        assert batch.functional_direction.tolist() == [
+            FunctionalDirection.upstream,
+            FunctionalDirection.unknown,
+        ]
+        assert np.isnan(batch.distance_to_line_3d).all()
+
+    def test_geojson_lines(self, line, tmp_path):
+        path = tmp_path / "points.geojsonl"
+        features = [
+            {"type": "Feature", "geometry": {"type": "Point", "coordinates": [0, 5, 5]}, "properties": {}},
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [6, 15]},
+                "properties": {"r": 0},
+            },
+        ]
+        path.write_text("\n".join(json.dumps(feature) for feature in features) + "\n")
+        batch = next(project_file(line, path, azimuth="r"))
+        assert batch.distance_to_line_2d.tolist() == [3, 3]
+        assert batch.distance_to_line_3d[0] == 3
+        assert batch.functional_direction[1] == FunctionalDirection.downstream
+
+    def test_unknown_file(self, line):
+        with pytest.raises(ValueError):
+            project_file(line, "points.shp")